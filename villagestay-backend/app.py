@@ -2,17 +2,34 @@ from flask import Flask, jsonify
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from config import Config
-from database import mongo, init_db
+from database import mongo, init_db, ensure_retention_indexes
+from utils.background_utils import run_in_background
+from utils.logging_utils import configure_logging
+from utils.email_utils import start_email_sender
+from utils.circuit_breaker_utils import get_breaker_states
+from utils.listing_search_utils import sync_listing_index
+from utils.metrics_utils import init_metrics
+from utils.profiling_utils import init_profiling
+from cli import register_commands
 import os
 
 def create_app():
+    configure_logging()
     app = Flask(__name__)
     app.config.from_object(Config)
 
     # Initialize extensions
     init_db(app)
+    if Config.SLOW_QUERY_ENABLED or Config.PROFILING_ENABLED:
+        # Diagnostic records must expire even before the first create-indexes run
+        run_in_background(ensure_retention_indexes)
+    start_email_sender()
+    run_in_background(sync_listing_index, force=True)
     jwt = JWTManager(app)
     CORS(app)
+    register_commands(app)
+    init_metrics(app)
+    init_profiling(app)
 
     # Create upload directory
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -44,7 +61,8 @@ def create_app():
                 "Voice-to-Listing Magic", 
                 "Cultural Concierge Chat",
                 "Property Image Analysis"
-            ]
+            ],
+            "circuit_breakers": get_breaker_states()
         })
 
     @app.errorhandler(404)
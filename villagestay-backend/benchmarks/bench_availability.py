@@ -0,0 +1,30 @@
+"""Host-blocked date walk behind booking creation and dated browse"""
+from datetime import datetime, timedelta
+import pytest
+from utils.booking_utils import find_blocked_date
+
+CHECK_IN = datetime(2026, 3, 1)
+
+def make_calendar(blocked_days, start=CHECK_IN - timedelta(days=30)):
+    """Every other day blocked, starting a month before check-in and skipping the stay itself"""
+    calendar = {}
+    for offset in range(0, blocked_days * 2, 2):
+        date = start + timedelta(days=offset)
+        if not CHECK_IN <= date < CHECK_IN + timedelta(days=400):
+            calendar[date.strftime('%Y-%m-%d')] = False
+    return calendar
+
+@pytest.mark.parametrize('nights', [1, 7, 30, 180])
+@pytest.mark.parametrize('blocked_days', [0, 15, 365])
+def bench_open_stay(benchmark, nights, blocked_days):
+    # Open stays walk every night, the worst case for the loop
+    calendar = make_calendar(blocked_days)
+    check_out = CHECK_IN + timedelta(days=nights)
+    assert benchmark(find_blocked_date, calendar, CHECK_IN, check_out) is None
+
+@pytest.mark.parametrize('nights', [7, 180])
+def bench_blocked_last_night(benchmark, nights):
+    check_out = CHECK_IN + timedelta(days=nights)
+    last_night = (check_out - timedelta(days=1)).strftime('%Y-%m-%d')
+    calendar = {**make_calendar(365), last_night: False}
+    assert benchmark(find_blocked_date, calendar, CHECK_IN, check_out) == last_night
@@ -0,0 +1,50 @@
+"""Per-row response formatters used by listing detail and review pages"""
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from routes.listings import format_review, format_experience
+
+def make_reviews(rows):
+    created_at = datetime(2026, 1, 15, 9, 30)
+    return [
+        {
+            "_id": ObjectId(),
+            "reviewer_id": ObjectId(),
+            "rating": 1 + index % 5,
+            "comment": "Wonderful hosts and delicious home-cooked food. " * (1 + index % 4),
+            "created_at": created_at
+        }
+        for index in range(rows)
+    ]
+
+def make_experiences(rows):
+    return [
+        {
+            "_id": ObjectId(),
+            "title": "Pottery with a Kutchi artisan",
+            "description": "Learn traditional clay work in the village workshop.",
+            "duration": 3,
+            "price": 800,
+            "category": "cultural",
+            "max_participants": 6,
+            "images": [f"https://images.villagestay.in/experiences/{index}.jpg"],
+            "inclusions": ["Materials", "Tea"],
+            "requirements": []
+        }
+        for index in range(rows)
+    ]
+
+@pytest.mark.parametrize('rows', [1, 20, 200])
+def bench_format_review(benchmark, rows):
+    reviews = make_reviews(rows)
+    reviewer = {"full_name": "Meera Nair", "profile_image": None}
+    # Every other review has a resolved reviewer, the rest render as Anonymous
+    benchmark(lambda: [
+        format_review(review, reviewer if index % 2 else None)
+        for index, review in enumerate(reviews)
+    ])
+
+@pytest.mark.parametrize('rows', [1, 20, 200])
+def bench_format_experience(benchmark, rows):
+    experiences = make_experiences(rows)
+    benchmark(lambda: [format_experience(experience) for experience in experiences])
@@ -0,0 +1,54 @@
+"""Sustainability, carbon footprint and impact score helpers from the impact routes"""
+import pytest
+from routes.impact import (
+    calculate_sustainability_score,
+    calculate_carbon_footprint,
+    calculate_host_impact_score,
+    calculate_tourist_impact_score,
+    calculate_location_impact_score
+)
+from utils.sustainability_utils import FEATURE_SCORES, compute_sustainability_score
+
+FEATURES = sorted(FEATURE_SCORES) + ['bamboo_construction', 'biogas']
+
+def make_listing(feature_count):
+    # A stored score keeps calculate_sustainability_score off the database, as on the hot path
+    return {
+        "host_id": None,
+        "sustainability_features": FEATURES[:feature_count],
+        "sustainability_score": 60,
+        "sustainability_grade": "B+"
+    }
+
+@pytest.mark.parametrize('feature_count', [0, 5, 12])
+def bench_compute_sustainability_score(benchmark, feature_count):
+    benchmark(compute_sustainability_score, FEATURES[:feature_count], 3)
+
+@pytest.mark.parametrize('rows', [1, 50, 500])
+def bench_calculate_sustainability_score(benchmark, rows):
+    listings = [make_listing(index % len(FEATURES)) for index in range(rows)]
+    benchmark(lambda: [calculate_sustainability_score(listing) for listing in listings])
+
+@pytest.mark.parametrize('rows', [1, 50, 500])
+def bench_calculate_carbon_footprint(benchmark, rows):
+    modes = ['flight', 'train', 'bus', 'car', 'bike', 'walk', 'ferry']
+    trips = [(modes[index % len(modes)], 1 + index % 6, 1 + index % 14) for index in range(rows)]
+    benchmark(lambda: [
+        calculate_carbon_footprint('Delhi', 'Kutch', mode, guests, nights)
+        for mode, guests, nights in trips
+    ])
+
+@pytest.mark.parametrize('rows', [10, 1000])
+def bench_impact_scores(benchmark, rows):
+    stats = [
+        {
+            "total_earnings": 15000.0 * index, "total_guests": index, "total_bookings": index,
+            "community_contribution": 300.0 * index, "total_trips": index,
+            "total_revenue": 20000.0 * index, "total_visitors": 3 * index
+        }
+        for index in range(rows)
+    ]
+    benchmark(lambda: [
+        (calculate_host_impact_score(row), calculate_tourist_impact_score(row), calculate_location_impact_score(row))
+        for row in stats
+    ])
@@ -0,0 +1,29 @@
+import glob
+import os
+import pytest
+from pytest_benchmark.utils import parse_compare_fail
+
+# Saved runs live beside the benchmarks, wherever pytest is started from
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.results')
+DEFAULT_STORAGE = 'file://./.benchmarks'
+
+# A benchmark this much slower than the latest saved run fails the session
+REGRESSION_THRESHOLD = 'median:25%'
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_cmdline_main(config):
+    """Store runs in benchmarks/.results and compare against the latest one.
+
+    --benchmark-compare-fail errors out without a saved run, so it cannot sit
+    in addopts; the first run on a machine only records a baseline. This runs
+    before pytest-benchmark reads its options in pytest_configure.
+    """
+    if config.getoption('benchmark_storage') == DEFAULT_STORAGE:
+        config.option.benchmark_storage = f"file://{RESULTS_DIR}"
+    storage = config.getoption('benchmark_storage')
+    if not storage.startswith('file://') or not glob.glob(os.path.join(storage[len('file://'):], '*', '*.json')):
+        return
+    if not config.getoption('benchmark_compare'):
+        config.option.benchmark_compare = True
+    if not config.getoption('benchmark_compare_fail'):
+        config.option.benchmark_compare_fail = [parse_compare_fail(REGRESSION_THRESHOLD)]
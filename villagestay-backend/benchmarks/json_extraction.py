@@ -0,0 +1,60 @@
+"""Compare JSON extraction from large model replies against the old regex approach.
+
+    python -m benchmarks.json_extraction
+"""
+import json
+import re
+import timeit
+from utils.json_utils import extract_json, JSONExtractionError
+from utils.ai_utils import LISTING_ENHANCEMENT_SCHEMA
+
+def legacy_extract(text):
+    match = re.search(r'\{.*\}', text, re.DOTALL)
+    if not match:
+        raise ValueError("No JSON found")
+    return json.loads(match.group())
+
+def make_listing(size):
+    return {
+        "title": "Mud house homestay near the Rann",
+        "description": "Stay with a Kutchi family, learn embroidery and pottery. " * size,
+        "amenities": [f"Amenity {i} {{with braces}}" for i in range(size)],
+        "property_type": "homestay",
+        "house_rules": ["Remove shoes indoors", "No alcohol"],
+        "sustainability_features": ["Solar power", "Rainwater harvesting", "Local food"]
+    }
+
+def make_cases(size):
+    body = json.dumps(make_listing(size), ensure_ascii=False, indent=2)
+    return {
+        "bare": body,
+        "fenced": f"Here is the listing:\n```json\n{body}\n```\nLet me know if you want changes.",
+        "prose_with_braces": f"Sure! I used {{placeholders}} below.\n{body}\nNote: prices are in {{INR}}.",
+        "two_objects": f"{body}\nAlternative: {{\"title\": \"Short\", \"description\": \"x\"}}",
+        # Cut off mid-reply, so no candidate ever balances
+        "truncated": f"Here is the listing:\n{body[:len(body) * 9 // 10]}"
+    }
+
+def _timed_ms(function, number):
+    def attempt():
+        try:
+            function()
+        except (ValueError, JSONExtractionError):
+            pass
+    return min(timeit.repeat(attempt, number=number, repeat=3)) / number * 1000
+
+def run(sizes=(10, 200, 2000), number=20):
+    print(f"{'case':<20}{'size (KB)':>10}{'with schema ms':>16}{'no schema ms':>14}{'legacy regex ms':>18}")
+    for size in sizes:
+        for name, text in make_cases(size).items():
+            validated_ms = _timed_ms(lambda: extract_json(text, LISTING_ENHANCEMENT_SCHEMA), number)
+            extract_ms = _timed_ms(lambda: extract_json(text), number)
+            try:
+                legacy_extract(text)
+                old = f"{_timed_ms(lambda: legacy_extract(text), number):.3f}"
+            except (ValueError, JSONExtractionError):
+                old = "fails"
+            print(f"{name:<20}{len(text) / 1024:>10.1f}{validated_ms:>16.3f}{extract_ms:>14.3f}{old:>18}")
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,266 @@
+"""Drive the API in-process with scenario traffic and report latency and query counts.
+
+    python -m benchmarks.load_test                                  # mongomock, small scale
+    python -m benchmarks.load_test --backend mongodb --scale medium --output after.json --compare before.json
+
+Requests go through Flask's test client, so numbers cover routing, handlers
+and the database but not the network or WSGI server. Queries per request
+come from the X-Mongo-Commands header the metrics hooks add; with mongomock,
+which has no command monitoring, collection calls are counted instead.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# Keep the app quiet unless asked otherwise; must be set before config is imported
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+SCENARIOS = ['browse', 'dated_search', 'listing_detail', 'booking_burst', 'admin_dashboard']
+
+# Collection methods that each issue one command against a real server
+_MONGOMOCK_COMMANDS = [
+    'find', 'find_one', 'aggregate', 'count_documents', 'estimated_document_count', 'distinct',
+    'insert_one', 'insert_many', 'update_one', 'update_many', 'replace_one', 'delete_one',
+    'delete_many', 'find_one_and_update', 'find_one_and_replace', 'find_one_and_delete', 'bulk_write'
+]
+
+_counting = threading.local()
+
+def _count_mongomock_commands():
+    """Count mongomock collection calls as commands for the current request"""
+    import mongomock.collection
+    from utils.metrics_utils import _current_stats
+
+    def counted(method):
+        def wrapper(self, *args, **kwargs):
+            # mongomock implements some methods with others; count the outer call only
+            outer = not getattr(_counting, 'active', False)
+            stats = _current_stats() if outer else None
+            _counting.active = True
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                if outer:
+                    _counting.active = False
+                    if stats is not None:
+                        stats['mongo_commands'] += 1
+        return wrapper
+
+    for name in _MONGOMOCK_COMMANDS:
+        setattr(mongomock.collection.Collection, name, counted(getattr(mongomock.collection.Collection, name)))
+
+def create_benchmark_app(backend):
+    """Build the app against mongomock or the MongoDB named by MONGO_URI"""
+    if backend == 'mongomock':
+        import flask_pymongo
+        import mongomock
+        # Flask-PyMongo builds its client through this name; command listeners do not apply
+        flask_pymongo.MongoClient = lambda *args, event_listeners=None, **kwargs: mongomock.MongoClient(*args, **kwargs)
+        _count_mongomock_commands()
+
+    from config import Config
+    Config.METRICS_ENABLED = True
+    Config.METRICS_DEBUG_HEADERS = True
+    Config.PROFILING_ENABLED = False
+
+    from app import create_app
+    app = create_app()
+    app.config['TESTING'] = True
+    return app
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+class Scenario:
+    """Builds one request at a time for a traffic pattern"""
+
+    def __init__(self, name, dataset, tokens, rng):
+        self.name = name
+        self.dataset = dataset
+        self.tokens = tokens
+        self.rng = rng
+        self.today = datetime.utcnow().date()
+
+    def _dates(self, earliest=1, latest=110):
+        check_in = self.today + timedelta(days=self.rng.randint(earliest, latest))
+        check_out = check_in + timedelta(days=self.rng.randint(1, 4))
+        return check_in.isoformat(), check_out.isoformat()
+
+    def next_request(self):
+        """(method, url, json body or None, bearer token or None)"""
+        rng = self.rng
+        if self.name == 'browse':
+            params = f"page={rng.randint(1, 5)}&limit=12"
+            if rng.random() < 0.5:
+                params += f"&property_type={rng.choice(['homestay', 'farmstay', 'eco_lodge'])}"
+            if rng.random() < 0.3:
+                params += f"&min_price=1000&max_price={rng.choice([2500, 4000])}"
+            return 'GET', f"/api/listings/?{params}", None, None
+
+        if self.name == 'dated_search':
+            check_in, check_out = self._dates()
+            location = rng.choice(self.dataset['locations'])
+            return 'GET', (
+                f"/api/listings/?location={location}&check_in={check_in}&check_out={check_out}"
+                f"&guests={rng.randint(1, 4)}"
+            ), None, None
+
+        if self.name == 'listing_detail':
+            return 'GET', f"/api/listings/{rng.choice(self.dataset['listings'])}", None, None
+
+        if self.name == 'booking_burst':
+            check_in, check_out = self._dates()
+            tourist_id = rng.choice(self.dataset['tourists'])
+            return 'POST', '/api/bookings/', {
+                "listing_id": str(rng.choice(self.dataset['listings'])),
+                "check_in": check_in,
+                "check_out": check_out,
+                "guests": 1
+            }, self.tokens[tourist_id]
+
+        if self.name == 'admin_dashboard':
+            return 'GET', '/api/admin/dashboard', None, self.tokens[self.dataset['admin']]
+
+        raise ValueError(f"Unknown scenario {self.name}")
+
+def _issue(client, request_spec):
+    method, url, body, token = request_spec
+    headers = {'Authorization': f"Bearer {token}"} if token else {}
+    started = time.perf_counter()
+    response = client.open(url, method=method, json=body, headers=headers)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    response.close()
+    return {
+        "ms": elapsed_ms,
+        "status": response.status_code,
+        "queries": int(response.headers.get('X-Mongo-Commands', 0)),
+        "mongo_ms": float(response.headers.get('X-Mongo-Time-Ms', 0))
+    }
+
+def run_scenario(app, scenario, requests, concurrency, warmup):
+    client = app.test_client()
+    for _ in range(warmup):
+        _issue(client, scenario.next_request())
+
+    # Request specs are drawn up front so the random sequence does not depend on thread timing
+    specs = [scenario.next_request() for _ in range(requests)]
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(lambda spec: _issue(app.test_client(), spec), specs))
+    else:
+        samples = [_issue(client, spec) for spec in specs]
+    wall_seconds = time.perf_counter() - started
+
+    latencies = sorted(sample['ms'] for sample in samples)
+    queries = sorted(sample['queries'] for sample in samples)
+    statuses = {}
+    for sample in samples:
+        statuses[str(sample['status'])] = statuses.get(str(sample['status']), 0) + 1
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for sample in samples if sample['status'] >= 500),
+        "statuses": statuses,
+        "throughput_rps": round(len(samples) / wall_seconds, 1) if wall_seconds else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        "queries_mean": round(sum(queries) / len(queries), 2) if queries else 0.0,
+        "queries_p95": percentile(queries, 0.95),
+        "queries_max": queries[-1] if queries else 0,
+        "mongo_ms_mean": round(sum(sample['mongo_ms'] for sample in samples) / len(samples), 2) if samples else 0.0
+    }
+
+def print_results(results, baseline=None):
+    columns = ['p50_ms', 'p95_ms', 'p99_ms', 'queries_mean', 'queries_max', 'throughput_rps']
+    print(f"{'scenario':<18}{'reqs':>6}{'5xx':>5}" + ''.join(f"{column:>16}" for column in columns))
+    for name, result in results.items():
+        cells = []
+        for column in columns:
+            value = result[column]
+            cell = f"{value:g}"
+            before = (baseline or {}).get(name, {}).get(column)
+            if before:
+                cell += f" ({(value - before) / before * 100:+.0f}%)"
+            cells.append(f"{cell:>16}")
+        print(f"{name:<18}{result['requests']:>6}{result['errors']:>5}" + ''.join(cells))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend', choices=['mongomock', 'mongodb'], default='mongomock')
+    parser.add_argument('--mongo-uri', default='mongodb://localhost:27017/villagestay_bench',
+                        help='Database for the mongodb backend; its seeded collections are emptied first')
+    parser.add_argument('--scale', default='small', help='seed_data scale: small, medium or large')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--requests', type=int, default=200, help='Measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=1, help='Client threads (mongomock is not thread-safe)')
+    parser.add_argument('--cache', action='store_true', help='Leave the response cache on (off by default to measure handlers)')
+    parser.add_argument('--output', help='Write results as JSON')
+    parser.add_argument('--compare', help='Earlier --output file to show changes against')
+    args = parser.parse_args()
+
+    if args.backend == 'mongodb':
+        os.environ['MONGO_URI'] = args.mongo_uri
+    app = create_benchmark_app(args.backend)
+
+    from config import Config
+    from database import mongo
+    from flask_jwt_extended import create_access_token
+    from utils.auth_utils import build_identity_claims
+    from benchmarks.seed_data import generate_dataset, drop_dataset
+    Config.RESPONSE_CACHE_ENABLED = args.cache
+
+    if args.backend == 'mongodb':
+        # Indexes are a deploy step, not built at app start
+        from database import ensure_indexes
+        drop_dataset(mongo.db)
+        ensure_indexes()
+    seeded_at = time.perf_counter()
+    dataset = generate_dataset(mongo.db, args.scale, args.seed)
+    print(f"Seeded {dataset['counts']} in {time.perf_counter() - seeded_at:.1f}s on {args.backend}")
+
+    with app.app_context():
+        users = {user['_id']: user for user in mongo.db.users.find({"user_type": {"$in": ["tourist", "admin"]}})}
+        tokens = {
+            user_id: create_access_token(identity=str(user_id), additional_claims=build_identity_claims(user))
+            for user_id, user in users.items()
+        }
+
+    results = {}
+    for name in [name.strip() for name in args.scenarios.split(',') if name.strip()]:
+        scenario = Scenario(name, dataset, tokens, random.Random(f"{args.seed}:{name}"))
+        results[name] = run_scenario(app, scenario, args.requests, args.concurrency, args.warmup)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                "backend": args.backend,
+                "scale": args.scale,
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "cache": args.cache,
+                "recorded_at": datetime.utcnow().isoformat(),
+                "results": results
+            }, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+"""Synthetic users, listings, bookings and reviews for load tests.
+
+    python -m benchmarks.seed_data --scale medium --drop
+
+Seeds the database named by MONGO_URI. Derived fields (review stats,
+ratings, sustainability scores) are rebuilt with the same functions the
+CLI maintenance commands use, so seeded listings look like live ones.
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+from bson import ObjectId
+from utils.host_summary_utils import build_host_summary
+from utils.password_utils import hash_password
+
+SCALES = {
+    'small': {"hosts": 40, "tourists": 200, "listings": 150, "bookings": 1000, "review_rate": 0.6},
+    'medium': {"hosts": 400, "tourists": 2000, "listings": 1500, "bookings": 10000, "review_rate": 0.6},
+    'large': {"hosts": 4000, "tourists": 20000, "listings": 15000, "bookings": 100000, "review_rate": 0.6}
+}
+
+VILLAGES = [
+    ("Hodka, Kutch, Gujarat", 23.82, 69.75),
+    ("Kibber, Spiti Valley, Himachal Pradesh", 32.33, 78.01),
+    ("Hampi, Karnataka", 15.33, 76.46),
+    ("Majuli, Assam", 26.95, 94.17),
+    ("Khonoma, Nagaland", 25.65, 94.02),
+    ("Mawlynnong, Meghalaya", 25.20, 91.92),
+    ("Pushkar, Rajasthan", 26.49, 74.55),
+    ("Kanthalloor, Munnar, Kerala", 10.20, 77.20),
+    ("Ziro, Arunachal Pradesh", 27.59, 93.83),
+    ("Kanadukathan, Chettinad, Tamil Nadu", 10.17, 78.78),
+    ("Chitkul, Kinnaur, Himachal Pradesh", 31.35, 78.44),
+    ("Raghurajpur, Odisha", 19.87, 85.83),
+    ("Khimsar, Rajasthan", 27.02, 73.40),
+    ("Darap, Sikkim", 27.28, 88.20),
+    ("Chandrapur, Maharashtra", 19.96, 79.30)
+]
+PROPERTY_TYPES = ['homestay', 'farmstay', 'village_house', 'eco_lodge', 'heritage_home', 'cottage']
+AMENITIES = [
+    'Home-cooked meals', 'Wi-Fi', 'Hot water', 'Local guide', 'Parking', 'Bonfire',
+    'Organic farm tours', 'Bicycle rental', 'Cultural performances', 'Cooking classes',
+    'Village walks', 'Handicraft workshops'
+]
+SUSTAINABILITY_FEATURES = [
+    'solar_power', 'rainwater_harvesting', 'organic_farming', 'waste_composting',
+    'local_sourcing', 'plastic_free', 'energy_efficient', 'water_conservation',
+    'local_employment', 'cultural_preservation'
+]
+FIRST_NAMES = ['Aarav', 'Diya', 'Kabir', 'Meera', 'Rohan', 'Anaya', 'Vikram', 'Isha', 'Arjun', 'Priya', 'Tenzin', 'Lalit']
+LAST_NAMES = ['Sharma', 'Patel', 'Reddy', 'Das', 'Singh', 'Nair', 'Bora', 'Iyer', 'Negi', 'Khan', 'Lepcha', 'Meena']
+REVIEW_COMMENTS = [
+    "Wonderful hosts and delicious home-cooked food.",
+    "Loved the solar-powered cottage and the organic farm walk.",
+    "Peaceful village, a bit hard to reach but worth it.",
+    "Great cultural experience, the kids enjoyed the pottery class.",
+    "Clean rooms, eco-friendly practices everywhere.",
+    "Average stay, water supply was irregular."
+]
+
+def _insert(collection, docs, batch_size=5000):
+    for start in range(0, len(docs), batch_size):
+        collection.insert_many(docs[start:start + batch_size], ordered=False)
+
+def make_user(rng, user_type, index, now, password_hash):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    return {
+        "_id": ObjectId(),
+        "email": f"{user_type}{index}@bench.villagestay.in",
+        "password": password_hash,
+        "full_name": name,
+        "user_type": user_type,
+        "phone": f"+91{rng.randint(7000000000, 9999999999)}",
+        "address": None,
+        "created_at": now - timedelta(days=rng.randint(1, 900)),
+        "is_verified": True,
+        "profile_image": f"https://images.villagestay.in/users/{index}.jpg" if rng.random() < 0.7 else None,
+        "preferred_language": rng.choice(['en', 'hi', 'gu', 'ta'])
+    }
+
+def make_calendar(rng, today, days=180, blocked_rate=0.05):
+    """Host-blocked dates over the coming months, as the availability endpoints store them"""
+    calendar = {}
+    for offset in range(days):
+        if rng.random() < blocked_rate:
+            calendar[(today + timedelta(days=offset)).strftime('%Y-%m-%d')] = False
+    return calendar
+
+def make_listing(rng, host, today, now):
+    location, lat, lng = rng.choice(VILLAGES)
+    property_type = rng.choice(PROPERTY_TYPES)
+    listing_id = ObjectId()
+    created_at = now - timedelta(days=rng.randint(1, 600))
+    return {
+        "_id": listing_id,
+        "host_id": host['_id'],
+        "title": f"{rng.choice(['Traditional', 'Rustic', 'Heritage', 'Eco', 'Riverside', 'Hilltop'])} "
+                 f"{property_type.replace('_', ' ')} in {location.split(',')[0]}",
+        "description": (
+            f"Stay with a local family in {location}. " + ' '.join(rng.sample(REVIEW_COMMENTS, 3)) +
+            " Guests can join farm work, village walks and seasonal festivals."
+        ),
+        "location": location,
+        "price_per_night": float(rng.randrange(800, 6000, 100)),
+        "property_type": property_type,
+        "amenities": rng.sample(AMENITIES, rng.randint(4, 9)),
+        "images": [
+            f"https://images.villagestay.in/listings/{listing_id}/{n}.jpg"
+            for n in range(rng.randint(3, 8))
+        ],
+        "coordinates": {"lat": lat + rng.uniform(-0.05, 0.05), "lng": lng + rng.uniform(-0.05, 0.05)},
+        "max_guests": rng.randint(2, 8),
+        "house_rules": ["Respect local customs", "No smoking indoors"],
+        "sustainability_features": rng.sample(SUSTAINABILITY_FEATURES, rng.randint(0, 6)),
+        "created_at": created_at,
+        "updated_at": created_at,
+        "is_active": rng.random() < 0.95,
+        "is_approved": rng.random() < 0.9,
+        "rating": 0.0,
+        "review_count": 0,
+        "availability_calendar": make_calendar(rng, today),
+        "host_summary": build_host_summary(host)
+    }
+
+def make_bookings(rng, listing, tourists, count, today, now):
+    """Non-overlapping stays for one listing, from six months ago to four months ahead"""
+    bookings = []
+    cursor = today - timedelta(days=180)
+    horizon = today + timedelta(days=120)
+    while len(bookings) < count and cursor < horizon:
+        check_in = cursor + timedelta(days=rng.randint(0, 6))
+        nights = rng.randint(1, 5)
+        check_out = check_in + timedelta(days=nights)
+        cursor = check_out
+
+        if check_out <= today:
+            status, payment_status = rng.choices(
+                [('completed', 'paid'), ('cancelled', 'refunded')], weights=[9, 1]
+            )[0]
+        else:
+            status, payment_status = rng.choices(
+                [('confirmed', 'paid'), ('pending', 'unpaid'), ('cancelled', 'refunded')], weights=[6, 3, 1]
+            )[0]
+
+        base_amount = listing['price_per_night'] * nights
+        platform_fee = base_amount * 0.05
+        community_contribution = base_amount * 0.02
+        created_at = min(now, check_in - timedelta(days=rng.randint(1, 45)))
+        bookings.append({
+            "_id": ObjectId(),
+            "listing_id": listing['_id'],
+            "tourist_id": rng.choice(tourists)['_id'],
+            "host_id": listing['host_id'],
+            "check_in": check_in,
+            "check_out": check_out,
+            "guests": rng.randint(1, listing['max_guests']),
+            "nights": nights,
+            "base_amount": base_amount,
+            "platform_fee": platform_fee,
+            "community_contribution": community_contribution,
+            "host_earnings": base_amount - platform_fee - community_contribution,
+            "total_amount": base_amount + platform_fee,
+            "special_requests": "",
+            "created_at": created_at,
+            "updated_at": created_at,
+            "status": status,
+            "payment_status": payment_status,
+            "payment_id": f"pay_{ObjectId()}" if payment_status != 'unpaid' else None,
+            "booking_reference": f"VS{ObjectId()}".upper()
+        })
+    return bookings
+
+def make_review(rng, booking):
+    return {
+        "_id": ObjectId(),
+        "booking_id": booking['_id'],
+        "listing_id": booking['listing_id'],
+        "reviewer_id": booking['tourist_id'],
+        "reviewee_id": booking['host_id'],
+        "rating": rng.choices([5, 4, 3, 2, 1], weights=[50, 30, 12, 5, 3])[0],
+        "comment": rng.choice(REVIEW_COMMENTS),
+        "review_type": "tourist_to_host",
+        "created_at": booking['check_out'] + timedelta(days=rng.randint(0, 10)),
+        "is_verified": True
+    }
+
+def generate_dataset(db, scale='small', seed=42):
+    """Insert a synthetic dataset into ``db`` and return the ids scenarios need.
+
+    ``scale`` is a SCALES name or a dict with the same keys. The same seed
+    always produces the same users, listings and stays (ids aside).
+    """
+    sizes = SCALES[scale] if isinstance(scale, str) else scale
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    # Every seeded user shares one password ("benchmark"), hashed once
+    password_hash = hash_password('benchmark')
+    hosts = [make_user(rng, 'host', i, now, password_hash) for i in range(sizes['hosts'])]
+    tourists = [make_user(rng, 'tourist', i, now, password_hash) for i in range(sizes['tourists'])]
+    admin = make_user(rng, 'admin', 0, now, password_hash)
+    _insert(db.users, hosts + tourists + [admin])
+
+    listings = [make_listing(rng, rng.choice(hosts), today, now) for _ in range(sizes['listings'])]
+    _insert(db.listings, listings)
+
+    per_listing = max(1, sizes['bookings'] // max(1, len(listings)))
+    bookings = []
+    for listing in listings:
+        bookings.extend(make_bookings(rng, listing, tourists, per_listing, today, now))
+    _insert(db.bookings, bookings)
+
+    reviews = [
+        make_review(rng, booking) for booking in bookings
+        if booking['status'] == 'completed' and rng.random() < sizes['review_rate']
+    ]
+    if reviews:
+        _insert(db.reviews, reviews)
+
+    # Ratings, review histograms and sustainability scores come from the maintenance jobs
+    from utils.review_utils import rebuild_review_stats
+    from utils.sustainability_utils import recompute_sustainability_scores
+    rebuild_review_stats()
+    recompute_sustainability_scores()
+
+    bookable = [listing for listing in listings if listing['is_active'] and listing['is_approved']]
+    return {
+        "hosts": [host['_id'] for host in hosts],
+        "tourists": [tourist['_id'] for tourist in tourists],
+        "admin": admin['_id'],
+        "listings": [listing['_id'] for listing in bookable],
+        "locations": sorted({listing['location'].split(',')[0] for listing in bookable}),
+        "counts": {
+            "users": len(hosts) + len(tourists) + 1,
+            "listings": len(listings),
+            "bookings": len(bookings),
+            "reviews": len(reviews)
+        }
+    }
+
+def drop_dataset(db):
+    for name in ('users', 'listings', 'bookings', 'reviews', 'cache_versions'):
+        db[name].delete_many({})
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--drop', action='store_true', help='Delete existing users, listings, bookings and reviews first')
+    args = parser.parse_args()
+
+    from app import create_app
+    from database import mongo
+    create_app()
+    if args.drop:
+        drop_dataset(mongo.db)
+    dataset = generate_dataset(mongo.db, args.scale, args.seed)
+    print(f"Seeded {mongo.db.name}: " + ', '.join(f"{count} {name}" for name, count in dataset['counts'].items()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import click
+from database import ensure_indexes
+
+def register_commands(app):
+    """Register maintenance commands on the Flask CLI"""
+    
+    @app.cli.command('create-indexes')
+    def create_indexes_command():
+        """Create the MongoDB indexes used by the API; run once per deploy"""
+        from database import mongo
+        from utils.booking_utils import backfill_booking_references
+        from utils.review_utils import find_duplicate_reviews
+        
+        # The unique reference index cannot build over missing or shared references
+        if 'booking_reference_1' not in mongo.db.bookings.index_information():
+            reissued = backfill_booking_references()
+            if reissued:
+                click.echo(f"Reissued {reissued} missing or duplicate booking references (old ones kept as aliases)")
+        
+        # Duplicate reviews are reported, never deleted; the unique build fails until they are resolved
+        if 'reviewer_id_1_booking_id_1' not in mongo.db.reviews.index_information():
+            duplicates = find_duplicate_reviews()
+            for duplicate in duplicates:
+                click.echo(
+                    f"Duplicate reviews of booking {duplicate['_id']['booking_id']} by {duplicate['_id']['reviewer_id']}: "
+                    + ', '.join(str(review_id) for review_id in duplicate['review_ids'])
+                )
+            if duplicates:
+                click.echo("The unique review index needs these removed first; the existing index is kept")
+        
+        failed = ensure_indexes()
+        if failed:
+            raise click.ClickException(f"{failed} indexes could not be created; see the log for details")
+        click.echo("Indexes created")
+    
+    @app.cli.command('rebuild-review-stats')
+    def rebuild_review_stats_command():
+        """Recompute review aggregates on hosts and listings"""
+        from utils.review_utils import rebuild_review_stats
+        result = rebuild_review_stats()
+        click.echo(f"Rebuilt review stats for {result['users']} users and {result['listings']} listings")
+    
+    @app.cli.command('recompute-sustainability-scores')
+    def recompute_sustainability_scores_command():
+        """Recompute stored sustainability scores for every listing"""
+        from utils.sustainability_utils import recompute_sustainability_scores
+        count = recompute_sustainability_scores()
+        click.echo(f"Recomputed sustainability scores for {count} listings")
+    
+    @app.cli.command('send-pending-emails')
+    def send_pending_emails_command():
+        """Deliver queued outbox emails, for deployments without the sender thread"""
+        from utils.email_utils import deliver_pending_emails
+        total = 0
+        while True:
+            delivered = deliver_pending_emails()
+            total += delivered
+            if not delivered:
+                break
+        click.echo(f"Delivered {total} emails")
+    
+    @app.cli.command('query-report')
+    @click.option('--limit', default=20, help='Number of query shapes to show')
+    @click.option('--sort', 'sort_by', type=click.Choice(['total_ms', 'max_ms', 'count']), default='total_ms')
+    @click.option('--reset', is_flag=True, help='Clear the slow query log after printing')
+    def query_report_command(limit, sort_by, reset):
+        """Show the slowest MongoDB query shapes and their sampled plans"""
+        from database import mongo
+        from utils.slow_query_utils import get_slow_query_report
+        report = get_slow_query_report(limit, sort_by)
+        if not report:
+            click.echo("No slow queries recorded")
+        for entry in report:
+            plan = entry.get('plan')
+            if plan:
+                plan_text = ('COLLSCAN ' if plan['collection_scan'] else '') + (', '.join(plan['indexes']) or '-')
+            else:
+                plan_text = 'not explained'
+            click.echo(
+                f"{entry['_id']}  {entry['command']:<13} {entry['collection']:<24} "
+                f"count={entry['count']:<6} avg={entry['avg_ms']:.0f}ms max={entry['max_ms']:.0f}ms  plan: {plan_text}"
+            )
+            click.echo(f"    {entry['shape']}")
+        if reset:
+            mongo.db.slow_queries.delete_many({})
+            click.echo("Slow query log cleared")
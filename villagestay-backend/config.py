@@ -20,4 +20,98 @@ class Config:
     AZURE_GPT_ENDPOINT = os.environ.get('AZURE_GPT_ENDPOINT') or 'https://codecuffs1.openai.azure.com/'
     AZURE_GPT_API_KEY = os.environ.get('AZURE_GPT_API_KEY')
     AZURE_GPT_API_VERSION = os.environ.get('AZURE_GPT_API_VERSION') or '2024-12-01-preview'
-    AZURE_GPT_DEPLOYMENT = os.environ.get('AZURE_GPT_DEPLOYMENT') or 'gpt-4o'
\ No newline at end of file
+    AZURE_GPT_DEPLOYMENT = os.environ.get('AZURE_GPT_DEPLOYMENT') or 'gpt-4o'
+    
+    # Response cache for anonymous listing browse endpoints
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL') or 300)  # seconds
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES') or 1000)
+    RESPONSE_CACHE_VERSION_SYNC_SECONDS = float(os.environ.get('RESPONSE_CACHE_VERSION_SYNC_SECONDS') or 2)  # cross-worker staleness bound
+    
+    # Background task pool for fan-out updates and recomputes
+    BACKGROUND_WORKERS = int(os.environ.get('BACKGROUND_WORKERS') or 2)
+    
+    # Booking reference generator; set a distinct node id per worker to rule out collisions
+    BOOKING_REFERENCE_NODE_ID = os.environ.get('BOOKING_REFERENCE_NODE_ID')  # 0 - 1048575, random per process if unset
+    
+    # Process cache for the authenticated user document
+    USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL') or 30)  # seconds
+    USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES') or 10000)
+    
+    # Password hashing; stored hashes using other parameters are upgraded on login
+    PASSWORD_HASH_SCHEME = os.environ.get('PASSWORD_HASH_SCHEME') or 'bcrypt'  # bcrypt or pbkdf2
+    PASSWORD_BCRYPT_ROUNDS = int(os.environ.get('PASSWORD_BCRYPT_ROUNDS') or 12)
+    PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS') or 600000)
+    
+    # Outgoing email; messages are queued in the email_outbox collection and sent by a background thread
+    EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND') or 'console'  # console, file or smtp
+    EMAIL_FROM = os.environ.get('EMAIL_FROM') or 'VillageStay <no-reply@villagestay.in>'
+    EMAIL_FILE_PATH = os.environ.get('EMAIL_FILE_PATH') or 'sent_emails.log'
+    SMTP_HOST = os.environ.get('SMTP_HOST') or 'localhost'
+    SMTP_PORT = int(os.environ.get('SMTP_PORT') or 587)
+    SMTP_USERNAME = os.environ.get('SMTP_USERNAME')
+    SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD')
+    SMTP_USE_TLS = os.environ.get('SMTP_USE_TLS', 'true').lower() == 'true'
+    SMTP_TIMEOUT = float(os.environ.get('SMTP_TIMEOUT') or 10)  # seconds
+    EMAIL_SENDER_ENABLED = os.environ.get('EMAIL_SENDER_ENABLED', 'true').lower() == 'true'
+    EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE') or 50)
+    EMAIL_OUTBOX_POLL_SECONDS = float(os.environ.get('EMAIL_OUTBOX_POLL_SECONDS') or 5)
+    EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS') or 5)
+    
+    # Per-user token buckets for AI endpoints, as "<requests>/<seconds>" per endpoint class
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMITS = {
+        'ai_chat': os.environ.get('RATE_LIMIT_AI_CHAT') or '20/60',
+        'ai_text': os.environ.get('RATE_LIMIT_AI_TEXT') or '30/60',
+        'ai_media': os.environ.get('RATE_LIMIT_AI_MEDIA') or '5/60'
+    }
+    RATE_LIMIT_MAX_BUCKETS = int(os.environ.get('RATE_LIMIT_MAX_BUCKETS') or 50000)
+    # Upstream AI calls allowed at once per process; extra requests get 429 instead of a worker thread
+    AI_MAX_CONCURRENT = int(os.environ.get('AI_MAX_CONCURRENT') or 4)
+    AI_ADMISSION_WAIT_SECONDS = float(os.environ.get('AI_ADMISSION_WAIT_SECONDS') or 0.5)
+    AI_RETRY_AFTER_SECONDS = int(os.environ.get('AI_RETRY_AFTER_SECONDS') or 5)
+    
+    # Gemini upstream protection
+    GEMINI_CONNECT_TIMEOUT = float(os.environ.get('GEMINI_CONNECT_TIMEOUT') or 3.05)  # seconds
+    GEMINI_READ_TIMEOUT = float(os.environ.get('GEMINI_READ_TIMEOUT') or 30)  # seconds
+    GEMINI_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('GEMINI_BREAKER_FAILURE_THRESHOLD') or 5)  # consecutive failures before opening
+    GEMINI_BREAKER_RESET_SECONDS = float(os.environ.get('GEMINI_BREAKER_RESET_SECONDS') or 30)  # open time before a probe
+    GEMINI_FALLBACK_CACHE_SIZE = int(os.environ.get('GEMINI_FALLBACK_CACHE_SIZE') or 500)  # last-known-good responses kept
+    
+    # In-process BM25 index used by the concierge to find listings
+    LISTING_INDEX_SYNC_SECONDS = float(os.environ.get('LISTING_INDEX_SYNC_SECONDS') or 5)  # max staleness after a listing write
+    LISTING_INDEX_SYNC_OVERLAP_SECONDS = float(os.environ.get('LISTING_INDEX_SYNC_OVERLAP_SECONDS') or 60)  # re-read window for clock skew and late commits
+    CONCIERGE_LISTING_RESULTS = int(os.environ.get('CONCIERGE_LISTING_RESULTS') or 3)
+    
+    # Concierge session memory
+    CONCIERGE_CONTEXT_TOKEN_BUDGET = int(os.environ.get('CONCIERGE_CONTEXT_TOKEN_BUDGET') or 1200)  # prompt tokens for summary + recent turns
+    CONCIERGE_SESSION_RECENT_TURNS = int(os.environ.get('CONCIERGE_SESSION_RECENT_TURNS') or 6)  # unsummarized turns before folding into the summary
+    CONCIERGE_SESSION_KEEP_TURNS = int(os.environ.get('CONCIERGE_SESSION_KEEP_TURNS') or 2)  # newest turns kept verbatim after folding
+    CONCIERGE_SUMMARY_MAX_WORDS = int(os.environ.get('CONCIERGE_SUMMARY_MAX_WORDS') or 150)
+    CONCIERGE_SUMMARY_LEASE_SECONDS = int(os.environ.get('CONCIERGE_SUMMARY_LEASE_SECONDS') or 120)  # a summarizer run older than this is presumed dead
+    
+    # Prometheus metrics at /metrics; per process, so scrape each worker
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # scrapers send "Authorization: Bearer <token>"; admins may use their JWT
+    METRICS_PUBLIC = os.environ.get('METRICS_PUBLIC', 'false').lower() == 'true'  # serve /metrics without any credentials
+    METRICS_DEBUG_HEADERS = os.environ.get('METRICS_DEBUG_HEADERS', 'false').lower() == 'true'  # X-Mongo-Commands on responses
+    
+    # Slow MongoDB operation log, aggregated by query shape in the slow_queries collection
+    SLOW_QUERY_ENABLED = os.environ.get('SLOW_QUERY_ENABLED', 'true').lower() == 'true'
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS') or 100)
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.environ.get('SLOW_QUERY_EXPLAIN_SAMPLE_RATE') or 0)  # share of slow operations explained; 0 disables explain
+    SLOW_QUERY_EXPLAIN_INTERVAL = float(os.environ.get('SLOW_QUERY_EXPLAIN_INTERVAL') or 600)  # seconds between explains per shape
+    SLOW_QUERY_RETENTION_HOURS = int(os.environ.get('SLOW_QUERY_RETENTION_HOURS') or 168)  # fingerprints not seen for this long expire
+    
+    # Opt-in per-request sampling profiler for admins (X-Profile: 1 header or ?__profile=1)
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() == 'true'
+    PROFILE_SAMPLE_INTERVAL_MS = float(os.environ.get('PROFILE_SAMPLE_INTERVAL_MS') or 2)
+    PROFILE_MAX_SECONDS = float(os.environ.get('PROFILE_MAX_SECONDS') or 60)  # sampling stops after this
+    PROFILE_MAX_CONCURRENT = int(os.environ.get('PROFILE_MAX_CONCURRENT') or 2)  # per process
+    PROFILE_RETENTION_HOURS = int(os.environ.get('PROFILE_RETENTION_HOURS') or 72)
+    
+    # Logging: records are queued on the request thread and written to stdout by a background thread
+    LOG_LEVEL = (os.environ.get('LOG_LEVEL') or 'INFO').upper()
+    LOG_FORMAT = os.environ.get('LOG_FORMAT') or 'json'  # json or text
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE') or 10000)  # records beyond this are dropped, never blocked on
+    LOG_SAMPLE_RATES = os.environ.get('LOG_SAMPLE_RATES') or ''  # e.g. "routes.bookings=0.1,utils.ai_utils=0.5"; DEBUG/INFO only
@@ -1,8 +1,92 @@
+import logging
 from flask_pymongo import PyMongo
+from pymongo import ASCENDING, DESCENDING
+from config import Config
+
+logger = logging.getLogger(__name__)
 
 mongo = PyMongo()
 
 def init_db(app):
     """Initialize database with app"""
-    mongo.init_app(app)
-    return mongo
\ No newline at end of file
+    from utils.metrics_utils import MongoCommandListener
+    from utils.slow_query_utils import SlowQueryListener
+    
+    # Command monitoring feeds per-request query counts, latency metrics and the slow query log
+    listeners = [MongoCommandListener()]
+    if Config.SLOW_QUERY_ENABLED:
+        listeners.append(SlowQueryListener())
+    mongo.init_app(app, event_listeners=listeners)
+    return mongo
+
+def _create_index(collection, keys, **kwargs):
+    """Create one index, logging a failure instead of raising so later indexes still get built"""
+    try:
+        collection.create_index(keys, **kwargs)
+        return True
+    except Exception as e:
+        logger.error("Could not create index %s on %s: %s", keys, collection.name, e)
+        return False
+
+def ensure_indexes():
+    """Create the indexes the hot read paths rely on (idempotent).
+
+    Run as a deploy step through ``flask create-indexes``, never at app start,
+    so workers booting together do not race on index builds. The diagnostic
+    TTL indexes from ensure_retention_indexes() are the one exception. Returns the
+    number of indexes that could not be created; each failure is logged.
+    """
+    db = mongo.db
+    results = []
+    # Paginated reviews on listing detail, newest first
+    results.append(_create_index(db.reviews, [("reviewee_id", ASCENDING), ("created_at", DESCENDING)]))
+    # One review per booking and reviewer. Keyed reviewer-first so it can be built
+    # beside the older non-unique (booking_id, reviewer_id) index, which is only
+    # dropped once this one exists; duplicates make the build fail harmlessly
+    if _create_index(db.reviews, [("reviewer_id", ASCENDING), ("booking_id", ASCENDING)], unique=True):
+        if 'booking_id_1_reviewer_id_1' in db.reviews.index_information():
+            db.reviews.drop_index('booking_id_1_reviewer_id_1')
+        results.append(True)
+    else:
+        results.append(False)
+    # Host summary fan-out and host listing pages
+    results.append(_create_index(db.listings, [("host_id", ASCENDING), ("created_at", DESCENDING)]))
+    # Booking references are generated without a lookup; this enforces uniqueness.
+    # create-indexes reissues missing or duplicate references before building it
+    results.append(_create_index(
+        db.bookings, "booking_reference", unique=True,
+        partialFilterExpression={"booking_reference": {"$type": "string"}}
+    ))
+    # Reissued references stay findable under their old value
+    results.append(_create_index(db.bookings, "previous_booking_references"))
+    # Per-listing booking stats and availability checks
+    results.append(_create_index(db.bookings, [("listing_id", ASCENDING), ("status", ASCENDING)]))
+    # Sort and filter browse results by the precomputed sustainability score
+    results.append(_create_index(db.listings, [
+        ("is_active", ASCENDING), ("is_approved", ASCENDING), ("sustainability_score", DESCENDING)
+    ]))
+    # Outbox sender claims due messages in order; delivered ones expire after a week
+    results.append(_create_index(db.email_outbox, [("status", ASCENDING), ("next_attempt_at", ASCENDING)]))
+    results.append(_create_index(db.email_outbox, "sent_at", expireAfterSeconds=7 * 24 * 3600))
+    # Incremental sync of the concierge listing search index
+    results.append(_create_index(db.listings, "updated_at"))
+    # Concierge history by session, and the legacy seed for session memory
+    results.append(_create_index(db.concierge_conversations, [
+        ("session_id", ASCENDING), ("user_id", ASCENDING), ("created_at", DESCENDING)
+    ]))
+    results.extend(ensure_retention_indexes())
+    return results.count(False)
+
+def ensure_retention_indexes():
+    """Create the TTL indexes of the diagnostic collections, returning one success flag each.
+
+    These collections are only written while their feature is switched on, and
+    their indexes are cheap to build, so the app also creates them at start.
+    """
+    db = mongo.db
+    return [
+        # Request profiles expire after the retention window
+        _create_index(db.profiles, "created_at", expireAfterSeconds=Config.PROFILE_RETENTION_HOURS * 3600),
+        # Slow query fingerprints expire once the shape stops showing up
+        _create_index(db.slow_queries, "last_seen", expireAfterSeconds=Config.SLOW_QUERY_RETENTION_HOURS * 3600)
+    ]
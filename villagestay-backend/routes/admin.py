@@ -1,7 +1,13 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from bson import ObjectId
 from database import mongo
+from utils.cache_utils import invalidate_listing_cache
+from utils.host_summary_utils import format_host_summary, load_missing_host_summaries
+from utils.review_utils import delete_review
+from utils.booking_utils import hydrate_bookings, booking_reference_query
+from utils.auth_utils import get_current_user_type
+from utils.profiling_utils import to_collapsed, to_speedscope
 from datetime import datetime, timedelta
 import math
 
@@ -9,9 +15,50 @@ admin_bp = Blueprint('admin', __name__)
 
 def verify_admin():
     """Verify user is admin"""
-    user_id = get_jwt_identity()
-    user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
-    return user and user['user_type'] == 'admin'
+    return get_current_user_type() == 'admin'
+
+def get_user_stats(users):
+    """Count listings and bookings for a page of users.
+
+    Hosts are counted by host_id and everyone else by tourist_id, matching
+    the per-user counts the users table shows.
+    """
+    host_ids = [user['_id'] for user in users if user['user_type'] == 'host']
+    tourist_ids = [user['_id'] for user in users if user['user_type'] != 'host']
+    
+    listings_counts = {}
+    if host_ids:
+        listings_counts = {
+            row['_id']: row['count']
+            for row in mongo.db.listings.aggregate([
+                {"$match": {"host_id": {"$in": host_ids}}},
+                {"$group": {"_id": "$host_id", "count": {"$sum": 1}}}
+            ])
+        }
+    
+    bookings_counts = {}
+    if users:
+        facets = list(mongo.db.bookings.aggregate([
+            {"$match": {"$or": [
+                {"host_id": {"$in": host_ids}},
+                {"tourist_id": {"$in": tourist_ids}}
+            ]}},
+            {"$facet": {
+                "by_host": [
+                    {"$match": {"host_id": {"$in": host_ids}}},
+                    {"$group": {"_id": "$host_id", "count": {"$sum": 1}}}
+                ],
+                "by_tourist": [
+                    {"$match": {"tourist_id": {"$in": tourist_ids}}},
+                    {"$group": {"_id": "$tourist_id", "count": {"$sum": 1}}}
+                ]
+            }}
+        ]))
+        if facets:
+            for row in facets[0]['by_host'] + facets[0]['by_tourist']:
+                bookings_counts[row['_id']] = row['count']
+    
+    return listings_counts, bookings_counts
 
 @admin_bp.route('/dashboard', methods=['GET'])
 @jwt_required()
@@ -159,16 +206,14 @@ def get_users():
         # Get total count
         total_count = mongo.db.users.count_documents(query)
         
+        # Get per-row stats for the whole page in two grouped queries
+        listings_counts, bookings_counts = get_user_stats(users)
+        
         # Format users
         formatted_users = []
         for user in users:
-            # Get user stats
-            if user['user_type'] == 'host':
-                listings_count = mongo.db.listings.count_documents({"host_id": user['_id']})
-                bookings_count = mongo.db.bookings.count_documents({"host_id": user['_id']})
-            else:
-                listings_count = 0
-                bookings_count = mongo.db.bookings.count_documents({"tourist_id": user['_id']})
+            listings_count = listings_counts.get(user['_id'], 0)
+            bookings_count = bookings_counts.get(user['_id'], 0)
             
             formatted_user = {
                 "id": str(user['_id']),
@@ -239,28 +284,40 @@ def get_admin_listings():
         # Get total count
         total_count = mongo.db.listings.count_documents(query)
         
-        # Format listings
-        formatted_listings = []
-        for listing in listings:
-            # Get host info
-            host = mongo.db.users.find_one({"_id": listing['host_id']})
-            
-            # Get booking stats
-            booking_stats = list(mongo.db.bookings.aggregate([
-                {"$match": {"listing_id": listing['_id']}},
+        # Names come from the embedded host summary; emails in one batched query
+        legacy_summaries = load_missing_host_summaries(listings)
+        host_emails = {
+            host['_id']: host['email']
+            for host in mongo.db.users.find(
+                {"_id": {"$in": list({listing['host_id'] for listing in listings})}},
+                {"email": 1}
+            )
+        }
+        
+        # Booking stats for the whole page in one grouped pipeline
+        booking_stats = {
+            row.pop('_id'): row
+            for row in mongo.db.bookings.aggregate([
+                {"$match": {"listing_id": {"$in": [listing['_id'] for listing in listings]}}},
                 {"$group": {
-                    "_id": None,
+                    "_id": "$listing_id",
                     "total_bookings": {"$sum": 1},
                     "confirmed_bookings": {"$sum": {"$cond": [{"$eq": ["$status", "confirmed"]}, 1, 0]}},
                     "total_revenue": {"$sum": {"$cond": [{"$eq": ["$status", "confirmed"]}, "$total_amount", 0]}}
                 }}
-            ]))
+            ])
+        } if listings else {}
+        
+        # Format listings
+        formatted_listings = []
+        for listing in listings:
+            host = format_host_summary(listing, legacy_summaries.get(listing['host_id']))
             
-            booking_data = booking_stats[0] if booking_stats else {
+            booking_data = booking_stats.get(listing['_id'], {
                 "total_bookings": 0,
                 "confirmed_bookings": 0,
                 "total_revenue": 0
-            }
+            })
             
             formatted_listing = {
                 "id": str(listing['_id']),
@@ -272,9 +329,9 @@ def get_admin_listings():
                 "is_approved": listing['is_approved'],
                 "created_at": listing['created_at'].isoformat(),
                 "host": {
-                    "id": str(host['_id']),
+                    "id": host['id'],
                     "full_name": host['full_name'],
-                    "email": host['email']
+                    "email": host_emails.get(listing['host_id'])
                 } if host else None,
                 "booking_stats": booking_data
             }
@@ -321,6 +378,8 @@ def approve_listing(listing_id):
         if result.matched_count == 0:
             return jsonify({"error": "Listing not found"}), 404
         
+        invalidate_listing_cache(listing_id)
+        
         # Send approval notification to host
         # send_listing_approval_notification(listing_id)
         
@@ -361,6 +420,8 @@ def reject_listing(listing_id):
         if result.matched_count == 0:
             return jsonify({"error": "Listing not found"}), 404
         
+        invalidate_listing_cache(listing_id)
+        
         # Send rejection notification to host
         # send_listing_rejection_notification(listing_id, rejection_reason)
         
@@ -369,6 +430,22 @@ def reject_listing(listing_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@admin_bp.route('/reviews/<review_id>', methods=['DELETE'])
+@jwt_required()
+def remove_review(review_id):
+    try:
+        if not verify_admin():
+            return jsonify({"error": "Admin access required"}), 403
+        
+        # Delete review and update host/listing rating aggregates
+        if not delete_review(review_id):
+            return jsonify({"error": "Review not found"}), 404
+        
+        return jsonify({"message": "Review deleted successfully"}), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @admin_bp.route('/bookings', methods=['GET'])
 @jwt_required()
 def get_admin_bookings():
@@ -382,12 +459,17 @@ def get_admin_bookings():
         status = request.args.get('status')
         date_from = request.args.get('date_from')
         date_to = request.args.get('date_to')
+        reference = request.args.get('reference', '').strip()
         
         # Build query
         query = {}
         if status:
             query["status"] = status
         
+        if reference:
+            # Reissued bookings are still found by the reference the guest was sent
+            query.update(booking_reference_query(reference))
+        
         if date_from and date_to:
             query["created_at"] = {
                 "$gte": datetime.strptime(date_from, '%Y-%m-%d'),
@@ -405,13 +487,19 @@ def get_admin_bookings():
         # Get total count
         total_count = mongo.db.bookings.count_documents(query)
         
+        # Resolve listings, tourists and hosts for the whole page at once
+        listings, users = hydrate_bookings(
+            bookings,
+            listing_projection={"title": 1, "location": 1},
+            user_projection={"full_name": 1, "email": 1}
+        )
+        
         # Format bookings
         formatted_bookings = []
         for booking in bookings:
-            # Get related data
-            listing = mongo.db.listings.find_one({"_id": booking['listing_id']})
-            tourist = mongo.db.users.find_one({"_id": booking['tourist_id']})
-            host = mongo.db.users.find_one({"_id": booking['host_id']})
+            listing = listings.get(booking['listing_id'])
+            tourist = users.get(booking['tourist_id'])
+            host = users.get(booking['host_id'])
             
             formatted_booking = {
                 "id": str(booking['_id']),
@@ -530,4 +618,51 @@ def get_analytics():
         return jsonify(analytics_data), 200
         
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/profiles', methods=['GET'])
+@jwt_required()
+def get_profiles():
+    try:
+        if not verify_admin():
+            return jsonify({"error": "Admin access required"}), 403
+        
+        limit = min(int(request.args.get('limit', 20)), 100)
+        profiles = list(mongo.db.profiles.find({}, {"stacks": 0}).sort("created_at", -1).limit(limit))
+        
+        for profile in profiles:
+            profile['_id'] = str(profile['_id'])
+            profile['created_at'] = profile['created_at'].isoformat()
+        
+        return jsonify({"profiles": profiles}), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/profiles/<profile_id>', methods=['GET'])
+@jwt_required()
+def download_profile(profile_id):
+    try:
+        if not verify_admin():
+            return jsonify({"error": "Admin access required"}), 403
+        
+        profile = mongo.db.profiles.find_one({"_id": ObjectId(profile_id)})
+        if not profile:
+            return jsonify({"error": "Profile not found"}), 404
+        
+        # collapsed feeds flamegraph.pl / speedscope; speedscope JSON opens at speedscope.app
+        output_format = request.args.get('format', 'speedscope')
+        if output_format == 'collapsed':
+            response = Response(to_collapsed(profile), mimetype='text/plain')
+            extension = 'txt'
+        elif output_format == 'speedscope':
+            response = jsonify(to_speedscope(profile))
+            extension = 'speedscope.json'
+        else:
+            return jsonify({"error": "format must be collapsed or speedscope"}), 400
+        
+        response.headers['Content-Disposition'] = f'attachment; filename="profile-{profile_id}.{extension}"'
+        return response, 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
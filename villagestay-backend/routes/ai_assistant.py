@@ -1,13 +1,18 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from database import mongo
-from utils.ai_utils import generate_travel_itinerary, translate_text, generate_content_from_voice, moderate_content
+from utils.auth_utils import get_current_user, get_current_user_type
+from utils.rate_limit_utils import rate_limited
+from utils.ai_utils import generate_travel_itinerary, translate_text, generate_content_from_voice, moderate_content, build_travel_itinerary_prompt, stream_gemini_api
+from utils.stream_utils import wants_stream, sse_event, sse_response
 from datetime import datetime
+from bson import ObjectId
 
 ai_bp = Blueprint('ai', __name__)
 
 @ai_bp.route('/travel-assistant', methods=['POST'])
 @jwt_required()
+@rate_limited('ai_chat')
 def travel_assistant():
     try:
         user_id = get_jwt_identity()
@@ -18,13 +23,18 @@ def travel_assistant():
             return jsonify({"error": "Query is required"}), 400
         
         # Get user preferences
-        user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+        user = get_current_user()
         user_preferences = {
             "preferred_language": user.get('preferred_language', 'en'),
             "location": user.get('address', ''),
             "budget_range": data.get('budget_range', 'medium')
         }
         
+        session_id = data.get('session_id', str(user_id))
+        
+        if wants_stream(data):
+            return sse_response(stream_travel_reply(user_id, session_id, query, user_preferences))
+        
         # Generate AI response
         ai_response = generate_travel_itinerary(query, user_preferences)
         
@@ -34,7 +44,7 @@ def travel_assistant():
             "query": query,
             "response": ai_response,
             "created_at": datetime.utcnow(),
-            "session_id": data.get('session_id', str(user_id))
+            "session_id": session_id
         }
         
         mongo.db.ai_conversations.insert_one(conversation_doc)
@@ -47,8 +57,33 @@ def travel_assistant():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def stream_travel_reply(user_id, session_id, query, user_preferences):
+    """Relay the itinerary as it is generated, then save the exchange"""
+    try:
+        chunks = []
+        for chunk in stream_gemini_api(build_travel_itinerary_prompt(query, user_preferences)):
+            chunks.append(chunk)
+            yield sse_event('token', {"text": chunk})
+        
+        ai_response = ''.join(chunks)
+        
+        # Only completed replies are saved
+        mongo.db.ai_conversations.insert_one({
+            "user_id": ObjectId(user_id),
+            "query": query,
+            "response": ai_response,
+            "created_at": datetime.utcnow(),
+            "session_id": session_id
+        })
+        
+        yield sse_event('done', {"suggested_actions": extract_suggested_actions(ai_response)})
+    
+    except Exception as e:
+        yield sse_event('error', {"error": str(e)})
+
 @ai_bp.route('/translate', methods=['POST'])
 @jwt_required()
+@rate_limited('ai_text')
 def translate_content():
     try:
         data = request.get_json()
@@ -75,13 +110,14 @@ def translate_content():
 
 @ai_bp.route('/voice-to-listing', methods=['POST'])
 @jwt_required()
+@rate_limited('ai_media')
 def voice_to_listing():
     try:
         user_id = get_jwt_identity()
         data = request.get_json()
         
         # Verify user is a host
-        user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+        user = get_current_user()
         if not user or user['user_type'] != 'host':
             return jsonify({"error": "Only hosts can use this feature"}), 403
         
@@ -102,6 +138,7 @@ def voice_to_listing():
 
 @ai_bp.route('/moderate-content', methods=['POST'])
 @jwt_required()
+@rate_limited('ai_text')
 def moderate_user_content():
    try:
        data = request.get_json()
@@ -127,14 +164,14 @@ def moderate_user_content():
 
 @ai_bp.route('/generate-description', methods=['POST'])
 @jwt_required()
+@rate_limited('ai_text')
 def generate_listing_description():
    try:
        user_id = get_jwt_identity()
        data = request.get_json()
        
        # Verify user is a host
-       user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
-       if not user or user['user_type'] != 'host':
+       if get_current_user_type() != 'host':
            return jsonify({"error": "Only hosts can use this feature"}), 403
        
        # Get listing details
@@ -208,14 +245,14 @@ def get_chat_history():
 
 @ai_bp.route('/sustainability-suggestions', methods=['POST'])
 @jwt_required()
+@rate_limited('ai_text')
 def get_sustainability_suggestions():
    try:
        user_id = get_jwt_identity()
        data = request.get_json()
        
        # Verify user is a host
-       user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
-       if not user or user['user_type'] != 'host':
+       if get_current_user_type() != 'host':
            return jsonify({"error": "Only hosts can use this feature"}), 403
        
        listing_id = data.get('listing_id')
@@ -250,14 +287,14 @@ def get_sustainability_suggestions():
 
 @ai_bp.route('/generate-experience', methods=['POST'])
 @jwt_required()
+@rate_limited('ai_text')
 def generate_experience_content():
    try:
        user_id = get_jwt_identity()
        data = request.get_json()
        
        # Verify user is a host
-       user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
-       if not user or user['user_type'] != 'host':
+       if get_current_user_type() != 'host':
            return jsonify({"error": "Only hosts can use this feature"}), 403
        
        experience_type = data.get('experience_type', '')
@@ -1,32 +1,50 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from database import mongo
+from utils.cache_utils import invalidate_listing_cache
+from utils.host_summary_utils import build_host_summary
+from utils.sustainability_utils import schedule_sustainability_recompute
+from utils.auth_utils import get_current_user, get_current_user_type
+from utils.rate_limit_utils import rate_limited
+from utils.stream_utils import wants_stream, sse_event, sse_response
+from utils.json_utils import StreamingJSONField, extract_json
+from utils.concierge_session_utils import load_session, build_conversation_context, record_turn
 from utils.ai_utils import (
     generate_village_story_video, 
     voice_to_listing_magic, 
     cultural_concierge_chat,
     call_gemini_with_image,
-    call_gemini_api
+    call_gemini_api,
+    build_concierge_prompt,
+    build_concierge_extras,
+    parse_concierge_output,
+    CONCIERGE_RESPONSE_SCHEMA,
+    stream_gemini_api,
+    generate_conversation_id
 )
 from datetime import datetime
 from bson import ObjectId
 import base64
 import json
+import logging
 import uuid
 
+logger = logging.getLogger(__name__)
+
 ai_features_bp = Blueprint('ai_features', __name__)
 
 # ============ FEATURE 1: AI VILLAGE STORY GENERATOR ============
 
 @ai_features_bp.route('/generate-village-story', methods=['POST'])
 @jwt_required()
+@rate_limited('ai_media')
 def generate_village_story():
    try:
        user_id = get_jwt_identity()
        data = request.get_json()
        
        # Verify user is a host
-       user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+       user = get_current_user()
        if not user or user['user_type'] != 'host':
            return jsonify({"error": "Only hosts can generate village stories"}), 403
        
@@ -107,13 +125,13 @@ def get_village_story_status(generation_id):
 
 @ai_features_bp.route('/voice-to-listing', methods=['POST'])
 @jwt_required()
+@rate_limited('ai_media')
 def voice_to_listing():
     try:
         user_id = get_jwt_identity()
         
         # Verify user is a host
-        user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
-        if not user or user['user_type'] != 'host':
+        if get_current_user_type() != 'host':
             return jsonify({"error": "Only hosts can use voice-to-listing"}), 403
         
         # Handle both JSON and form data
@@ -127,7 +145,7 @@ def voice_to_listing():
                 
             # Read audio file content
             audio_data = audio_file.read()
-            print(f"Received audio file: {audio_file.filename}, size: {len(audio_data)} bytes")
+            logger.debug("Received audio file %s: %d bytes", audio_file.filename, len(audio_data))
             
             # Convert to base64 for processing
             audio_base64 = base64.b64encode(audio_data).decode('utf-8')
@@ -151,7 +169,7 @@ def voice_to_listing():
             else:
                 audio_base64 = audio_data
         
-        print(f"Processing voice input in language: {language}")
+        logger.info("Processing voice input", extra={"language": language})
         
         # Process voice to listing using Google Speech-to-Text + Gemini
         listing_result = voice_to_listing_magic_google(audio_base64, language, user_id)
@@ -177,15 +195,13 @@ def voice_to_listing():
         }), 200
         
     except Exception as e:
-        print(f"Voice processing error: {str(e)}")
+        logger.exception("Voice processing error: %s", e)
         return jsonify({"error": f"Voice processing failed: {str(e)}"}), 500
 
 def voice_to_listing_magic_google(audio_data, language="hi", host_id=None):
     """Convert voice recording to professional listing using Google Speech-to-Text + Gemini"""
     
     try:
-        print(f"🎤 Processing voice input with Google Speech-to-Text + Gemini in language: {language}")
-        
         # Step 1: Real speech to text transcription using Google Speech-to-Text
         try:
             from utils.google_speech_utils import transcribe_audio_google_speech
@@ -195,42 +211,42 @@ def voice_to_listing_magic_google(audio_data, language="hi", host_id=None):
             transcribed_text = result["text"]
             confidence = result["confidence"]
             
-            print(f"✅ Google Speech transcription successful: {transcribed_text}")
-            print(f"🎯 Confidence: {confidence:.2f}")
+            # Transcripts are user content; only their size and confidence are logged
+            logger.info(
+                "Google Speech transcription succeeded",
+                extra={"language": language, "transcript_chars": len(transcribed_text or ''), "confidence": round(confidence, 2)}
+            )
             
             # Verify we got actual transcription (not empty)
             if not transcribed_text or len(transcribed_text.strip()) == 0:
                 raise Exception("Google Speech returned empty transcription")
                 
         except Exception as transcription_error:
-            print(f"❌ Google Speech transcription failed: {transcription_error}")
+            logger.warning("Google Speech transcription failed: %s", transcription_error)
             raise Exception(f"Real audio transcription failed: {str(transcription_error)}")
         
         # Step 2: Enhance with Gemini API
         try:
             from utils.google_speech_utils import enhance_listing_with_gemini
             listing_data = enhance_listing_with_gemini(transcribed_text, language)
-            print(f"✅ Gemini enhancement successful")
         except Exception as e:
-            print(f"❌ Gemini enhancement failed: {e}")
+            logger.warning("Gemini enhancement failed: %s", e)
             raise Exception(f"Listing enhancement failed: {str(e)}")
         
         # Step 3: Generate pricing intelligence
         try:
             from utils.ai_utils import generate_smart_pricing
             pricing_intel = generate_smart_pricing(listing_data, language)
-            print(f"💰 Pricing generated: {pricing_intel}")
         except Exception as pricing_error:
-            print(f"❌ Pricing generation failed: {pricing_error}")
+            logger.warning("Pricing generation failed: %s", pricing_error)
             raise Exception(f"Pricing generation failed: {str(pricing_error)}")
         
         # Step 4: Create multi-language versions
         try:
             from utils.ai_utils import create_multilingual_listing
             translations = create_multilingual_listing(listing_data, language)
-            print(f"🌍 Translations created: {len(translations)} languages")
         except Exception as translation_error:
-            print(f"❌ Translation failed: {translation_error}")
+            logger.warning("Translation failed: %s", translation_error)
             translations = {language: listing_data}
         
         return {
@@ -245,7 +261,6 @@ def voice_to_listing_magic_google(audio_data, language="hi", host_id=None):
         }
         
     except Exception as e:
-        print(f"❌ Voice processing error: {str(e)}")
         raise Exception(f"Voice processing failed: {str(e)}")
 
 @ai_features_bp.route('/create-listing-from-voice', methods=['POST'])
@@ -256,7 +271,7 @@ def create_listing_from_voice():
         data = request.get_json()
         
         # Verify user is a host
-        user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+        user = get_current_user()
         if not user or user['user_type'] != 'host':
             return jsonify({"error": "Only hosts can create listings"}), 403
         
@@ -318,6 +333,7 @@ def create_listing_from_voice():
             "rating": 0.0,
             "review_count": 0,
             "availability_calendar": {},
+            "host_summary": build_host_summary(user),
             "ai_generated": True,
             "voice_generated": True,
             "original_voice_language": voice_record['original_language']
@@ -325,6 +341,8 @@ def create_listing_from_voice():
         
         # Insert listing
         result = mongo.db.listings.insert_one(listing_doc)
+        invalidate_listing_cache()
+        schedule_sustainability_recompute(listing_id=result.inserted_id)
         
         return jsonify({
             "message": "Listing created successfully from voice",
@@ -338,13 +356,14 @@ def create_listing_from_voice():
         }), 201
         
     except Exception as e:
-        print(f"Create listing error: {str(e)}")
+        logger.exception("Create listing error: %s", e)
         return jsonify({"error": str(e)}), 500
 
 # ============ FEATURE 3: AI CULTURAL CONCIERGE ============
 
 @ai_features_bp.route('/cultural-concierge', methods=['POST'])
 @jwt_required()
+@rate_limited('ai_chat')
 def cultural_concierge():
    try:
        user_id = get_jwt_identity()
@@ -357,7 +376,7 @@ def cultural_concierge():
            return jsonify({"error": "Message is required"}), 400
        
        # Get user preferences
-       user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+       user = get_current_user()
        user_preferences = {
            "budget_range": data.get('budget_range', 'medium'),
            "location": user.get('address', 'India'),
@@ -367,19 +386,17 @@ def cultural_concierge():
            "group_size": data.get('group_size', 2)
        }
        
-       # Get conversation history
-       conversation_history = []
-       if session_id:
-           history_records = list(mongo.db.concierge_conversations.find({
-               "session_id": session_id,
-               "user_id": ObjectId(user_id)
-           }).sort("created_at", -1).limit(10))
-           
-           conversation_history = [record['message'] for record in history_records]
+       # Rolling summary plus recent turns, trimmed to the prompt budget
+       conversation_context = build_conversation_context(load_session(session_id, user_id))
+       
+       if wants_stream(data):
+           return sse_response(stream_concierge_reply(
+               user_id, session_id, user_message, user_preferences, conversation_context
+           ))
        
        # Get AI response
        concierge_response = cultural_concierge_chat(
-           user_message, user_preferences, conversation_history
+           user_message, user_preferences, conversation_context
        )
        
        # Save conversation
@@ -395,6 +412,7 @@ def cultural_concierge():
        }
        
        mongo.db.concierge_conversations.insert_one(conversation_record)
+       record_turn(conversation_record['session_id'], user_id, user_message, concierge_response['response'])
        
        return jsonify({
            "response": concierge_response['response'],
@@ -409,6 +427,43 @@ def cultural_concierge():
    except Exception as e:
        return jsonify({"error": str(e)}), 500
 
+def stream_concierge_reply(user_id, session_id, user_message, user_preferences, conversation_context):
+   """Relay the concierge reply as it is generated, then save the exchange"""
+   session_id = session_id or generate_conversation_id()
+   yield sse_event('session', {"session_id": session_id})
+   
+   try:
+       # The reply field is decoded and relayed while the rest of the JSON is still arriving
+       reply_stream = StreamingJSONField('reply')
+       prompt = build_concierge_prompt(user_message, user_preferences, conversation_context)
+       for chunk in stream_gemini_api(prompt, response_schema=CONCIERGE_RESPONSE_SCHEMA):
+           text = reply_stream.feed(chunk)
+           if text:
+               yield sse_event('token', {"text": text})
+       
+       parsed_output = parse_concierge_output(reply_stream.text(), user_message)
+       response_text = parsed_output['response']
+       extras = build_concierge_extras(parsed_output, user_message, user_preferences)
+       
+       # Only completed replies are saved
+       mongo.db.concierge_conversations.insert_one({
+           "user_id": ObjectId(user_id),
+           "session_id": session_id,
+           "message": user_message,
+           "response": response_text,
+           "actionable_items": extras['actionable_items'],
+           "cultural_insights": extras['cultural_insights'],
+           "relevant_listings": extras['relevant_listings'],
+           "created_at": datetime.utcnow()
+       })
+       record_turn(session_id, user_id, user_message, response_text)
+       
+       # The full reply is repeated in case the model did not return the JSON shape
+       yield sse_event('done', {"session_id": session_id, "response": response_text, **extras})
+   
+   except Exception as e:
+       yield sse_event('error', {"error": str(e)})
+
 @ai_features_bp.route('/cultural-concierge/history', methods=['GET'])
 @jwt_required()
 def get_concierge_history():
@@ -448,6 +503,7 @@ def get_concierge_history():
        return jsonify({"error": str(e)}), 500
 
 @ai_features_bp.route('/cultural-insights/<location>', methods=['GET'])
+@rate_limited('ai_text')
 def get_location_cultural_insights(location):
    try:
        # Get cultural insights for a specific location
@@ -467,11 +523,9 @@ def get_location_cultural_insights(location):
        Format as JSON with organized sections.
        """
        
-       from utils.ai_utils import call_gemini_api
-       insights_response = call_gemini_api(insights_prompt)
-       
        try:
-           cultural_data = json.loads(insights_response)
+           # Gemini outages and unparseable replies both get the canned insights
+           cultural_data = extract_json(call_gemini_api(insights_prompt), {"type": "object"})
        except:
            cultural_data = {
                "location": location,
@@ -498,14 +552,14 @@ def get_location_cultural_insights(location):
 
 @ai_features_bp.route('/analyze-property-images', methods=['POST'])
 @jwt_required()
+@rate_limited('ai_media')
 def analyze_property_images():
    try:
        user_id = get_jwt_identity()
        data = request.get_json()
        
        # Verify user is a host
-       user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
-       if not user or user['user_type'] != 'host':
+       if get_current_user_type() != 'host':
            return jsonify({"error": "Only hosts can analyze property images"}), 403
        
        images = data.get('images', [])  # Array of base64 images
@@ -555,14 +609,14 @@ def analyze_property_images():
 
 @ai_features_bp.route('/generate-listing-photos', methods=['POST'])
 @jwt_required()
+@rate_limited('ai_media')
 def generate_listing_photos():
    try:
        user_id = get_jwt_identity()
        data = request.get_json()
        
        # Verify user is a host
-       user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
-       if not user or user['user_type'] != 'host':
+       if get_current_user_type() != 'host':
            return jsonify({"error": "Only hosts can generate listing photos"}), 403
        
        listing_id = data.get('listing_id')
@@ -623,6 +677,7 @@ def create_photo_generation_prompt(listing, photo_type):
 # ============ DEMO AND TEST ROUTES ============
 
 @ai_features_bp.route('/test-google-speech', methods=['GET'])
+@rate_limited('ai_text')
 def test_google_speech():
     try:
         from utils.google_speech_utils import test_google_speech_setup
@@ -1,8 +1,10 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash, check_password_hash
 from database import mongo  # Changed this line
-from utils.auth_utils import generate_otp, send_otp_email
+from utils.auth_utils import generate_otp, send_otp_email, build_identity_claims, get_current_user, invalidate_cached_user
+from utils.password_utils import hash_password, verify_password, needs_rehash, rehash_password
+from utils.background_utils import run_in_background
+from utils.host_summary_utils import HOST_SUMMARY_FIELDS, schedule_host_summary_refresh
 from datetime import datetime, timedelta
 from bson import ObjectId
 import re
@@ -35,7 +37,7 @@ def register():
         # Create user document
         user_doc = {
             "email": data['email'],
-            "password": generate_password_hash(data['password']),
+            "password": hash_password(data['password']),
             "full_name": data['full_name'],
             "user_type": data['user_type'],
             "phone": data.get('phone'),
@@ -73,12 +75,17 @@ def login():
         # Find user
         user = mongo.db.users.find_one({"email": data['email']})
         
-        if not user or not check_password_hash(user['password'], data['password']):
+        if not user or not verify_password(data['password'], user['password']):
             return jsonify({"error": "Invalid credentials"}), 401
         
+        # Upgrade hashes made with an older scheme or cost off the request path
+        if needs_rehash(user['password']):
+            run_in_background(rehash_password, user['_id'], data['password'], user['password'])
+        
         # Create access token
         access_token = create_access_token(
             identity=str(user['_id']),
+            additional_claims=build_identity_claims(user),
             expires_delta=timedelta(days=30)
         )
         
@@ -129,6 +136,7 @@ def verify_email():
                 "$unset": {"verification_otp": "", "otp_expires_at": ""}
             }
         )
+        invalidate_cached_user(user['_id'])
         
         return jsonify({"message": "Email verified successfully"}), 200
         
@@ -178,8 +186,7 @@ def resend_otp():
 @jwt_required()
 def get_profile():
     try:
-        user_id = get_jwt_identity()
-        user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+        user = get_current_user()
         
         if not user:
             return jsonify({"error": "User not found"}), 404
@@ -230,6 +237,11 @@ def update_profile():
         
         if result.matched_count == 0:
             return jsonify({"error": "User not found"}), 404
+        invalidate_cached_user(user_id)
+        
+        # Listings embed the host's name and avatar, so fan the change out
+        if HOST_SUMMARY_FIELDS & update_data.keys():
+            schedule_host_summary_refresh(user_id)
         
         return jsonify({"message": "Profile updated successfully"}), 200
         
@@ -246,23 +258,24 @@ def change_password():
         if not data.get('current_password') or not data.get('new_password'):
             return jsonify({"error": "Current password and new password are required"}), 400
         
-        # Find user
+        # Read the stored hash directly rather than through the user cache
         user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
         
         if not user:
             return jsonify({"error": "User not found"}), 404
         
         # Verify current password
-        if not check_password_hash(user['password'], data['current_password']):
+        if not verify_password(data['current_password'], user['password']):
             return jsonify({"error": "Current password is incorrect"}), 400
         
         # Update password
-        new_password_hash = generate_password_hash(data['new_password'])
+        new_password_hash = hash_password(data['new_password'])
         
         mongo.db.users.update_one(
             {"_id": ObjectId(user_id)},
             {"$set": {"password": new_password_hash, "updated_at": datetime.utcnow()}}
         )
+        invalidate_cached_user(user_id)
         
         return jsonify({"message": "Password changed successfully"}), 200
         
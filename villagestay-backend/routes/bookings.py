@@ -1,23 +1,21 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 from database import mongo
 from utils.payment_utils import create_payment, verify_payment
+from utils.cache_utils import invalidate_listing_cache
+from utils.review_utils import record_review
+from utils.booking_utils import hydrate_bookings, generate_booking_reference, find_blocked_date
+from utils.auth_utils import get_current_user_type
 from datetime import datetime, timedelta
+import logging
 import math
 import uuid
-import string
-import random
 
-bookings_bp = Blueprint('bookings', __name__)
-
-# Add to bookings.py
+logger = logging.getLogger(__name__)
 
-def generate_booking_reference():
-    """Generate unique booking reference"""
-    prefix = "VS"  # VillageStay prefix
-    random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-    return f"{prefix}{random_part}"
+bookings_bp = Blueprint('bookings', __name__)
 
 @bookings_bp.route('/', methods=['POST'])
 @jwt_required()
@@ -27,8 +25,7 @@ def create_booking():
         data = request.get_json()
         
         # Verify user is a tourist
-        user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
-        if not user or user['user_type'] != 'tourist':
+        if get_current_user_type() != 'tourist':
             return jsonify({"error": "Only tourists can create bookings"}), 403
         
         # Required fields
@@ -77,8 +74,8 @@ def create_booking():
         host_earnings = base_amount - platform_fee - community_contribution
         total_amount = base_amount + platform_fee
         
-        # Generate unique booking reference
-        booking_reference = f"VS{datetime.now().strftime('%Y%m%d')}{random.randint(1000, 9999)}"
+        # Generate unique booking reference (no lookup needed, see generate_booking_reference)
+        booking_reference = generate_booking_reference()
         
         # Create booking document
         booking_doc = {
@@ -103,8 +100,18 @@ def create_booking():
             "booking_reference": booking_reference
         }
         
-        # Insert booking
-        result = mongo.db.bookings.insert_one(booking_doc)
+        # Insert booking; the unique index is only a backstop against
+        # two workers sharing a random node id, so one retry is enough
+        try:
+            result = mongo.db.bookings.insert_one(booking_doc)
+        except DuplicateKeyError:
+            booking_reference = generate_booking_reference()
+            booking_doc['booking_reference'] = booking_reference
+            booking_doc.pop('_id', None)
+            result = mongo.db.bookings.insert_one(booking_doc)
+        
+        # Pending bookings hold their dates, so dated browse results change
+        invalidate_listing_cache(data['listing_id'])
         
         # Create payment (mock)
         from utils.payment_utils import create_payment
@@ -136,7 +143,7 @@ def create_booking():
         }), 201
         
     except Exception as e:
-        print(f"Booking creation error: {str(e)}")
+        logger.exception("Booking creation error: %s", e)
         return jsonify({"error": "Failed to create booking. Please try again."}), 500
 
 @bookings_bp.route('/<booking_id>/payment', methods=['POST'])
@@ -196,7 +203,7 @@ def complete_payment(booking_id):
 def get_user_bookings():
     try:
         user_id = get_jwt_identity()
-        user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+        user_type = get_current_user_type()
         
         # Get query parameters
         page = int(request.args.get('page', 1))
@@ -204,9 +211,9 @@ def get_user_bookings():
         status = request.args.get('status')
         
         # Build query based on user type
-        if user['user_type'] == 'tourist':
+        if user_type == 'tourist':
             query = {"tourist_id": ObjectId(user_id)}
-        elif user['user_type'] == 'host':
+        elif user_type == 'host':
             query = {"host_id": ObjectId(user_id)}
         else:
             return jsonify({"error": "Invalid user type"}), 400
@@ -226,17 +233,19 @@ def get_user_bookings():
         # Get total count
         total_count = mongo.db.bookings.count_documents(query)
         
+        # Resolve listings, tourists and hosts for the whole page at once
+        listings, users = hydrate_bookings(
+            bookings,
+            listing_projection={"title": 1, "location": 1, "images": {"$slice": 1}},
+            user_projection={"full_name": 1, "email": 1, "phone": 1}
+        )
+        
         # Format bookings
         formatted_bookings = []
         for booking in bookings:
-            # Get listing info
-            listing = mongo.db.listings.find_one({"_id": booking['listing_id']})
-            
-            # Get tourist info
-            tourist = mongo.db.users.find_one({"_id": booking['tourist_id']})
-            
-            # Get host info
-            host = mongo.db.users.find_one({"_id": booking['host_id']})
+            listing = listings.get(booking['listing_id'])
+            tourist = users.get(booking['tourist_id'])
+            host = users.get(booking['host_id'])
             
             formatted_booking = {
                 "id": str(booking['_id']),
@@ -253,7 +262,7 @@ def get_user_bookings():
                     "id": str(listing['_id']),
                     "title": listing['title'],
                     "location": listing['location'],
-                    "images": listing['images'][:1] if listing['images'] else []
+                    "images": listing.get('images', [])[:1]
                 } if listing else None,
                 "tourist": {
                     "id": str(tourist['_id']),
@@ -447,11 +456,62 @@ def complete_booking(booking_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-def generate_booking_reference():
-    """Generate unique booking reference"""
-    import random
-    import string
-    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+@bookings_bp.route('/<booking_id>/review', methods=['POST'])
+@jwt_required()
+def create_review(booking_id):
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json() or {}
+        
+        # Get booking
+        booking = mongo.db.bookings.find_one({"_id": ObjectId(booking_id)})
+        if not booking:
+            return jsonify({"error": "Booking not found"}), 404
+        
+        # Only the guest can review their stay
+        if str(booking['tourist_id']) != user_id:
+            return jsonify({"error": "Only the guest can review this booking"}), 403
+        
+        if booking['status'] != 'completed':
+            return jsonify({"error": "Only completed bookings can be reviewed"}), 400
+        
+        try:
+            rating = int(data.get('rating'))
+        except (TypeError, ValueError):
+            return jsonify({"error": "Rating must be a number from 1 to 5"}), 400
+        
+        if rating < 1 or rating > 5:
+            return jsonify({"error": "Rating must be a number from 1 to 5"}), 400
+        
+        if mongo.db.reviews.find_one({"booking_id": booking['_id'], "reviewer_id": ObjectId(user_id)}, {"_id": 1}):
+            return jsonify({"error": "Booking already reviewed"}), 400
+        
+        review_doc = {
+            "booking_id": booking['_id'],
+            "listing_id": booking['listing_id'],
+            "reviewer_id": ObjectId(user_id),
+            "reviewee_id": booking['host_id'],
+            "rating": rating,
+            "comment": data.get('comment', ''),
+            "review_type": "tourist_to_host",
+            "created_at": datetime.utcnow(),
+            "is_verified": True
+        }
+        
+        # Insert review and update host/listing rating aggregates; the unique
+        # index rejects a concurrent second submit that passed the check above
+        try:
+            review_id = record_review(review_doc)
+        except DuplicateKeyError:
+            return jsonify({"error": "Booking already reviewed"}), 400
+        
+        return jsonify({
+            "message": "Review submitted successfully",
+            "review_id": str(review_id)
+        }), 201
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
 def block_dates(listing_id, check_in, check_out):
     """Block dates in listing availability calendar"""
@@ -469,8 +529,9 @@ def block_dates(listing_id, check_in, check_out):
     
     mongo.db.listings.update_one(
         {"_id": ObjectId(listing_id)},
-        {"$set": {"availability_calendar": availability_calendar}}
+        {"$set": {"availability_calendar": availability_calendar, "updated_at": datetime.utcnow()}}
     )
+    invalidate_listing_cache(listing_id)
 
 def free_dates(listing_id, check_in, check_out):
     """Free up dates in listing availability calendar"""
@@ -489,8 +550,9 @@ def free_dates(listing_id, check_in, check_out):
     
     mongo.db.listings.update_one(
         {"_id": ObjectId(listing_id)},
-        {"$set": {"availability_calendar": availability_calendar}}
+        {"$set": {"availability_calendar": availability_calendar, "updated_at": datetime.utcnow()}}
     )
+    invalidate_listing_cache(listing_id)
 
 def calculate_refund_amount(booking, cancellation_date):
     """Calculate refund amount based on cancellation policy"""
@@ -517,8 +579,7 @@ def check_availability(listing_id, check_in, check_out):
         else:
             check_out_date = check_out
         
-        print(f"Checking availability for listing {listing_id}")
-        print(f"Check-in: {check_in_date}, Check-out: {check_out_date}")
+        logger.debug("Checking availability for listing %s from %s to %s", listing_id, check_in_date, check_out_date)
         
         # Check for existing confirmed bookings that overlap
         existing_bookings = mongo.db.bookings.find({
@@ -549,33 +610,23 @@ def check_availability(listing_id, check_in, check_out):
         })
         
         conflicting_bookings = list(existing_bookings)
-        print(f"Found {len(conflicting_bookings)} conflicting bookings")
-        
         if len(conflicting_bookings) > 0:
-            print("Dates not available - conflicts found")
+            logger.debug("Listing %s has %d conflicting bookings", listing_id, len(conflicting_bookings))
             return False
         
         # Check availability calendar (host-blocked dates)
         listing = mongo.db.listings.find_one({"_id": ObjectId(listing_id)})
         if not listing:
-            print("Listing not found")
+            logger.debug("Listing %s not found", listing_id)
             return False
         
-        availability_calendar = listing.get('availability_calendar', {})
-        
-        # Check each date in the range
-        current_date = check_in_date
-        while current_date < check_out_date:
-            date_str = current_date.strftime('%Y-%m-%d')
-            # If date is explicitly blocked (False), not available
-            if availability_calendar.get(date_str) == False:
-                print(f"Date {date_str} is blocked by host")
-                return False
-            current_date += timedelta(days=1)
+        blocked_date = find_blocked_date(listing.get('availability_calendar', {}), check_in_date, check_out_date)
+        if blocked_date:
+            logger.debug("Listing %s: %s is blocked by host", listing_id, blocked_date)
+            return False
         
-        print("Dates are available")
         return True
         
     except Exception as e:
-        print(f"Error checking availability: {str(e)}")
+        logger.exception("Error checking availability: %s", e)
         return False
@@ -2,6 +2,15 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from bson import ObjectId
 from database import mongo
+from utils.auth_utils import get_current_user_type
+from utils.review_utils import load_review_stats, get_average_rating
+from utils.sustainability_utils import (
+    FEATURE_SCORES,
+    DEFAULT_FEATURE_SCORE,
+    compute_sustainability_score,
+    get_sustainability_grade,
+    schedule_sustainability_recompute
+)
 from datetime import datetime, timedelta
 
 impact_bp = Blueprint('impact', __name__)
@@ -15,13 +24,13 @@ def get_user_impact(user_id):
         if current_user_id != user_id:
             return jsonify({"error": "Unauthorized"}), 403
         
-        user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
-        if not user:
+        user_type = get_current_user_type()
+        if not user_type:
             return jsonify({"error": "User not found"}), 404
         
-        if user['user_type'] == 'tourist':
+        if user_type == 'tourist':
             impact_data = calculate_tourist_impact(user_id)
-        elif user['user_type'] == 'host':
+        elif user_type == 'host':
             impact_data = calculate_host_impact(user_id)
         else:
             return jsonify({"error": "Invalid user type"}), 400
@@ -78,6 +87,10 @@ def get_sustainability_score(listing_id):
        # Calculate sustainability score
        score_data = calculate_sustainability_score(listing)
        
+       # Store it so the next read (and browse sorting) skips the computation
+       if listing.get('sustainability_score') is None:
+           schedule_sustainability_recompute(listing_id=listing_id)
+       
        return jsonify(score_data), 200
        
    except Exception as e:
@@ -327,38 +340,15 @@ def calculate_sustainability_score(listing):
    
    sustainability_features = listing.get('sustainability_features', [])
    
-   # Define scoring criteria
-   feature_scores = {
-       'solar_power': 15,
-       'rainwater_harvesting': 10,
-       'organic_farming': 12,
-       'waste_composting': 8,
-       'local_sourcing': 10,
-       'plastic_free': 8,
-       'energy_efficient': 7,
-       'water_conservation': 9,
-       'local_employment': 15,
-       'cultural_preservation': 6
-   }
-   
-   score = 0
-   for feature in sustainability_features:
-       score += feature_scores.get(feature, 5)
-   
-   # Cap at 100
-   score = min(100, score)
-   
-   # Get additional factors
-   reviews = list(mongo.db.reviews.find({"reviewee_id": listing['host_id']}))
-   sustainability_mentions = sum(1 for review in reviews if 'eco' in review['comment'].lower() or 'green' in review['comment'].lower())
-   
-   if sustainability_mentions > 0:
-       score += min(10, sustainability_mentions * 2)
+   # Use the precomputed score when the background worker has stored one
+   score = listing.get('sustainability_score')
+   if score is None:
+       score = compute_sustainability_score(sustainability_features, load_review_stats(listing['host_id'])['eco_mentions'])
    
    return {
-       "score": min(100, score),
+       "score": score,
        "features": sustainability_features,
-       "grade": get_sustainability_grade(score),
+       "grade": listing.get('sustainability_grade') or get_sustainability_grade(score),
        "recommendations": get_sustainability_recommendations(listing)
    }
 
@@ -500,29 +490,7 @@ def get_location_leaderboard(limit):
 
 def calculate_host_rating(host_id):
    """Calculate average rating for a host"""
-   reviews = list(mongo.db.reviews.find({"reviewee_id": ObjectId(host_id)}))
-   if not reviews:
-       return 0
-   
-   total_rating = sum(review['rating'] for review in reviews)
-   return round(total_rating / len(reviews), 1)
-
-def get_sustainability_grade(score):
-   """Get sustainability grade based on score"""
-   if score >= 80:
-       return "A+"
-   elif score >= 70:
-       return "A"
-   elif score >= 60:
-       return "B+"
-   elif score >= 50:
-       return "B"
-   elif score >= 40:
-       return "C+"
-   elif score >= 30:
-       return "C"
-   else:
-       return "D"
+   return get_average_rating(load_review_stats(ObjectId(host_id)))
 
 def get_sustainability_recommendations(listing):
    """Get sustainability recommendations for a listing"""
@@ -540,7 +508,7 @@ def get_sustainability_recommendations(listing):
    for feature in missing_features[:3]:  # Top 3 recommendations
        recommendations.append({
            "feature": feature,
-           "impact": f"+{feature_scores.get(feature, 5)} points",
+           "impact": f"+{FEATURE_SCORES.get(feature, DEFAULT_FEATURE_SCORE)} points",
            "description": get_feature_description(feature)
        })
    
@@ -619,17 +587,3 @@ def get_feature_description(feature):
        'local_employment': 'Hire staff from the local community'
    }
    return descriptions.get(feature, 'Sustainable practice')
-
-# Define feature scores globally
-feature_scores = {
-   'solar_power': 15,
-   'rainwater_harvesting': 10,
-   'organic_farming': 12,
-   'waste_composting': 8,
-   'local_sourcing': 10,
-   'plastic_free': 8,
-   'energy_efficient': 7,
-   'water_conservation': 9,
-   'local_employment': 15,
-   'cultural_preservation': 6
-}
\ No newline at end of file
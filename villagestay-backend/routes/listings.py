@@ -3,12 +3,26 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from bson import ObjectId
 from database import mongo
 from utils.ai_utils import generate_listing_content, translate_text, generate_pricing_suggestion
+from utils.cache_utils import cached_response, invalidate_listing_cache
+from utils.host_summary_utils import build_host_summary, format_host_summary, load_missing_host_summaries
+from utils.review_utils import get_review_page, get_review_summary
+from utils.sustainability_utils import schedule_sustainability_recompute
+from utils.auth_utils import get_current_user
+from utils.booking_utils import find_blocked_date
 from datetime import datetime, timedelta
+import logging
 import math
 
+logger = logging.getLogger(__name__)
+
 listings_bp = Blueprint('listings', __name__)
 
+# Reviews embedded in the listing detail; the rest load from /<listing_id>/reviews
+REVIEWS_PREVIEW_LIMIT = 5
+REVIEWS_MAX_PAGE_SIZE = 50
+
 @listings_bp.route('/', methods=['GET'])
+@cached_response('listings')
 def get_listings():
     try:
         # Get query parameters
@@ -21,6 +35,7 @@ def get_listings():
         lat = request.args.get('lat', type=float)
         lng = request.args.get('lng', type=float)
         radius = request.args.get('radius', type=float, default=50)  # km
+        min_sustainability = request.args.get('min_sustainability', type=float)
         guests = int(request.args.get('guests', 1))
         check_in = request.args.get('check_in')
         check_out = request.args.get('check_out')
@@ -51,6 +66,10 @@ def get_listings():
         if guests > 1:
             query["max_guests"] = {"$gte": guests}
         
+        # Sustainability filter on the precomputed score
+        if min_sustainability is not None:
+            query["sustainability_score"] = {"$gte": min_sustainability}
+        
         # Geolocation filter
         if lat and lng:
             query["coordinates"] = {
@@ -75,12 +94,12 @@ def get_listings():
         # Get total count
         total_count = mongo.db.listings.count_documents(query)
         
+        # Host info is embedded on the listing; only legacy rows need a lookup
+        legacy_summaries = load_missing_host_summaries(listings)
+        
         # Format listings
         formatted_listings = []
         for listing in listings:
-            # Get host info
-            host = mongo.db.users.find_one({"_id": listing['host_id']})
-            
             formatted_listing = {
                 "id": str(listing['_id']),
                 "title": listing['title'],
@@ -95,11 +114,9 @@ def get_listings():
                 "rating": listing.get('rating', 0),
                 "review_count": listing.get('review_count', 0),
                 "sustainability_features": listing.get('sustainability_features', []),
-                "host": {
-                    "id": str(host['_id']),
-                    "full_name": host['full_name'],
-                    "profile_image": host.get('profile_image')
-                } if host else None,
+                "sustainability_score": listing.get('sustainability_score'),
+                "sustainability_grade": listing.get('sustainability_grade'),
+                "host": format_host_summary(listing, legacy_summaries.get(listing['host_id'])),
                 "created_at": listing['created_at'].isoformat()
             }
             
@@ -125,6 +142,7 @@ def get_listings():
         return jsonify({"error": str(e)}), 500
 
 @listings_bp.route('/<listing_id>', methods=['GET'])
+@cached_response('listing', scope_arg='listing_id')
 def get_listing(listing_id):
     try:
         listing = mongo.db.listings.find_one({"_id": ObjectId(listing_id)})
@@ -132,14 +150,15 @@ def get_listing(listing_id):
         if not listing:
             return jsonify({"error": "Listing not found"}), 404
         
-        # Get host info
-        host = mongo.db.users.find_one({"_id": listing['host_id']})
+        # Host info is embedded on the listing; only legacy rows need a lookup
+        legacy_summaries = load_missing_host_summaries([listing])
         
         # Get experiences
         experiences = list(mongo.db.experiences.find({"listing_id": ObjectId(listing_id)}))
         
-        # Get reviews
-        reviews = list(mongo.db.reviews.find({"reviewee_id": listing['host_id']}))
+        # Get the first page of reviews; the rest are loaded lazily
+        reviews = get_review_page(listing['host_id'], limit=REVIEWS_PREVIEW_LIMIT)
+        review_summary = get_review_summary(listing['host_id'])
         
         formatted_listing = {
             "id": str(listing['_id']),
@@ -156,15 +175,21 @@ def get_listing(listing_id):
             "rating": listing.get('rating', 0),
             "review_count": listing.get('review_count', 0),
             "sustainability_features": listing.get('sustainability_features', []),
+            "sustainability_score": listing.get('sustainability_score'),
+            "sustainability_grade": listing.get('sustainability_grade'),
             "availability_calendar": listing.get('availability_calendar', {}),
-            "host": {
-                "id": str(host['_id']),
-                "full_name": host['full_name'],
-                "profile_image": host.get('profile_image'),
-                "created_at": host['created_at'].isoformat()
-            } if host else None,
+            "host": format_host_summary(
+                listing, legacy_summaries.get(listing['host_id']), include_member_since=True
+            ),
             "experiences": [format_experience(exp) for exp in experiences],
-            "reviews": [format_review(review) for review in reviews],
+            "reviews": format_reviews(reviews),
+            "review_summary": review_summary,
+            "reviews_pagination": {
+                "page": 1,
+                "limit": REVIEWS_PREVIEW_LIMIT,
+                "total_count": review_summary['count'],
+                "total_pages": math.ceil(review_summary['count'] / REVIEWS_PREVIEW_LIMIT)
+            },
             "created_at": listing['created_at'].isoformat()
         }
         
@@ -173,6 +198,34 @@ def get_listing(listing_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@listings_bp.route('/<listing_id>/reviews', methods=['GET'])
+@cached_response('listing', scope_arg='listing_id')
+def get_listing_reviews(listing_id):
+    try:
+        page = max(int(request.args.get('page', 1)), 1)
+        limit = min(max(int(request.args.get('limit', 10)), 1), REVIEWS_MAX_PAGE_SIZE)
+        
+        listing = mongo.db.listings.find_one({"_id": ObjectId(listing_id)}, {"host_id": 1})
+        if not listing:
+            return jsonify({"error": "Listing not found"}), 404
+        
+        reviews = get_review_page(listing['host_id'], page, limit)
+        review_summary = get_review_summary(listing['host_id'])
+        
+        return jsonify({
+            "reviews": format_reviews(reviews),
+            "review_summary": review_summary,
+            "pagination": {
+                "page": page,
+                "limit": limit,
+                "total_count": review_summary['count'],
+                "total_pages": math.ceil(review_summary['count'] / limit)
+            }
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # In your backend listings.py, make sure to handle the images properly:
 
 @listings_bp.route('/', methods=['POST'])
@@ -183,7 +236,7 @@ def create_listing():
         data = request.get_json()
         
         # Verify user is a host
-        user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+        user = get_current_user()
         if not user or user['user_type'] != 'host':
             return jsonify({"error": "Only hosts can create listings"}), 403
         
@@ -218,11 +271,14 @@ def create_listing():
             "is_approved": False,  # Needs admin approval
             "rating": 0.0,
             "review_count": 0,
-            "availability_calendar": {}
+            "availability_calendar": {},
+            "host_summary": build_host_summary(user)
         }
         
         # Insert listing
         result = mongo.db.listings.insert_one(listing_doc)
+        invalidate_listing_cache()
+        schedule_sustainability_recompute(listing_id=result.inserted_id)
         
         return jsonify({
             "message": "Listing created successfully",
@@ -230,7 +286,7 @@ def create_listing():
         }), 201
         
     except Exception as e:
-        print(f"Error creating listing: {str(e)}")  # Debug log
+        logger.exception("Error creating listing: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
@@ -275,6 +331,11 @@ def update_listing(listing_id):
         if result.matched_count == 0:
             return jsonify({"error": "Listing not found"}), 404
         
+        invalidate_listing_cache(listing_id)
+        
+        if 'sustainability_features' in update_data:
+            schedule_sustainability_recompute(listing_id=listing_id)
+        
         return jsonify({"message": "Listing updated successfully"}), 200
         
     except Exception as e:
@@ -299,6 +360,7 @@ def delete_listing(listing_id):
             {"_id": ObjectId(listing_id)},
             {"$set": {"is_active": False, "updated_at": datetime.utcnow()}}
         )
+        invalidate_listing_cache(listing_id)
         
         return jsonify({"message": "Listing deleted successfully"}), 200
         
@@ -306,10 +368,13 @@ def delete_listing(listing_id):
         return jsonify({"error": str(e)}), 500
 
 @listings_bp.route('/search', methods=['GET'])
+@cached_response('listings')
 def search_listings():
     try:
         query = request.args.get('q', '')
         location = request.args.get('location')
+        min_sustainability = request.args.get('min_sustainability', type=float)
+        sort_by = request.args.get('sort_by')
         
         if not query and not location:
             return jsonify({"error": "Search query or location is required"}), 400
@@ -329,13 +394,22 @@ def search_listings():
         if location:
             search_query["location"] = {"$regex": location, "$options": "i"}
         
+        if min_sustainability is not None:
+            search_query["sustainability_score"] = {"$gte": min_sustainability}
+        
         # Execute search
-        listings = list(mongo.db.listings.find(search_query).limit(50))
+        cursor = mongo.db.listings.find(search_query)
+        if sort_by == 'sustainability_score':
+            cursor = cursor.sort("sustainability_score", -1)
+        listings = list(cursor.limit(50))
+        
+        # Host info is embedded on the listing; only legacy rows need a lookup
+        legacy_summaries = load_missing_host_summaries(listings)
         
         # Format results
         formatted_listings = []
         for listing in listings:
-            host = mongo.db.users.find_one({"_id": listing['host_id']})
+            host = format_host_summary(listing, legacy_summaries.get(listing['host_id']))
             
             formatted_listing = {
                 "id": str(listing['_id']),
@@ -348,8 +422,10 @@ def search_listings():
                 "coordinates": listing['coordinates'],
                 "rating": listing.get('rating', 0),
                 "review_count": listing.get('review_count', 0),
+                "sustainability_score": listing.get('sustainability_score'),
+                "sustainability_grade": listing.get('sustainability_grade'),
                 "host": {
-                    "id": str(host['_id']),
+                    "id": host['id'],
                     "full_name": host['full_name']
                 } if host else None
             }
@@ -410,6 +486,7 @@ def update_availability(listing_id):
            {"_id": ObjectId(listing_id)},
            {"$set": {"availability_calendar": current_calendar, "updated_at": datetime.utcnow()}}
        )
+       invalidate_listing_cache(listing_id)
        
        return jsonify({"message": "Availability updated successfully"}), 200
        
@@ -526,17 +603,8 @@ def check_availability(listing_id, check_in, check_out):
        if not listing:
            return False
        
-       availability_calendar = listing.get('availability_calendar', {})
-       
        # Check each date in the range
-       current_date = check_in_date
-       while current_date < check_out_date:
-           date_str = current_date.strftime('%Y-%m-%d')
-           if availability_calendar.get(date_str) == False:
-               return False
-           current_date += timedelta(days=1)
-       
-       return True
+       return find_blocked_date(listing.get('availability_calendar', {}), check_in_date, check_out_date) is None
        
    except Exception as e:
        return False
@@ -556,10 +624,21 @@ def format_experience(experience):
        "requirements": experience.get('requirements', [])
    }
 
-def format_review(review):
-   """Format review document for response"""
-   reviewer = mongo.db.users.find_one({"_id": review['reviewer_id']})
+def format_reviews(reviews):
+   """Format review documents, resolving all reviewers in one query"""
+   reviewer_ids = list({review['reviewer_id'] for review in reviews})
+   reviewers = {
+       reviewer['_id']: reviewer
+       for reviewer in mongo.db.users.find(
+           {"_id": {"$in": reviewer_ids}},
+           {"full_name": 1, "profile_image": 1}
+       )
+   } if reviewer_ids else {}
    
+   return [format_review(review, reviewers.get(review['reviewer_id'])) for review in reviews]
+
+def format_review(review, reviewer=None):
+   """Format review document for response"""
    return {
        "id": str(review['_id']),
        "rating": review['rating'],
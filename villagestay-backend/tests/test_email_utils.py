@@ -0,0 +1,45 @@
+from datetime import timedelta
+from types import SimpleNamespace
+import pytest
+from config import Config
+from utils import email_utils
+
+mongomock = pytest.importorskip('mongomock')
+
+@pytest.fixture
+def outbox(monkeypatch):
+    db = mongomock.MongoClient().db
+    monkeypatch.setattr(email_utils, 'mongo', SimpleNamespace(db=db))
+    return db.email_outbox
+
+def abandon_claim(outbox, message_id):
+    """Leave a claim as a sender that died mid-send would"""
+    message = outbox.find_one({"_id": message_id})
+    outbox.update_one(
+        {"_id": message_id},
+        {"$set": {"claimed_at": message['claimed_at'] - email_utils.CLAIM_TIMEOUT - timedelta(seconds=1)}}
+    )
+
+def test_stale_claims_count_as_attempts_until_failed(outbox):
+    message_id = email_utils.enqueue_email('guest@example.com', 'Booking confirmed', 'See you soon')
+
+    for attempt in range(1, Config.EMAIL_MAX_ATTEMPTS + 1):
+        batch = email_utils._claim_batch(10)
+        assert [message['_id'] for message in batch] == [message_id]
+        assert batch[0]['attempts'] == attempt
+        abandon_claim(outbox, message_id)
+
+    assert email_utils._claim_batch(10) == []
+    message = outbox.find_one({"_id": message_id})
+    assert message['status'] == 'failed'
+    assert message['attempts'] == Config.EMAIL_MAX_ATTEMPTS
+
+def test_send_failure_after_claim_counts_once(outbox):
+    message_id = email_utils.enqueue_email('guest@example.com', 'Booking confirmed', 'See you soon')
+
+    message = email_utils._claim_batch(10)[0]
+    email_utils._mark_failed(message, 'smtp down')
+
+    stored = outbox.find_one({"_id": message_id})
+    assert stored['status'] == 'pending'
+    assert stored['attempts'] == 1
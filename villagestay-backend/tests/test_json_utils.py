@@ -0,0 +1,22 @@
+import pytest
+from utils.json_utils import extract_json, iter_json_values, find_span_end, JSONExtractionError
+
+def test_brackets_inside_strings_do_not_end_a_value():
+    assert list(iter_json_values('x {"a": "}{"} y [1, 2]')) == [{"a": "}{"}, [1, 2]]
+
+def test_placeholder_braces_are_skipped_and_searched_inside():
+    text = 'Fill in {placeholders}. {note: {"title": "Mud house"}} and {"title": "Bhunga"}'
+
+    assert list(iter_json_values(text)) == [{"title": "Mud house"}, {"title": "Bhunga"}]
+
+def test_truncated_output_yields_nothing():
+    text = 'Here you go: {"title": "Mud house", "amenities": ["Wi-Fi", "Hot wa'
+
+    assert find_span_end(text, text.index('{')) is None
+    assert list(iter_json_values(text)) == []
+    with pytest.raises(JSONExtractionError):
+        extract_json(text)
+
+def test_mismatched_bracket_abandons_only_that_span():
+    assert find_span_end('{"a": [1}]', 0) == -1
+    assert list(iter_json_values('{"a": [1}] then {"b": 2}')) == [{"b": 2}]
@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+from config import Config
+from utils import slow_query_utils
+from utils.slow_query_utils import query_shape, command_shape, fingerprint
+
+def test_or_branches_on_different_fields_get_different_shapes():
+    by_email = query_shape({"$or": [{"email": "a@example.com"}, {"phone": "123"}]})
+    by_name = query_shape({"$or": [{"full_name": "Asha"}, {"phone": "123"}]})
+
+    assert by_email != by_name
+    assert fingerprint('find', 'users', by_email) != fingerprint('find', 'users', by_name)
+
+def test_logical_operators_keep_every_branch():
+    shape = query_shape({"$and": [{"is_active": True}, {"$nor": [{"status": "cancelled"}, {"price": {"$gt": 10}}]}]})
+
+    assert shape == {"$and": [{"is_active": "?"}, {"$nor": [{"status": "?"}, {"price": {"$gt": "?"}}]}]}
+
+def test_value_lists_of_any_length_share_a_shape():
+    short = query_shape({"_id": {"$in": [1]}, "tags": ["a"], "amenities": {"$all": ["Wi-Fi"]}})
+    long = query_shape({"_id": {"$in": [1, 2, 3]}, "tags": ["a", "b"], "amenities": {"$all": ["Wi-Fi", "Parking"]}})
+
+    assert short == long == {"_id": {"$in": ["?"]}, "amenities": {"$all": ["?"]}, "tags": ["?"]}
+
+def test_aggregate_match_branches_are_kept():
+    first = command_shape('aggregate', {"pipeline": [{"$match": {"$or": [{"host_id": 1}, {"tourist_id": 1}]}}, {"$limit": 5}]})
+    second = command_shape('aggregate', {"pipeline": [{"$match": {"$or": [{"listing_id": 1}, {"tourist_id": 1}]}}, {"$limit": 5}]})
+
+    assert first != second
+
+def test_slow_queries_are_not_explained_unless_sampling_is_configured(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(slow_query_utils, 'run_in_background', lambda fn, *args: recorded.append(args))
+    monkeypatch.setattr(Config, 'SLOW_QUERY_EXPLAIN_SAMPLE_RATE', 0)
+    listener = slow_query_utils.SlowQueryListener()
+    event = SimpleNamespace(
+        command_name='find', command={"find": "listings", "filter": {"is_active": True}},
+        connection_id=1, request_id=1, duration_micros=(Config.SLOW_QUERY_THRESHOLD_MS + 1) * 1000
+    )
+
+    listener.started(event)
+    listener.succeeded(event)
+
+    assert len(recorded) == 1
+    assert recorded[0][-1] is False
@@ -1,20 +1,188 @@
 import requests
 import json
 import base64
+import hashlib
+import logging
+import threading
 import time
 import uuid
+from collections import OrderedDict
 from config import Config
+from utils.circuit_breaker_utils import get_breaker
+from utils.listing_search_utils import search_listings
+from utils.json_utils import extract_json, JSONExtractionError
+from utils.metrics_utils import track_upstream
 
-def call_gemini_api(prompt, model="gemini-2.0-flash"):
-    """Make API call to Gemini"""
-    
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+logger = logging.getLogger(__name__)
+
+# Last known good Gemini responses: request hash -> text
+_fallback_cache = OrderedDict()
+_fallback_cache_lock = threading.Lock()
+
+DEFAULT_CULTURAL_INSIGHTS = [
+    {
+        "insight": "Remove shoes before entering homes and temples",
+        "importance": "high"
+    },
+    {
+        "insight": "Greet elders with 'Namaste' and touch their feet as a sign of respect",
+        "importance": "medium"
+    },
+    {
+        "insight": "Dress modestly, especially when visiting religious places",
+        "importance": "high"
+    }
+]
+
+TRANSLATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "description": {"type": "string"}
+    },
+    "required": ["title", "description"]
+}
+
+# Listings drafted from a host's voice description, by Gemini or Azure GPT
+LISTING_ENHANCEMENT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "description": {"type": "string"},
+        "amenities": {"type": "array", "items": {"type": "string"}},
+        "property_type": {"type": "string"},
+        "house_rules": {"type": "array", "items": {"type": "string"}},
+        "unique_features": {"type": "array", "items": {"type": "string"}},
+        "sustainability_features": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["title", "description"]
+}
+
+# Gemini responseSchema for a concierge turn; "reply" comes first so it can stream
+CONCIERGE_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "reply": {"type": "STRING"},
+        "cultural_insights": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "insight": {"type": "STRING"},
+                    "importance": {"type": "STRING", "enum": ["high", "medium", "low"]}
+                },
+                "required": ["insight", "importance"]
+            }
+        },
+        "actionable_items": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "type": {"type": "STRING", "enum": ["booking", "experience", "events", "transport", "search"]},
+                    "action": {"type": "STRING"},
+                    "description": {"type": "STRING"}
+                },
+                "required": ["type", "action", "description"]
+            }
+        },
+        "suggested_experiences": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "title": {"type": "STRING"},
+                    "duration": {"type": "STRING"},
+                    "price": {"type": "INTEGER"},
+                    "description": {"type": "STRING"}
+                },
+                "required": ["title", "description"]
+            }
+        }
+    },
+    "required": ["reply", "cultural_insights", "actionable_items", "suggested_experiences"],
+    "propertyOrdering": ["reply", "cultural_insights", "actionable_items", "suggested_experiences"]
+}
+
+def get_gemini_breaker():
+    """Process-wide circuit breaker guarding Gemini calls"""
+    return get_breaker('gemini', Config.GEMINI_BREAKER_FAILURE_THRESHOLD, Config.GEMINI_BREAKER_RESET_SECONDS)
+
+def _is_upstream_failure(error):
+    """Timeouts, connection errors, 429 and 5xx count against the breaker; other 4xx do not"""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, requests.RequestException)
+
+def _recall_response(key):
+    with _fallback_cache_lock:
+        text = _fallback_cache.get(key)
+        if text is not None:
+            _fallback_cache.move_to_end(key)
+        return text
+
+def _remember_response(key, text):
+    with _fallback_cache_lock:
+        _fallback_cache[key] = text
+        _fallback_cache.move_to_end(key)
+        while len(_fallback_cache) > Config.GEMINI_FALLBACK_CACHE_SIZE:
+            _fallback_cache.popitem(last=False)
+
+def _request_key(model, data):
+    return hashlib.sha1(f"{model}:{json.dumps(data, sort_keys=True)}".encode('utf-8')).hexdigest()
+
+def _post_gemini(model, method, data, stream=False):
+    """POST to a Gemini model method through the circuit breaker"""
+    if not Config.GEMINI_API_KEY:
+        raise Exception("Gemini API key not configured")
     
+    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:{method}"
     headers = {
         'Content-Type': 'application/json',
         'X-goog-api-key': Config.GEMINI_API_KEY
     }
-    
+    breaker = get_gemini_breaker()
+    breaker.before_call()
+    try:
+        with track_upstream('gemini_stream' if stream else 'gemini'):
+            response = requests.post(
+                url, headers=headers, json=data, stream=stream,
+                timeout=(Config.GEMINI_CONNECT_TIMEOUT, Config.GEMINI_READ_TIMEOUT)
+            )
+            response.raise_for_status()
+        return response
+    except Exception as e:
+        if _is_upstream_failure(e):
+            breaker.record_failure()
+        else:
+            breaker.release_probe()
+        raise
+
+def _generate_content(model, data):
+    """Run a generateContent request, falling back to the last good response
+    for the same request when Gemini is failing
+    """
+    key = _request_key(model, data)
+    try:
+        response = _post_gemini(model, 'generateContent', data)
+    except Exception as e:
+        cached = _recall_response(key)
+        if cached is None:
+            raise
+        logger.warning("Gemini unavailable (%s), serving last known good response", e)
+        return cached
+    
+    get_gemini_breaker().record_success()
+    result = response.json()
+    
+    if 'candidates' in result and len(result['candidates']) > 0:
+        text = result['candidates'][0]['content']['parts'][0]['text']
+        _remember_response(key, text)
+        return text
+    raise Exception("No valid response from Gemini API")
+
+def _text_request(prompt, response_schema=None):
     data = {
         "contents": [
             {
@@ -32,35 +200,70 @@ def call_gemini_api(prompt, model="gemini-2.0-flash"):
             "maxOutputTokens": 1024
         }
     }
+    if response_schema:
+        # Structured output: Gemini returns JSON matching the schema
+        data['generationConfig'].update({
+            "responseMimeType": "application/json",
+            "responseSchema": response_schema,
+            "maxOutputTokens": 2048
+        })
+    return data
+
+def stream_gemini_api(prompt, model="gemini-2.0-flash", response_schema=None):
+    """Yield Gemini's reply to a text prompt in chunks as they are generated"""
+    data = _text_request(prompt, response_schema)
+    key = _request_key(model, data)
+    try:
+        response = _post_gemini(model, 'streamGenerateContent?alt=sse', data, stream=True)
+    except Exception as e:
+        cached = _recall_response(key)
+        if cached is None:
+            logger.warning("Gemini API error: %s", e)
+            raise Exception(f"Gemini API failed: {str(e)}")
+        logger.warning("Gemini unavailable (%s), serving last known good response", e)
+        yield cached
+        return
+    
+    chunks = []
+    completed = False
+    try:
+        for line in response.iter_lines(decode_unicode=True):
+            # Each server-sent event carries one partial GenerateContentResponse
+            if not line or not line.startswith('data:'):
+                continue
+            result = json.loads(line[5:])
+            for candidate in result.get('candidates', [])[:1]:
+                for part in candidate.get('content', {}).get('parts', []):
+                    if part.get('text'):
+                        chunks.append(part['text'])
+                        yield part['text']
+        completed = True
+    except requests.RequestException as e:
+        get_gemini_breaker().record_failure()
+        raise Exception(f"Gemini stream failed: {str(e)}")
+    finally:
+        response.close()
+        if not completed:
+            # The client went away mid-stream; let the next call probe instead
+            get_gemini_breaker().release_probe()
+    
+    get_gemini_breaker().record_success()
+    if not chunks:
+        raise Exception("No valid response from Gemini API")
+    _remember_response(key, ''.join(chunks))
+
+def call_gemini_api(prompt, model="gemini-2.0-flash", response_schema=None):
+    """Make API call to Gemini"""
     
     try:
-        if not Config.GEMINI_API_KEY:
-            raise Exception("Gemini API key not configured")
-            
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        
-        result = response.json()
-        
-        if 'candidates' in result and len(result['candidates']) > 0:
-            return result['candidates'][0]['content']['parts'][0]['text']
-        else:
-            raise Exception("No valid response from Gemini API")
-            
+        return _generate_content(model, _text_request(prompt, response_schema))
     except Exception as e:
-        print(f"Gemini API error: {e}")
+        logger.warning("Gemini API error: %s", e)
         raise Exception(f"Gemini API failed: {str(e)}")
 
 def call_gemini_with_image(prompt, image_data, model="gemini-2.0-flash"):
     """Make API call to Gemini with image"""
     
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
-    
-    headers = {
-        'Content-Type': 'application/json',
-        'X-goog-api-key': Config.GEMINI_API_KEY
-    }
-    
     data = {
         "contents": [
             {
@@ -86,29 +289,15 @@ def call_gemini_with_image(prompt, image_data, model="gemini-2.0-flash"):
     }
     
     try:
-        if not Config.GEMINI_API_KEY:
-            raise Exception("Gemini API key not configured")
-            
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        
-        result = response.json()
-        
-        if 'candidates' in result and len(result['candidates']) > 0:
-            return result['candidates'][0]['content']['parts'][0]['text']
-        else:
-            raise Exception("No valid response from Gemini API")
-            
+        return _generate_content(model, data)
     except Exception as e:
-        print(f"Gemini API error: {e}")
+        logger.warning("Gemini API error: %s", e)
         raise Exception(f"Gemini API with image failed: {str(e)}")
 
 def transcribe_audio_enhanced(audio_data, language):
     """Real audio transcription using Google Speech-to-Text"""
     
     try:
-        print(f"🎤 Starting Google Speech-to-Text transcription for language: {language}")
-        
         # Import Google Speech function
         from utils.google_speech_utils import transcribe_audio_google_speech
         
@@ -119,13 +308,16 @@ def transcribe_audio_enhanced(audio_data, language):
         detected_language = result["language"]
         confidence = result["confidence"]
         
-        print(f"📝 Google Speech transcribed ({confidence*100:.1f}% confidence): {transcribed_text}")
-        print(f"🌍 Language: {detected_language}")
+        # Transcripts are user content; only their size and confidence are logged
+        logger.info(
+            "Google Speech transcription succeeded",
+            extra={"language": detected_language, "transcript_chars": len(transcribed_text), "confidence": round(confidence, 2)}
+        )
         
         return transcribed_text
         
     except Exception as e:
-        print(f"❌ Google Speech transcription failed: {str(e)}")
+        logger.warning("Google Speech transcription failed: %s", e)
         raise Exception(f"Real audio transcription failed: {str(e)}")
 
 def generate_smart_pricing(listing_data, language):
@@ -155,7 +347,7 @@ def generate_smart_pricing(listing_data, language):
             "pricing_rationale": f"Based on rural homestay standards and amenities. Property type: {listing_data.get('property_type', 'homestay')}"
         }
     except Exception as e:
-        print(f"❌ Pricing generation error: {e}")
+        logger.warning("Pricing generation error: %s", e)
         raise Exception(f"Pricing generation failed: {str(e)}")
 
 def create_multilingual_listing(listing_data, original_language):
@@ -187,23 +379,20 @@ def create_multilingual_listing(listing_data, original_language):
                 
                 translation_result = call_gemini_api(translation_prompt)
                 
-                # Try to parse JSON
-                import re
-                json_match = re.search(r'\{.*\}', translation_result, re.DOTALL)
-                if json_match:
-                    translated_data = json.loads(json_match.group())
+                try:
+                    translated_data = extract_json(translation_result, TRANSLATION_SCHEMA)
                     translations[lang] = {
                         **listing_data,
-                        "title": translated_data.get('title', listing_data['title']),
-                        "description": translated_data.get('description', listing_data['description'])
+                        "title": translated_data['title'],
+                        "description": translated_data['description']
                     }
-                else:
+                except JSONExtractionError:
                     translations[lang] = listing_data
             else:
                 translations[lang] = listing_data
                 
         except Exception as e:
-            print(f"❌ Translation failed for {lang}: {e}")
+            logger.warning("Translation failed for %s: %s", lang, e)
             translations[lang] = listing_data
     
     return translations
@@ -212,39 +401,33 @@ def voice_to_listing_magic(audio_data, language="hi", host_id=None):
     """Convert voice recording to professional listing using Google Speech + Gemini"""
     
     try:
-        print(f"🎤 Processing voice input with Google Speech + Gemini in language: {language}")
-        
         # Step 1: Real speech to text transcription using Google Speech-to-Text
         try:
             transcribed_text = transcribe_audio_enhanced(audio_data, language)
-            print(f"✅ Transcription successful: {transcribed_text}")
         except Exception as transcription_error:
-            print(f"❌ Transcription failed: {transcription_error}")
+            logger.warning("Transcription failed: %s", transcription_error)
             raise Exception(f"Audio transcription failed: {str(transcription_error)}")
         
         # Step 2: Enhance with Gemini
         try:
             from utils.google_speech_utils import enhance_listing_with_gemini
             listing_data = enhance_listing_with_gemini(transcribed_text, language)
-            print(f"✅ Gemini enhancement successful")
         except Exception as e:
-            print(f"❌ Gemini enhancement failed: {e}")
+            logger.warning("Gemini enhancement failed: %s", e)
             raise Exception(f"Listing enhancement failed: {str(e)}")
         
         # Step 3: Generate pricing intelligence
         try:
             pricing_intel = generate_smart_pricing(listing_data, language)
-            print(f"💰 Pricing generated: {pricing_intel}")
         except Exception as pricing_error:
-            print(f"❌ Pricing generation failed: {pricing_error}")
+            logger.warning("Pricing generation failed: %s", pricing_error)
             raise Exception(f"Pricing generation failed: {str(pricing_error)}")
         
         # Step 4: Create multi-language versions
         try:
             translations = create_multilingual_listing(listing_data, language)
-            print(f"🌍 Translations created: {len(translations)} languages")
         except Exception as translation_error:
-            print(f"❌ Translation failed: {translation_error}")
+            logger.warning("Translation failed: %s", translation_error)
             translations = {language: listing_data}
         
         return {
@@ -259,7 +442,6 @@ def voice_to_listing_magic(audio_data, language="hi", host_id=None):
         }
         
     except Exception as e:
-        print(f"❌ Voice processing error: {str(e)}")
         raise Exception(f"Voice processing failed: {str(e)}")
 
 # ============ FEATURE 1: AI VILLAGE STORY GENERATOR ============
@@ -319,65 +501,105 @@ def generate_video_metadata(script, images, listing_details):
         "status": "processing"
     }
     
-    print(f"🎬 Generating village story video for {listing_details.get('title', '')}")
-    print(f"📹 Video ID: {video_id}")
-    print(f"🎯 Using {len(images)} images for generation")
+    logger.info(
+        "Generating village story video",
+        extra={"video_id": video_id, "listing_title": listing_details.get('title', ''), "image_count": len(images)}
+    )
     
     return video_data
 
 # ============ FEATURE 3: AI CULTURAL CONCIERGE ============
 
-def cultural_concierge_chat(user_message, user_preferences, conversation_history):
+def build_concierge_prompt(user_message, user_preferences, conversation_context):
+    """Build the cultural concierge prompt for a user message"""
+    
+    concierge_prompt = f"""
+    You are an AI Cultural Concierge for VillageStay, specializing in authentic rural Indian experiences.
+    
+    User Message: "{user_message}"
+    
+    User Context:
+    - Preferred Budget: {user_preferences.get('budget_range', 'medium')}
+    - Location: {user_preferences.get('location', 'India')}
+    - Interests: {', '.join(user_preferences.get('interests', []))}
+    - Travel Style: {user_preferences.get('travel_style', 'cultural')}
+    - Language: {user_preferences.get('language', 'en')}
+    
+    Conversation so far:
+    {conversation_context or 'None'}
+    
+    In "reply", provide a helpful response that includes:
+    1. Direct answer to their query
+    2. Specific rural destination recommendations
+    3. Cultural insights and customs to respect
+    4. Authentic experiences available
+    5. Practical tips (what to bring, best time, etc.)
+    6. Budget breakdown if relevant
+    7. Booking suggestions
+    
+    Be warm, knowledgeable, and culturally sensitive. Include specific village names, festivals, and local customs.
+    Write the reply in a conversational tone, not as a list.
+    
+    Also return 3-4 "cultural_insights" (customs, do's and don'ts, respectful behavior) specific to the query,
+    the "actionable_items" your reply suggests (booking, experience, events, transport or search), and
+    up to 3 "suggested_experiences" with an approximate price in INR.
+    """
+    
+    return concierge_prompt
+
+def parse_concierge_output(raw_output, user_message):
+    """Split a structured concierge reply into its parts.
+
+    Anything missing or malformed falls back to the defaults used before
+    structured output, so a plain-text reply still yields a full response.
+    """
+    try:
+        output = extract_json(raw_output, {"type": "object", "required": ["reply"], "properties": {"reply": {"type": "string"}}})
+    except JSONExtractionError:
+        output = {"reply": raw_output}
+    
+    reply = output['reply']
+    insights = output.get('cultural_insights')
+    actionable_items = output.get('actionable_items')
+    experiences = output.get('suggested_experiences')
+    
+    return {
+        "response": reply,
+        "cultural_insights": insights if isinstance(insights, list) and insights else DEFAULT_CULTURAL_INSIGHTS,
+        "actionable_items": (
+            actionable_items if isinstance(actionable_items, list)
+            else extract_actionable_items(reply, user_message)
+        ),
+        "suggested_experiences": (
+            experiences if isinstance(experiences, list) and experiences
+            else get_suggested_experiences(user_message)
+        )
+    }
+
+def build_concierge_extras(parsed_output, user_message, user_preferences):
+    """Everything the concierge returns alongside the reply text"""
+    return {
+        "actionable_items": parsed_output['actionable_items'],
+        "cultural_insights": parsed_output['cultural_insights'],
+        "relevant_listings": find_relevant_listings(user_message, user_preferences),
+        "suggested_experiences": parsed_output['suggested_experiences'],
+        "local_events": get_local_events(user_preferences.get('location'))
+    }
+
+def cultural_concierge_chat(user_message, user_preferences, conversation_context):
     """AI Cultural Concierge for personalized travel planning"""
     
     try:
-        # Create comprehensive prompt for cultural concierge
-        concierge_prompt = f"""
-        You are an AI Cultural Concierge for VillageStay, specializing in authentic rural Indian experiences.
-        
-        User Message: "{user_message}"
-        
-        User Context:
-        - Preferred Budget: {user_preferences.get('budget_range', 'medium')}
-        - Location: {user_preferences.get('location', 'India')}
-        - Interests: {', '.join(user_preferences.get('interests', []))}
-        - Travel Style: {user_preferences.get('travel_style', 'cultural')}
-        - Language: {user_preferences.get('language', 'en')}
-        
-        Previous Conversation: {conversation_history[-3:] if conversation_history else 'None'}
-        
-        Provide a helpful response that includes:
-        1. Direct answer to their query
-        2. Specific rural destination recommendations
-        3. Cultural insights and customs to respect
-        4. Authentic experiences available
-        5. Practical tips (what to bring, best time, etc.)
-        6. Budget breakdown if relevant
-        7. Booking suggestions
-        
-        Be warm, knowledgeable, and culturally sensitive. Include specific village names, festivals, and local customs.
-        Format response in a conversational tone, not as a list.
-        """
-        
-        # Get AI response
-        ai_response = call_gemini_api(concierge_prompt)
-        
-        # Extract actionable items
-        actionable_items = extract_actionable_items(ai_response, user_message)
-        
-        # Get cultural insights
-        cultural_insights = get_cultural_insights(user_message, user_preferences)
-        
-        # Find relevant listings
-        relevant_listings = find_relevant_listings(user_message, user_preferences)
+        # One structured call returns the reply and its insights, actions and experiences
+        raw_output = call_gemini_api(
+            build_concierge_prompt(user_message, user_preferences, conversation_context),
+            response_schema=CONCIERGE_RESPONSE_SCHEMA
+        )
+        parsed_output = parse_concierge_output(raw_output, user_message)
         
         return {
-            "response": ai_response,
-            "actionable_items": actionable_items,
-            "cultural_insights": cultural_insights,
-            "relevant_listings": relevant_listings,
-            "suggested_experiences": get_suggested_experiences(user_message),
-            "local_events": get_local_events(user_preferences.get('location')),
+            "response": parsed_output['response'],
+            **build_concierge_extras(parsed_output, user_message, user_preferences),
             "conversation_id": generate_conversation_id()
         }
         
@@ -420,67 +642,15 @@ def extract_actionable_items(ai_response, user_message):
     
     return actionable_items
 
-def get_cultural_insights(user_message, user_preferences):
-    """Get specific cultural insights based on user query"""
-    
-    insights_prompt = f"""
-    Provide 3-4 specific cultural insights for a traveler asking: "{user_message}"
-    
-    Focus on:
-    - Local customs and etiquette
-    - Cultural do's and don'ts
-    - Traditional practices they might encounter
-    - Respectful behavior guidelines
-    
-    Keep insights practical and specific to rural Indian culture.
-    Format as JSON array with insight text and importance level.
-    """
-    
-    try:
-        insights_response = call_gemini_api(insights_prompt)
-        return json.loads(insights_response)
-    except:
-        return [
-            {
-                "insight": "Remove shoes before entering homes and temples",
-                "importance": "high"
-            },
-            {
-                "insight": "Greet elders with 'Namaste' and touch their feet as a sign of respect",
-                "importance": "medium"
-            },
-            {
-                "insight": "Dress modestly, especially when visiting religious places",
-                "importance": "high"
-            }
-        ]
-
 def find_relevant_listings(user_message, user_preferences):
-    """Find listings relevant to user query (mock implementation)"""
+    """Find live listings relevant to the user's message and interests"""
     
-    # This would integrate with your actual listings database
-    mock_listings = [
-        {
-            "id": "mock_1",
-            "title": "Peaceful Himalayan Village Retreat",
-            "location": "Uttarakhand Hills",
-            "price_per_night": 2000,
-            "rating": 4.8,
-            "image": "https://example.com/himalayan-retreat.jpg",
-            "match_score": 0.95
-        },
-        {
-            "id": "mock_2", 
-            "title": "Traditional Rajasthani Haveli Experience",
-            "location": "Rural Rajasthan",
-            "price_per_night": 2500,
-            "rating": 4.6,
-            "image": "https://example.com/rajasthani-haveli.jpg",
-            "match_score": 0.87
-        }
-    ]
-    
-    return mock_listings[:3]  # Return top 3 matches
+    query = ' '.join([user_message] + list(user_preferences.get('interests', [])))
+    try:
+        return search_listings(query)
+    except Exception as e:
+        logger.warning("Listing search error: %s", e)
+        return []
 
 def get_suggested_experiences(user_message):
     """Get suggested experiences based on user query"""
@@ -559,13 +729,13 @@ def generate_listing_content(title, description, location, property_type, amenit
     
     try:
         # Try to parse as JSON
-        content = json.loads(response)
+        content = extract_json(response)
         return content
     except:
         raise Exception("Failed to generate listing content")
 
-def generate_travel_itinerary(query, user_preferences):
-    """Generate travel itinerary based on user query"""
+def build_travel_itinerary_prompt(query, user_preferences):
+    """Build the travel assistant prompt for a user query"""
     
     prompt = f"""
     User Query: {query}
@@ -584,7 +754,11 @@ def generate_travel_itinerary(query, user_preferences):
     Keep the response conversational and helpful, around 200-300 words.
     """
     
-    return call_gemini_api(prompt)
+    return prompt
+
+def generate_travel_itinerary(query, user_preferences):
+    """Generate travel itinerary based on user query"""
+    return call_gemini_api(build_travel_itinerary_prompt(query, user_preferences))
 
 def translate_text(text, target_language, source_language="auto"):
     """Translate text using Gemini"""
@@ -620,7 +794,7 @@ def generate_content_from_voice(voice_text, language):
     response = call_gemini_api(prompt)
     
     try:
-        return json.loads(response)
+        return extract_json(response)
     except:
         raise Exception("Failed to generate content from voice")
 
@@ -648,7 +822,7 @@ def moderate_content(content, content_type):
     response = call_gemini_api(prompt)
     
     try:
-        return json.loads(response)
+        return extract_json(response)
     except:
         raise Exception("Content moderation failed")
 
@@ -681,7 +855,7 @@ def generate_pricing_suggestion(location, property_type, amenities, max_guests,
     response = call_gemini_api(prompt)
     
     try:
-        return json.loads(response)
+        return extract_json(response)
     except:
         raise Exception("Pricing suggestion generation failed")
 
@@ -712,7 +886,7 @@ def generate_sustainability_suggestions(property_type, location, amenities, curr
     response = call_gemini_api(prompt)
     
     try:
-        return json.loads(response)
+        return extract_json(response)
     except:
         raise Exception("Sustainability suggestions generation failed")
 
@@ -742,6 +916,6 @@ def generate_experience_content(experience_type, location, duration, local_cultu
     response = call_gemini_api(prompt)
     
     try:
-        return json.loads(response)
+        return extract_json(response)
     except:
         raise Exception("Experience content generation failed")
\ No newline at end of file
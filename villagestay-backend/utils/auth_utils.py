@@ -1,12 +1,75 @@
 import random
 import string
+import threading
+import time
+from collections import OrderedDict
 from config import Config
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, g, has_app_context
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
 from database import mongo
 from bson import ObjectId
 
+# Process cache of user documents: user_id -> (expires_at, user)
+_user_cache = OrderedDict()
+_user_cache_lock = threading.Lock()
+
+def build_identity_claims(user):
+    """JWT claims carrying the role and basic profile, for display only.
+
+    Tokens live for weeks, so authorization must not trust these; role and
+    verification checks read the user through load_user instead.
+    """
+    return {
+        "user_type": user['user_type'],
+        "full_name": user['full_name'],
+        "email": user['email'],
+        "is_verified": user.get('is_verified', False)
+    }
+
+def invalidate_cached_user(user_id):
+    """Drop a user from the process cache after their document changes"""
+    with _user_cache_lock:
+        _user_cache.pop(str(user_id), None)
+    if has_app_context() and g.get('current_user') and str(g.current_user['_id']) == str(user_id):
+        g.pop('current_user')
+
+def load_user(user_id):
+    """Load a user document through the short-TTL process cache"""
+    user_id = str(user_id)
+    now = time.monotonic()
+    
+    with _user_cache_lock:
+        cached = _user_cache.get(user_id)
+        if cached and cached[0] > now:
+            _user_cache.move_to_end(user_id)
+            return cached[1]
+    
+    user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+    if user:
+        with _user_cache_lock:
+            _user_cache[user_id] = (now + Config.USER_CACHE_TTL, user)
+            _user_cache.move_to_end(user_id)
+            while len(_user_cache) > Config.USER_CACHE_MAX_ENTRIES:
+                _user_cache.popitem(last=False)
+    
+    return user
+
+def get_current_user():
+    """Get the authenticated user's document, loaded at most once per request"""
+    if 'current_user' not in g:
+        g.current_user = load_user(get_jwt_identity())
+    return g.current_user
+
+def get_current_user_type():
+    """Get the authenticated user's current role.
+
+    Read from the user document (TTL-cached) rather than the token claims,
+    so a role change or deleted account takes effect within USER_CACHE_TTL.
+    """
+    user = get_current_user()
+    return user['user_type'] if user else None
+
 def require_user_type(*allowed_types):
     """Decorator to require specific user types"""
     def decorator(f):
@@ -14,13 +77,12 @@ def require_user_type(*allowed_types):
         def decorated_function(*args, **kwargs):
             verify_jwt_in_request()
             
-            user_id = get_jwt_identity()
-            user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+            user_type = get_current_user_type()
             
-            if not user:
+            if not user_type:
                 return jsonify({"error": "User not found"}), 404
             
-            if user['user_type'] not in allowed_types:
+            if user_type not in allowed_types:
                 return jsonify({
                     "error": f"Access denied. Required user type: {' or '.join(allowed_types)}"
                 }), 403
@@ -35,10 +97,7 @@ def require_admin(f):
     def decorated_function(*args, **kwargs):
         verify_jwt_in_request()
         
-        user_id = get_jwt_identity()
-        user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
-        
-        if not user or user['user_type'] != 'admin':
+        if get_current_user_type() != 'admin':
             return jsonify({"error": "Admin privileges required"}), 403
         
         return f(*args, **kwargs)
@@ -50,10 +109,7 @@ def require_host(f):
     def decorated_function(*args, **kwargs):
         verify_jwt_in_request()
         
-        user_id = get_jwt_identity()
-        user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
-        
-        if not user or user['user_type'] != 'host':
+        if get_current_user_type() != 'host':
             return jsonify({"error": "Host account required"}), 403
         
         return f(*args, **kwargs)
@@ -64,23 +120,19 @@ def generate_otp(length=6):
     return ''.join(random.choices(string.digits, k=length))
 
 def send_otp_email(email, otp):
-    """Send OTP via email (mock implementation)"""
-    # Mock email sending for development
-    print(f"=== EMAIL NOTIFICATION ===")
-    print(f"To: {email}")
-    print(f"Subject: VillageStay - Email Verification")
-    print(f"OTP: {otp}")
-    print(f"This code will expire in 10 minutes.")
-    print(f"========================")
+    """Queue the verification OTP email"""
+    from utils.email_utils import enqueue_email
+    enqueue_email(
+        email,
+        "VillageStay - Email Verification",
+        f"Your verification code is {otp}.\nThis code will expire in 10 minutes."
+    )
     return True
 
 def send_email_notification(to_email, subject, body):
-    """Send email notification (mock implementation)"""
-    print(f"=== EMAIL NOTIFICATION ===")
-    print(f"To: {to_email}")
-    print(f"Subject: {subject}")
-    print(f"Body: {body}")
-    print(f"========================")
+    """Queue a notification email"""
+    from utils.email_utils import enqueue_email
+    enqueue_email(to_email, subject, body)
     return True
 
 def validate_phone_number(phone):
@@ -105,13 +157,13 @@ def validate_phone_number(phone):
 
 def hash_password(password):
     """Hash password with salt"""
-    from werkzeug.security import generate_password_hash
-    return generate_password_hash(password)
+    from utils.password_utils import hash_password as _hash_password
+    return _hash_password(password)
 
 def verify_password(password, password_hash):
     """Verify password against hash"""
-    from werkzeug.security import check_password_hash
-    return check_password_hash(password_hash, password)
+    from utils.password_utils import verify_password as _verify_password
+    return _verify_password(password, password_hash)
 
 def generate_secure_token(length=32):
     """Generate secure random token"""
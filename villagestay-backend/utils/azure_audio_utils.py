@@ -6,7 +6,12 @@ import os
 import base64
 from pydub import AudioSegment
 import io
+import logging
 from config import Config
+from utils.json_utils import extract_json, JSONExtractionError
+from utils.ai_utils import LISTING_ENHANCEMENT_SCHEMA
+
+logger = logging.getLogger(__name__)
 
 # Initialize Azure OpenAI Client
 azure_client = None
@@ -16,17 +21,15 @@ try:
         api_version=Config.AZURE_GPT_API_VERSION,
         azure_endpoint=Config.AZURE_GPT_ENDPOINT
     )
-    print("✅ Azure OpenAI client initialized successfully")
+    logger.info("Azure OpenAI client initialized")
 except Exception as e:
-    print(f"❌ Failed to initialize Azure OpenAI client: {e}")
+    logger.error("Failed to initialize Azure OpenAI client: %s", e)
 
 def transcribe_audio_azure_whisper(audio_data, language="auto"):
     """
     Transcribe audio using Azure OpenAI Whisper
     """
     try:
-        print(f"🎵 Starting Azure Whisper transcription for language: {language}")
-        
         # Create temporary file for audio
         with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
             # Decode base64 audio data if needed
@@ -35,17 +38,14 @@ def transcribe_audio_azure_whisper(audio_data, language="auto"):
             else:
                 audio_bytes = audio_data
             
-            print(f"🎵 Processing {len(audio_bytes)} bytes of audio data")
-            
             # Convert webm to wav using pydub
             try:
                 audio = AudioSegment.from_file(io.BytesIO(audio_bytes))
                 # Ensure proper format for Whisper (16kHz, mono)
                 audio = audio.set_frame_rate(16000).set_channels(1)
                 audio.export(temp_file.name, format="wav")
-                print(f"🔄 Converted audio to WAV format: {temp_file.name}")
             except Exception as conversion_error:
-                print(f"❌ Audio conversion error: {conversion_error}")
+                logger.warning("Audio conversion error, sending raw audio: %s", conversion_error)
                 # Write raw audio data if conversion fails
                 temp_file.write(audio_bytes)
                 temp_file.flush()
@@ -68,16 +68,15 @@ def transcribe_audio_azure_whisper(audio_data, language="auto"):
 
                 url = f"{Config.AZURE_WHISPER_ENDPOINT}?api-version={Config.AZURE_WHISPER_API_VERSION}"
                 
-                print(f"🎤 Calling Azure Whisper API (language: {azure_language})")
-                print(f"📡 URL: {url}")
+                logger.debug(
+                    "Calling Azure Whisper",
+                    extra={"language": azure_language, "audio_bytes": len(audio_bytes)}
+                )
                 
                 response = requests.post(url, headers=headers, data=data, files=files)
 
                 if response.status_code == 200:
                     transcribed_text = response.text.strip()
-                    print(f"✅ Azure Whisper transcription successful!")
-                    print(f"📝 Result: {transcribed_text}")
-                    
                     # Cleanup
                     os.unlink(temp_file.name)
                     
@@ -88,13 +87,12 @@ def transcribe_audio_azure_whisper(audio_data, language="auto"):
                     }
                 else:
                     error_msg = f"Azure Whisper Error {response.status_code}: {response.text}"
-                    print(f"❌ {error_msg}")
                     # Cleanup
                     os.unlink(temp_file.name)
                     raise Exception(error_msg)
                     
     except Exception as e:
-        print(f"❌ Azure Whisper transcription error: {e}")
+        logger.warning("Azure Whisper transcription error: %s", e)
         # Cleanup on error
         if 'temp_file' in locals() and os.path.exists(temp_file.name):
             os.unlink(temp_file.name)
@@ -146,8 +144,6 @@ def enhance_listing_with_azure_gpt(transcribed_text, language):
         }}
         """
 
-        print("🤖 Enhancing listing with Azure GPT-4o...")
-        
         response = azure_client.chat.completions.create(
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -160,20 +156,15 @@ def enhance_listing_with_azure_gpt(transcribed_text, language):
         )
 
         gpt_response = response.choices[0].message.content
-        print(f"✅ Azure GPT-4o enhancement successful")
-        print(f"📝 Response: {gpt_response[:200]}...")
-        
         # Extract JSON from response
-        import re
-        json_match = re.search(r'\{.*\}', gpt_response, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group())
-        else:
-            print("⚠️ No valid JSON found in GPT response, using fallback")
+        try:
+            return extract_json(gpt_response, LISTING_ENHANCEMENT_SCHEMA)
+        except JSONExtractionError as e:
+            logger.warning("Azure GPT returned unusable JSON (%s), using fallback", e)
             return create_fallback_listing_data(transcribed_text, language)
             
     except Exception as e:
-        print(f"❌ Azure GPT enhancement error: {e}")
+        logger.warning("Azure GPT enhancement error: %s", e)
         return create_fallback_listing_data(transcribed_text, language)
 
 def get_azure_language_code(language):
@@ -226,21 +217,15 @@ def create_fallback_listing_data(transcribed_text, language):
 
 def test_azure_transcription():
     """Test Azure transcription setup"""
-    print("🧪 Testing Azure transcription setup...")
-    
     # Test Azure OpenAI client
-    if azure_client:
-        print("✅ Azure OpenAI client available")
-    else:
-        print("❌ Azure OpenAI client not available")
+    if not azure_client:
+        logger.warning("Azure OpenAI client not available")
         return False
     
     # Test API keys
-    if Config.AZURE_WHISPER_API_KEY and Config.AZURE_GPT_API_KEY:
-        print("✅ Azure API keys configured")
-    else:
-        print("❌ Azure API keys missing")
+    if not (Config.AZURE_WHISPER_API_KEY and Config.AZURE_GPT_API_KEY):
+        logger.warning("Azure API keys missing")
         return False
     
-    print("✅ Azure setup ready for transcription!")
+    logger.info("Azure setup ready for transcription")
     return True
\ No newline at end of file
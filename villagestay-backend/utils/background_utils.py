@@ -0,0 +1,20 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(
+    max_workers=Config.BACKGROUND_WORKERS,
+    thread_name_prefix='villagestay-bg'
+)
+
+def _run_task(fn, args, kwargs):
+    try:
+        return fn(*args, **kwargs)
+    except Exception as e:
+        logger.exception("Background task %s failed: %s", fn.__name__, e)
+
+def run_in_background(fn, *args, **kwargs):
+    """Run a function on the shared background pool without blocking the request"""
+    return _executor.submit(_run_task, fn, args, kwargs)
@@ -0,0 +1,136 @@
+import os
+import secrets
+import threading
+import time
+from datetime import timedelta
+from config import Config
+from database import mongo
+
+def hydrate_bookings(bookings, listing_projection=None, user_projection=None):
+    """Resolve the listings, tourists and hosts referenced by a page of bookings.
+
+    Issues one ``$in`` query per collection regardless of page size and
+    returns ``(listings_by_id, users_by_id)``; tourists and hosts share the
+    users map.
+    """
+    listing_ids = list({booking['listing_id'] for booking in bookings})
+    user_ids = list(
+        {booking['tourist_id'] for booking in bookings} |
+        {booking['host_id'] for booking in bookings}
+    )
+    
+    listings = {
+        listing['_id']: listing
+        for listing in mongo.db.listings.find({"_id": {"$in": listing_ids}}, listing_projection)
+    } if listing_ids else {}
+    
+    users = {
+        user['_id']: user
+        for user in mongo.db.users.find({"_id": {"$in": user_ids}}, user_projection)
+    } if user_ids else {}
+    
+    return listings, users
+
+def find_blocked_date(availability_calendar, check_in, check_out):
+    """First host-blocked date ('YYYY-MM-DD') in [check_in, check_out), or None"""
+    # Most listings have never blocked a date, so there is nothing to walk
+    if not availability_calendar:
+        return None
+    
+    current_date = check_in
+    while current_date < check_out:
+        date_str = current_date.strftime('%Y-%m-%d')
+        # Only an explicit False blocks a date; missing dates are open
+        if availability_calendar.get(date_str) == False:
+            return date_str
+        current_date += timedelta(days=1)
+    return None
+
+# Booking references: "VS" + 16 Crockford base32 characters encoding
+# 44 bits of milliseconds since REFERENCE_EPOCH_MS, a 20 bit node id and a
+# 16 bit per-millisecond sequence. References sort by creation time.
+REFERENCE_PREFIX = "VS"
+REFERENCE_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+REFERENCE_EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+NODE_ID_BITS = 20
+SEQUENCE_BITS = 16
+
+_reference_lock = threading.Lock()
+_reference_state = {"pid": None, "node_id": None, "last_ms": -1, "sequence": 0}
+
+def _get_node_id():
+    # Re-derive after fork so pre-forked workers never share a random node id
+    if _reference_state['pid'] != os.getpid():
+        configured = Config.BOOKING_REFERENCE_NODE_ID
+        if configured is not None and configured != '':
+            node_id = int(configured) & ((1 << NODE_ID_BITS) - 1)
+        else:
+            node_id = secrets.randbits(NODE_ID_BITS)
+        _reference_state.update({"pid": os.getpid(), "node_id": node_id, "last_ms": -1, "sequence": 0})
+    return _reference_state['node_id']
+
+def encode_base32(value, length):
+    """Encode an integer as fixed-width Crockford base32"""
+    chars = []
+    for _ in range(length):
+        chars.append(REFERENCE_ALPHABET[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+def generate_booking_reference():
+    """Generate a unique, time-ordered booking reference without a database round trip"""
+    with _reference_lock:
+        node_id = _get_node_id()
+        now_ms = max(int(time.time() * 1000), _reference_state['last_ms'])
+        
+        if now_ms == _reference_state['last_ms']:
+            sequence = (_reference_state['sequence'] + 1) & ((1 << SEQUENCE_BITS) - 1)
+            if sequence == 0:
+                # Sequence exhausted for this millisecond; move to the next one
+                now_ms += 1
+        else:
+            sequence = 0
+        
+        _reference_state['last_ms'] = now_ms
+        _reference_state['sequence'] = sequence
+    
+    value = ((now_ms - REFERENCE_EPOCH_MS) << (NODE_ID_BITS + SEQUENCE_BITS)) | (node_id << SEQUENCE_BITS) | sequence
+    return f"{REFERENCE_PREFIX}{encode_base32(value, 16)}"
+
+def booking_reference_query(reference):
+    """Match a booking by its current reference or one it was reissued from"""
+    return {"$or": [{"booking_reference": reference}, {"previous_booking_references": reference}]}
+
+def backfill_booking_references():
+    """Give every booking a distinct reference so the unique index can be built.
+
+    Bookings without a string reference get a new one; where several share a
+    reference, the oldest keeps it and the rest are reissued. A reissued
+    reference is kept in previous_booking_references, since customers may
+    already hold it. Returns the number of bookings updated.
+    """
+    reissue = [(booking['_id'], None) for booking in mongo.db.bookings.find(
+        {"booking_reference": {"$not": {"$type": "string"}}}, {"_id": 1}
+    )]
+    for group in mongo.db.bookings.aggregate([
+        {"$match": {"booking_reference": {"$type": "string"}}},
+        {"$sort": {"_id": 1}},
+        {"$group": {"_id": "$booking_reference", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}}
+    ], allowDiskUse=True):
+        reissue.extend((booking_id, group['_id']) for booking_id in group['ids'][1:])
+    
+    updated = 0
+    for booking_id, old_reference in reissue:
+        if old_reference is None:
+            query = {"_id": booking_id, "booking_reference": {"$not": {"$type": "string"}}}
+            update = {"$set": {"booking_reference": generate_booking_reference()}}
+        else:
+            # Conditional on the old value, so a second run cannot reissue twice
+            query = {"_id": booking_id, "booking_reference": old_reference}
+            update = {
+                "$set": {"booking_reference": generate_booking_reference()},
+                "$addToSet": {"previous_booking_references": old_reference}
+            }
+        updated += mongo.db.bookings.update_one(query, update).modified_count
+    return updated
@@ -0,0 +1,162 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, make_response
+from pymongo import ReturnDocument
+from config import Config
+from database import mongo
+
+logger = logging.getLogger(__name__)
+
+# Process-local response store: key -> (expires_at, body, status, etag)
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+# Last known version per scope: scope -> (version, synced_at)
+_scope_versions = {}
+_scope_versions_lock = threading.Lock()
+
+def normalize_query_args(args):
+    """Build a stable cache key fragment from request query parameters"""
+    items = []
+    for key in sorted(args.keys()):
+        for value in sorted(value.strip() for value in args.getlist(key)):
+            # Empty parameters are ignored by the handlers, so ignore them here too
+            if value != '':
+                items.append(f"{key}={value}")
+    return '&'.join(items)
+
+def get_cache_versions(scopes):
+    """Get current versions for cache scopes, syncing stale ones from MongoDB"""
+    now = time.monotonic()
+    sync_interval = Config.RESPONSE_CACHE_VERSION_SYNC_SECONDS
+    versions = {}
+    stale_scopes = []
+
+    with _scope_versions_lock:
+        for scope in scopes:
+            cached = _scope_versions.get(scope)
+            if cached and now - cached[1] < sync_interval:
+                versions[scope] = cached[0]
+            else:
+                stale_scopes.append(scope)
+
+    if stale_scopes:
+        # One indexed read covers every stale scope of this request
+        stored = {
+            doc['_id']: doc.get('version', 0)
+            for doc in mongo.db.cache_versions.find({"_id": {"$in": stale_scopes}})
+        }
+        with _scope_versions_lock:
+            for scope in stale_scopes:
+                versions[scope] = stored.get(scope, 0)
+                _scope_versions[scope] = (versions[scope], now)
+
+    return versions
+
+def bump_cache_version(scope):
+    """Invalidate every cached response that depends on a scope"""
+    doc = mongo.db.cache_versions.find_one_and_update(
+        {"_id": scope},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    with _scope_versions_lock:
+        _scope_versions[scope] = (doc['version'], time.monotonic())
+
+def invalidate_listing_cache(listing_id=None, all_details=False):
+    """Invalidate cached browse/search pages and one listing detail, or every detail.
+
+    The only way callers should bump listing cache versions: a failed bump is
+    logged rather than raised, since the write it follows has already committed.
+    """
+    try:
+        bump_cache_version('listings')
+        if all_details:
+            bump_cache_version('listing')
+        elif listing_id:
+            bump_cache_version(f"listing:{listing_id}")
+    except Exception as e:
+        # A failed bump only delays freshness until the TTL expires
+        logger.warning("Cache invalidation error: %s", e)
+
+def _get_cached(key):
+    with _response_cache_lock:
+        entry = _response_cache.get(key)
+        if not entry:
+            return None
+        if entry[0] < time.monotonic():
+            del _response_cache[key]
+            return None
+        _response_cache.move_to_end(key)
+        return entry
+
+def _set_cached(key, body, status, etag):
+    with _response_cache_lock:
+        _response_cache[key] = (time.monotonic() + Config.RESPONSE_CACHE_TTL, body, status, etag)
+        _response_cache.move_to_end(key)
+        while len(_response_cache) > Config.RESPONSE_CACHE_MAX_ENTRIES:
+            _response_cache.popitem(last=False)
+
+def clear_response_cache():
+    """Drop every locally cached response"""
+    with _response_cache_lock:
+        _response_cache.clear()
+    with _scope_versions_lock:
+        _scope_versions.clear()
+
+def _conditional_response(body, status, etag):
+    response = make_response(body, status)
+    response.mimetype = 'application/json'
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, no-cache'
+    response.headers['Vary'] = 'Accept-Encoding'
+    if request.if_none_match.contains(etag):
+        response.status_code = 304
+        response.set_data(b'')
+    return response
+
+def cached_response(namespace, scope_arg=None):
+    """Cache successful GET responses keyed on normalized query parameters.
+
+    Entries are keyed on the versions of ``namespace`` and, when ``scope_arg``
+    names a view argument, on ``namespace:<value>`` too, so bumping either
+    version retires the entry without scanning the cache. Responses carry an
+    ETag so clients can revalidate with If-None-Match.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not Config.RESPONSE_CACHE_ENABLED:
+                return f(*args, **kwargs)
+
+            try:
+                scopes = [namespace]
+                if scope_arg:
+                    scopes.append(f"{namespace}:{kwargs.get(scope_arg)}")
+                versions = get_cache_versions(scopes)
+            except Exception as e:
+                logger.warning("Cache version lookup error: %s", e)
+                return f(*args, **kwargs)
+
+            version_key = ','.join(f"{scope}@{versions[scope]}" for scope in scopes)
+            key = f"{request.path}?{normalize_query_args(request.args)}#{version_key}"
+
+            cached = _get_cached(key)
+            if cached:
+                return _conditional_response(cached[1], cached[2], cached[3])
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+            body = response.get_data()
+            etag = hashlib.sha1(body).hexdigest()
+            _set_cached(key, body, response.status_code, etag)
+            return _conditional_response(body, response.status_code, etag)
+        return decorated_function
+    return decorator
@@ -0,0 +1,86 @@
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+class CircuitBreaker:
+    """Fail fast after repeated upstream failures.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    rejects calls for ``reset_timeout`` seconds. It then lets one probe
+    through (half-open): success closes it, failure reopens it.
+    """
+    
+    def __init__(self, name, failure_threshold, reset_timeout):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self.probe_in_flight = False
+        self.lock = threading.Lock()
+    
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go upstream now"""
+        with self.lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return
+            self.rejected += 1
+        raise CircuitOpenError(f"{self.name} circuit is open")
+    
+    def record_success(self):
+        with self.lock:
+            self.state = CLOSED
+            self.failures = 0
+            self.opened_at = None
+            self.probe_in_flight = False
+    
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self.probe_in_flight = False
+    
+    def release_probe(self):
+        """End a call that neither proved nor disproved upstream health"""
+        with self.lock:
+            self.probe_in_flight = False
+    
+    def snapshot(self):
+        with self.lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "open_for_seconds": round(time.monotonic() - self.opened_at, 1) if self.opened_at else 0,
+                "rejected_calls": self.rejected
+            }
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name, failure_threshold, reset_timeout):
+    """Get the process-wide breaker for an upstream, creating it on first use"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, failure_threshold, reset_timeout)
+        return _breakers[name]
+
+def get_breaker_states():
+    """Snapshot every breaker, for health checks and metrics"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
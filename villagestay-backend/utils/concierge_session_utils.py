@@ -0,0 +1,179 @@
+import logging
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from config import Config
+from database import mongo
+from utils.background_utils import run_in_background
+
+logger = logging.getLogger(__name__)
+
+# Hard cap on stored turns in case summarization keeps failing
+MAX_STORED_TURNS = 50
+# Characters per token for budgeting; close enough for English and Hinglish text
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def _format_turn(turn):
+    return f"Traveler: {turn['message']}\nConcierge: {turn['response']}"
+
+def _legacy_turns(session_id, user_id):
+    """Seed memory for sessions that predate session documents"""
+    records = list(mongo.db.concierge_conversations.find(
+        {"session_id": session_id, "user_id": ObjectId(user_id)},
+        {"message": 1, "response": 1, "created_at": 1}
+    ).sort("created_at", -1).limit(Config.CONCIERGE_SESSION_RECENT_TURNS))
+    return [
+        {"message": record['message'], "response": record['response'], "created_at": record['created_at']}
+        for record in reversed(records)
+    ]
+
+def load_session(session_id, user_id):
+    """Load a concierge session's memory with a single _id lookup"""
+    if not session_id:
+        return None
+    session = mongo.db.concierge_sessions.find_one({"_id": session_id, "user_id": ObjectId(user_id)})
+    if session is None:
+        turns = _legacy_turns(session_id, user_id)
+        if turns:
+            # Save the seed now; record_turn only pushes onto an existing document
+            now = datetime.utcnow()
+            session = {
+                "_id": session_id,
+                "user_id": ObjectId(user_id),
+                "summary": "",
+                "recent_turns": turns,
+                "turn_count": len(turns),
+                "created_at": now,
+                "updated_at": now
+            }
+            try:
+                mongo.db.concierge_sessions.insert_one(session)
+            except DuplicateKeyError:
+                # A concurrent turn created it first, or the id belongs to another user
+                session = mongo.db.concierge_sessions.find_one({"_id": session_id, "user_id": ObjectId(user_id)})
+    return session
+
+def build_conversation_context(session, budget_tokens=None):
+    """Assemble the summary and as many recent turns as fit the token budget, oldest first"""
+    if not session:
+        return ''
+    budget = budget_tokens or Config.CONCIERGE_CONTEXT_TOKEN_BUDGET
+    
+    parts = []
+    summary = session.get('summary')
+    if summary:
+        summary_text = f"Summary of earlier conversation: {summary}"
+        parts.append(summary_text)
+        budget -= estimate_tokens(summary_text)
+    
+    # Newest turns are the most relevant, so they claim the budget first
+    turns = []
+    for turn in reversed(session.get('recent_turns', [])):
+        turn_text = _format_turn(turn)
+        cost = estimate_tokens(turn_text)
+        if cost > budget:
+            break
+        turns.append(turn_text)
+        budget -= cost
+    
+    return '\n\n'.join(parts + list(reversed(turns)))
+
+def record_turn(session_id, user_id, message, response):
+    """Append a turn to the session and fold older turns into the summary when needed"""
+    now = datetime.utcnow()
+    try:
+        session = mongo.db.concierge_sessions.find_one_and_update(
+            {"_id": session_id, "user_id": ObjectId(user_id)},
+            {
+                "$push": {"recent_turns": {
+                    "$each": [{"message": message, "response": response, "created_at": now}],
+                    "$slice": -MAX_STORED_TURNS
+                }},
+                "$inc": {"turn_count": 1},
+                "$set": {"updated_at": now},
+                "$setOnInsert": {"summary": "", "created_at": now}
+            },
+            upsert=True,
+            projection={"recent_turns.created_at": 1}
+        )
+    except DuplicateKeyError:
+        # The session id belongs to another user; keep their memory untouched
+        return
+    
+    # find_one_and_update returns the document before the push
+    pending = len(session.get('recent_turns', [])) + 1 if session else 1
+    if pending > Config.CONCIERGE_SESSION_RECENT_TURNS:
+        leased_at = _claim_summary_lease(session_id)
+        if leased_at:
+            run_in_background(summarize_session, session_id, leased_at)
+
+def _claim_summary_lease(session_id):
+    """Claim the session's summarizer run; returns the lease time, or None while another run holds it"""
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=Config.CONCIERGE_SUMMARY_LEASE_SECONDS)
+    claimed = mongo.db.concierge_sessions.find_one_and_update(
+        {"_id": session_id, "$or": [{"summarizing_at": None}, {"summarizing_at": {"$lt": stale_before}}]},
+        {"$set": {"summarizing_at": now}},
+        projection={"_id": 1}
+    )
+    return now if claimed else None
+
+def _release_summary_lease(session_id, leased_at):
+    mongo.db.concierge_sessions.update_one(
+        {"_id": session_id, "summarizing_at": leased_at},
+        {"$unset": {"summarizing_at": ""}}
+    )
+
+def summarize_session(session_id, leased_at):
+    """Fold all but the newest turns into the session's rolling summary.
+
+    Runs under the lease claimed by record_turn; the result is only written
+    while that lease is still held, so overlapping runs cannot fold the same
+    turns twice.
+    """
+    from utils.ai_utils import call_gemini_api
+    
+    session = mongo.db.concierge_sessions.find_one({"_id": session_id})
+    if not session:
+        return
+    turns = session.get('recent_turns', [])
+    folded = turns[:-Config.CONCIERGE_SESSION_KEEP_TURNS] if Config.CONCIERGE_SESSION_KEEP_TURNS else turns
+    if not folded:
+        _release_summary_lease(session_id, leased_at)
+        return
+    
+    transcript = '\n\n'.join(_format_turn(turn) for turn in folded)
+    prompt = f"""
+    Update the running summary of a conversation between a traveler and the VillageStay cultural concierge.
+    
+    Current summary: {session.get('summary') or 'None'}
+    
+    New conversation turns:
+    {transcript}
+    
+    Write the updated summary in at most {Config.CONCIERGE_SUMMARY_MAX_WORDS} words. Keep the traveler's
+    destinations, dates, budget, group, interests and any recommendations they liked. Return only the summary.
+    """
+    
+    try:
+        summary = call_gemini_api(prompt).strip()
+    except Exception as e:
+        logger.warning("Session summary error: %s", e)
+        # Without the model, keep the traveler's own words, trimmed to the word limit
+        words = ' '.join(filter(None, [session.get('summary')] + [turn['message'] for turn in folded])).split()
+        summary = ' '.join(words[-Config.CONCIERGE_SUMMARY_MAX_WORDS:])
+    
+    # Pull by timestamp so turns appended meanwhile are kept; releasing the lease in the same write
+    result = mongo.db.concierge_sessions.update_one(
+        {"_id": session_id, "summarizing_at": leased_at},
+        {
+            "$set": {"summary": summary, "summarized_at": datetime.utcnow()},
+            "$unset": {"summarizing_at": ""},
+            "$pull": {"recent_turns": {"created_at": {"$lte": folded[-1]['created_at']}}}
+        }
+    )
+    if not result.matched_count:
+        logger.warning("Session summary for %s discarded: lease expired and was taken over", session_id)
@@ -0,0 +1,201 @@
+import logging
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from pymongo import ReturnDocument
+from config import Config
+from database import mongo
+
+logger = logging.getLogger(__name__)
+
+# Retry delay doubles per failed attempt, starting here
+RETRY_BASE_SECONDS = 30
+# A message still marked sending after this long belongs to a dead sender
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+_wake_event = threading.Event()
+_sender_thread = None
+_sender_lock = threading.Lock()
+
+class ConsoleBackend:
+    """Log messages instead of sending them, for development"""
+    
+    def open(self):
+        pass
+    
+    def send(self, message):
+        logger.info("Email to %s: %s\n%s", message['to'], message['subject'], message['body'])
+    
+    def close(self):
+        pass
+
+class FileBackend:
+    """Append messages to a local file, for testing"""
+    
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+    
+    def open(self):
+        self.file = open(self.path, 'a', encoding='utf-8')
+    
+    def send(self, message):
+        self.file.write(
+            f"From: {Config.EMAIL_FROM}\nTo: {message['to']}\nSubject: {message['subject']}\n"
+            f"Date: {datetime.utcnow().isoformat()}\n\n{message['body']}\n\n{'-' * 40}\n"
+        )
+        self.file.flush()
+    
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+class SMTPBackend:
+    """Deliver messages over one SMTP connection per batch"""
+    
+    def __init__(self):
+        self.connection = None
+    
+    def open(self):
+        self.connection = smtplib.SMTP(Config.SMTP_HOST, Config.SMTP_PORT, timeout=Config.SMTP_TIMEOUT)
+        if Config.SMTP_USE_TLS:
+            self.connection.starttls()
+        if Config.SMTP_USERNAME:
+            self.connection.login(Config.SMTP_USERNAME, Config.SMTP_PASSWORD)
+    
+    def send(self, message):
+        email = EmailMessage()
+        email['From'] = Config.EMAIL_FROM
+        email['To'] = message['to']
+        email['Subject'] = message['subject']
+        email.set_content(message['body'])
+        self.connection.send_message(email)
+    
+    def close(self):
+        if self.connection:
+            try:
+                self.connection.quit()
+            except smtplib.SMTPException:
+                pass
+            self.connection = None
+
+def get_email_backend():
+    """Build the delivery backend selected by EMAIL_BACKEND"""
+    if Config.EMAIL_BACKEND == 'smtp':
+        return SMTPBackend()
+    if Config.EMAIL_BACKEND == 'file':
+        return FileBackend(Config.EMAIL_FILE_PATH)
+    return ConsoleBackend()
+
+def enqueue_email(to_email, subject, body):
+    """Queue a message in the outbox and wake the sender; delivery happens off the request"""
+    now = datetime.utcnow()
+    result = mongo.db.email_outbox.insert_one({
+        "to": to_email,
+        "subject": subject,
+        "body": body,
+        "status": "pending",
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now
+    })
+    _wake_event.set()
+    return result.inserted_id
+
+def _claim_batch(limit):
+    """Atomically mark due messages as sending, so concurrent senders never share one.
+
+    Each claim counts as an attempt, so a message whose sender keeps dying
+    mid-send still runs out of attempts instead of being reclaimed forever.
+    """
+    now = datetime.utcnow()
+    # Abandoned claims that already used their last attempt are not retried
+    mongo.db.email_outbox.update_many(
+        {"status": "sending", "claimed_at": {"$lt": now - CLAIM_TIMEOUT}, "attempts": {"$gte": Config.EMAIL_MAX_ATTEMPTS}},
+        {"$set": {"status": "failed", "last_error": "sender stopped before finishing"}, "$unset": {"claimed_at": ""}}
+    )
+    
+    batch = []
+    while len(batch) < limit:
+        message = mongo.db.email_outbox.find_one_and_update(
+            {"$or": [
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                {"status": "sending", "claimed_at": {"$lt": now - CLAIM_TIMEOUT}}
+            ]},
+            {"$set": {"status": "sending", "claimed_at": now}, "$inc": {"attempts": 1}},
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if not message:
+            break
+        batch.append(message)
+    return batch
+
+def _mark_failed(message, error):
+    # The claim already counted this attempt
+    attempts = message.get('attempts', 1)
+    update = {"attempts": attempts, "last_error": error}
+    if attempts >= Config.EMAIL_MAX_ATTEMPTS:
+        update['status'] = 'failed'
+    else:
+        update['status'] = 'pending'
+        update['next_attempt_at'] = datetime.utcnow() + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    mongo.db.email_outbox.update_one({"_id": message['_id']}, {"$set": update})
+
+def deliver_pending_emails():
+    """Send one batch of due outbox messages; returns how many were delivered"""
+    batch = _claim_batch(Config.EMAIL_OUTBOX_BATCH_SIZE)
+    if not batch:
+        return 0
+    
+    backend = get_email_backend()
+    try:
+        backend.open()
+    except Exception as e:
+        # Connection failures count against every message in the batch
+        for message in batch:
+            _mark_failed(message, f"connect: {str(e)}")
+        return 0
+    
+    delivered = 0
+    try:
+        for message in batch:
+            try:
+                backend.send(message)
+            except Exception as e:
+                _mark_failed(message, str(e))
+                continue
+            mongo.db.email_outbox.update_one(
+                {"_id": message['_id']},
+                {"$set": {"status": "sent", "sent_at": datetime.utcnow()}, "$unset": {"claimed_at": ""}}
+            )
+            delivered += 1
+    finally:
+        backend.close()
+    
+    return delivered
+
+def _sender_loop():
+    while True:
+        _wake_event.wait(Config.EMAIL_OUTBOX_POLL_SECONDS)
+        _wake_event.clear()
+        try:
+            # Drain full batches before going back to sleep
+            while deliver_pending_emails() >= Config.EMAIL_OUTBOX_BATCH_SIZE:
+                pass
+        except Exception as e:
+            logger.exception("Email sender error: %s", e)
+            time.sleep(Config.EMAIL_OUTBOX_POLL_SECONDS)
+
+def start_email_sender():
+    """Start the outbox sender thread once per process"""
+    global _sender_thread
+    if not Config.EMAIL_SENDER_ENABLED:
+        return
+    with _sender_lock:
+        if _sender_thread is None:
+            _sender_thread = threading.Thread(target=_sender_loop, name='villagestay-email', daemon=True)
+            _sender_thread.start()
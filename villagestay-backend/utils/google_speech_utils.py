@@ -5,20 +5,25 @@ import os
 from google.cloud import speech
 from pydub import AudioSegment
 from config import Config
+from utils.metrics_utils import track_upstream
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Initialize Google Speech client
 speech_client = None
 try:
     if Config.GOOGLE_APPLICATION_CREDENTIALS and Config.GOOGLE_CLOUD_PROJECT_ID:
         speech_client = speech.SpeechClient()
-        print("✅ Google Speech-to-Text client initialized successfully")
+        logger.info("Google Speech-to-Text client initialized")
     else:
-        print("❌ Google Cloud credentials not configured")
-        print(f"Project ID: {Config.GOOGLE_CLOUD_PROJECT_ID}")
-        print(f"Credentials path: {Config.GOOGLE_APPLICATION_CREDENTIALS}")
+        logger.warning(
+            "Google Cloud credentials not configured",
+            extra={"project_id": Config.GOOGLE_CLOUD_PROJECT_ID, "credentials_path": Config.GOOGLE_APPLICATION_CREDENTIALS}
+        )
 except Exception as e:
-    print(f"❌ Failed to initialize Google Speech client: {e}")
+    logger.error("Failed to initialize Google Speech client: %s", e)
 
 def transcribe_audio_google_speech(audio_data, language="auto"):
     """
@@ -29,26 +34,20 @@ def transcribe_audio_google_speech(audio_data, language="auto"):
         raise Exception("Google Speech-to-Text client not initialized. Check credentials.")
     
     try:
-        print(f"🎵 Starting Google Speech-to-Text transcription for language: {language}")
-        
         # Decode base64 audio data if needed
         if isinstance(audio_data, str):
             try:
                 audio_bytes = base64.b64decode(audio_data)
-                print(f"🔄 Decoded base64 audio: {len(audio_bytes)} bytes")
             except Exception as decode_error:
                 raise Exception(f"Failed to decode base64 audio: {decode_error}")
         else:
             audio_bytes = audio_data
         
-        print(f"🎵 Processing {len(audio_bytes)} bytes of audio data")
-        
         # Convert audio to proper format for Google Speech API
         audio_content = convert_audio_for_google_speech(audio_bytes)
         
         # Map language codes for Google Speech API
         google_language = get_google_language_code(language)
-        print(f"🌍 Mapped language {language} to Google code: {google_language}")
         
         # Configure recognition
         config = speech.RecognitionConfig(
@@ -63,12 +62,14 @@ def transcribe_audio_google_speech(audio_data, language="auto"):
         # Create audio object
         audio = speech.RecognitionAudio(content=audio_content)
         
-        print(f"🎤 Calling Google Speech-to-Text API")
-        print(f"🌍 Language: {google_language}")
-        print(f"📁 Audio size: {len(audio_content)} bytes")
+        logger.debug(
+            "Calling Google Speech-to-Text",
+            extra={"language": google_language, "audio_bytes": len(audio_content), "input_bytes": len(audio_bytes)}
+        )
         
         # Perform the transcription
-        response = speech_client.recognize(config=config, audio=audio)
+        with track_upstream('google_speech'):
+            response = speech_client.recognize(config=config, audio=audio)
         
         if not response.results:
             raise Exception("Google Speech API returned no transcription results")
@@ -86,10 +87,6 @@ def transcribe_audio_google_speech(audio_data, language="auto"):
         transcribed_text = transcribed_text.strip()
         avg_confidence = sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0.0
         
-        print(f"✅ Google Speech transcription successful!")
-        print(f"📝 Result: {transcribed_text}")
-        print(f"🎯 Confidence: {avg_confidence:.2f}")
-        
         # Verify we got actual transcription
         if not transcribed_text or len(transcribed_text.strip()) == 0:
             raise Exception("Google Speech API returned empty transcription")
@@ -101,7 +98,7 @@ def transcribe_audio_google_speech(audio_data, language="auto"):
         }
         
     except Exception as e:
-        print(f"❌ Google Speech transcription error: {e}")
+        logger.warning("Google Speech transcription error: %s", e)
         raise Exception(f"Google Speech transcription failed: {str(e)}")
 
 def convert_audio_for_google_speech(audio_bytes):
@@ -132,11 +129,10 @@ def convert_audio_for_google_speech(audio_bytes):
                 os.unlink(temp_input.name)
                 os.unlink(temp_output.name)
                 
-                print(f"🔄 Converted audio: {len(converted_audio)} bytes")
                 return converted_audio
                 
     except Exception as e:
-        print(f"❌ Audio conversion error: {e}")
+        logger.warning("Audio conversion error: %s", e)
         raise Exception(f"Failed to convert audio for Google Speech API: {str(e)}")
 
 def get_google_language_code(language):
@@ -163,7 +159,8 @@ def enhance_listing_with_gemini(transcribed_text, language):
     Use Gemini API to enhance the transcribed text into a professional listing
     """
     try:
-        from utils.ai_utils import call_gemini_api
+        from utils.ai_utils import call_gemini_api, LISTING_ENHANCEMENT_SCHEMA
+        from utils.json_utils import extract_json
         
         system_prompt = f"""
         A host has described their rural property in {language}. Create a professional listing from this description:
@@ -197,53 +194,33 @@ def enhance_listing_with_gemini(transcribed_text, language):
         }}
         """
 
-        print("🤖 Enhancing listing with Gemini API...")
-        
         response = call_gemini_api(system_prompt)
         
-        print(f"✅ Gemini enhancement successful")
-        print(f"📝 Response: {response[:200]}...")
-        
         # Extract JSON from response
-        import re
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group())
-        else:
-            raise Exception("No valid JSON found in Gemini response")
+        return extract_json(response, LISTING_ENHANCEMENT_SCHEMA)
             
     except Exception as e:
-        print(f"❌ Gemini enhancement error: {e}")
+        logger.warning("Gemini enhancement error: %s", e)
         raise Exception(f"Failed to enhance listing with Gemini: {str(e)}")
 
 def test_google_speech_setup():
     """Test Google Speech-to-Text setup"""
-    print("🧪 Testing Google Speech-to-Text setup...")
-    
     # Test client initialization
-    if speech_client:
-        print("✅ Google Speech client available")
-    else:
-        print("❌ Google Speech client not available")
+    if not speech_client:
+        logger.warning("Google Speech client not available")
         return False
     
     # Test credentials
-    if Config.GOOGLE_APPLICATION_CREDENTIALS:
-        print(f"✅ Google credentials path: {Config.GOOGLE_APPLICATION_CREDENTIALS}")
-        if os.path.exists(Config.GOOGLE_APPLICATION_CREDENTIALS):
-            print("✅ Credentials file exists")
-        else:
-            print("❌ Credentials file not found")
-            return False
-    else:
-        print("❌ Google credentials path not configured")
+    if not Config.GOOGLE_APPLICATION_CREDENTIALS:
+        logger.warning("Google credentials path not configured")
+        return False
+    if not os.path.exists(Config.GOOGLE_APPLICATION_CREDENTIALS):
+        logger.warning("Google credentials file not found: %s", Config.GOOGLE_APPLICATION_CREDENTIALS)
         return False
     
-    if Config.GOOGLE_CLOUD_PROJECT_ID:
-        print(f"✅ Google project ID: {Config.GOOGLE_CLOUD_PROJECT_ID}")
-    else:
-        print("❌ Google project ID not configured")
+    if not Config.GOOGLE_CLOUD_PROJECT_ID:
+        logger.warning("Google project ID not configured")
         return False
     
-    print("✅ Google Speech-to-Text setup ready!")
+    logger.info("Google Speech-to-Text setup ready", extra={"project_id": Config.GOOGLE_CLOUD_PROJECT_ID})
     return True
\ No newline at end of file
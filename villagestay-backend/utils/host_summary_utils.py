@@ -0,0 +1,78 @@
+from datetime import datetime
+from bson import ObjectId
+from database import mongo
+from utils.background_utils import run_in_background
+from utils.cache_utils import invalidate_listing_cache
+
+# User fields copied onto each listing's host_summary
+HOST_SUMMARY_FIELDS = {'full_name', 'profile_image'}
+
+def build_host_summary(user):
+    """Build the host sub-document embedded on listings"""
+    return {
+        "full_name": user['full_name'],
+        "profile_image": user.get('profile_image'),
+        "member_since": user.get('created_at')
+    }
+
+def format_host_summary(listing, summary=None, include_member_since=False):
+    """Format a listing's embedded host summary for responses"""
+    summary = summary or listing.get('host_summary')
+    if not summary:
+        return None
+    
+    host = {
+        "id": str(listing['host_id']),
+        "full_name": summary['full_name'],
+        "profile_image": summary.get('profile_image')
+    }
+    if include_member_since:
+        member_since = summary.get('member_since')
+        host['created_at'] = member_since.isoformat() if member_since else None
+    return host
+
+def refresh_host_summaries(host_id):
+    """Fan a host's current name and avatar out to all of their listings"""
+    host = mongo.db.users.find_one(
+        {"_id": ObjectId(host_id)},
+        {"full_name": 1, "profile_image": 1, "created_at": 1}
+    )
+    if not host:
+        return 0
+    
+    result = mongo.db.listings.update_many(
+        {"host_id": host['_id']},
+        {"$set": {"host_summary": build_host_summary(host), "updated_at": datetime.utcnow()}}
+    )
+    
+    if result.modified_count:
+        invalidate_listing_cache(all_details=True)
+    
+    return result.modified_count
+
+def schedule_host_summary_refresh(host_id):
+    """Refresh embedded host summaries off the request thread"""
+    return run_in_background(refresh_host_summaries, host_id)
+
+def load_missing_host_summaries(listings):
+    """Resolve summaries for listings written before host_summary existed.
+
+    Uses a single batched users query and schedules a backfill so the
+    next read of the same listings needs no lookup at all.
+    """
+    missing_host_ids = list({
+        listing['host_id'] for listing in listings if not listing.get('host_summary')
+    })
+    if not missing_host_ids:
+        return {}
+    
+    hosts = mongo.db.users.find(
+        {"_id": {"$in": missing_host_ids}},
+        {"full_name": 1, "profile_image": 1, "created_at": 1}
+    )
+    summaries = {host['_id']: build_host_summary(host) for host in hosts}
+    
+    for host_id in summaries:
+        schedule_host_summary_refresh(host_id)
+    
+    return summaries
@@ -0,0 +1,252 @@
+import json
+import re
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+class JSONExtractionError(ValueError):
+    """Raised when no JSON value matching the expected shape can be found"""
+
+_OPENER_RE = re.compile(r"[{\[]")
+# Inside a candidate only strings and brackets matter. A string is skipped whole;
+# group 1 is its closing quote, missing when the output was cut off mid-string
+_STRUCTURE_RE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*(")?|[{}\[\]]')
+_CLOSERS = {'{': '}', '[': ']'}
+_decoder = json.JSONDecoder()
+
+_TYPES = {
+    'object': dict,
+    'array': list,
+    'string': str,
+    'integer': int,
+    'number': (int, float),
+    'boolean': bool
+}
+
+def validate_schema(value, schema, path='$'):
+    """Check a value against a small JSON Schema subset (type, properties,
+    required, items, enum). Gemini's upper-case type names are accepted too.
+    Raises JSONExtractionError naming the first mismatch.
+    """
+    expected = schema.get('type', '').lower()
+    if expected:
+        python_type = _TYPES[expected]
+        # bool is an int subclass, but never a valid number here
+        if not isinstance(value, python_type) or (expected in ('integer', 'number') and isinstance(value, bool)):
+            raise JSONExtractionError(f"{path}: expected {expected}, got {type(value).__name__}")
+    
+    if 'enum' in schema and value not in schema['enum']:
+        raise JSONExtractionError(f"{path}: {value!r} is not one of {schema['enum']}")
+    
+    if isinstance(value, dict):
+        for key in schema.get('required', []):
+            if key not in value:
+                raise JSONExtractionError(f"{path}: missing required field '{key}'")
+        for key, property_schema in schema.get('properties', {}).items():
+            if key in value:
+                validate_schema(value[key], property_schema, f"{path}.{key}")
+    elif isinstance(value, list) and 'items' in schema:
+        for index, item in enumerate(value):
+            validate_schema(item, schema['items'], f"{path}[{index}]")
+    return value
+
+def iter_fenced_blocks(text):
+    """Yield the contents of each ``` code fence, dropping a json language tag"""
+    position = 0
+    while True:
+        start = text.find('```', position)
+        if start == -1:
+            return
+        end = text.find('```', start + 3)
+        if end == -1:
+            return
+        block = text[start + 3:end]
+        newline = block.find('\n')
+        if newline != -1 and block[:newline].strip().lower() in ('', 'json'):
+            block = block[newline + 1:]
+        yield block.strip()
+        position = end + 3
+
+def find_span_end(text, start, end=None):
+    """Index just past the bracket closing the one at ``start``.
+
+    Brackets inside JSON strings are ignored and escapes are honoured.
+    Returns -1 when a wrong bracket closes the span, and None when the text
+    ends first (truncated output).
+    """
+    end = len(text) if end is None else end
+    expected = [_CLOSERS[text[start]]]
+    for token in _STRUCTURE_RE.finditer(text, start + 1, end):
+        char = token.group()[0]
+        if char == '"':
+            if token.group(1) is None:
+                return None
+        elif char in _CLOSERS:
+            expected.append(_CLOSERS[char])
+        elif char != expected.pop():
+            return -1
+        elif not expected:
+            return token.end()
+    return None
+
+def iter_json_values(text, start=0, end=None):
+    """Yield each top-level JSON object or array embedded in text, in order.
+
+    Each opening bracket goes to the C decoder first, which parses a valid
+    value in one pass. When that fails, find_span_end skips the whole
+    bracketed span, so a broken candidate is scanned once rather than
+    re-decoded from every bracket inside it; its contents are searched for
+    nested values, and text left open at the end (truncated output) stops
+    the search.
+    """
+    end = len(text) if end is None else end
+    position = start
+    while True:
+        opener = _OPENER_RE.search(text, position, end)
+        if not opener:
+            return
+        try:
+            value, value_end = _decoder.raw_decode(text, opener.start())
+            if value_end <= end:
+                yield value
+                position = value_end
+                continue
+        except ValueError:
+            pass
+        
+        span_end = find_span_end(text, opener.start(), end)
+        if span_end is None:
+            return
+        if span_end == -1:
+            position = opener.start() + 1
+            continue
+        # Placeholder braces in prose, or JSON wrapped in non-JSON brackets
+        yield from iter_json_values(text, opener.start() + 1, span_end - 1)
+        position = span_end
+
+def extract_json(text, schema=None):
+    """Extract the first JSON value in a model reply that matches ``schema``.
+
+    Tries, in order: the whole text, the contents of ``` code fences, then
+    each object or array embedded in the surrounding prose.
+    """
+    if not isinstance(text, str):
+        raise JSONExtractionError("Response is not text")
+    
+    def candidates():
+        stripped = text.strip()
+        if stripped[:1] in ('{', '['):
+            try:
+                yield json.loads(stripped)
+            except ValueError:
+                pass
+        for block in iter_fenced_blocks(text):
+            if block[:1] in ('{', '['):
+                try:
+                    yield json.loads(block)
+                except ValueError:
+                    pass
+        yield from iter_json_values(text)
+    
+    last_error = None
+    for value in candidates():
+        if schema is None:
+            return value
+        try:
+            return validate_schema(value, schema)
+        except JSONExtractionError as e:
+            last_error = e
+    
+    raise JSONExtractionError(f"No valid JSON found in response{f': {last_error}' if last_error else ''}")
+
+class StreamingJSONField:
+    """Decode one top-level string field of a JSON object while it streams in.
+
+    feed() takes raw chunks as they arrive and returns the newly decoded
+    characters of ``field``, so a reply can be relayed before the object is
+    complete. Escapes split across chunks are handled; text() returns
+    everything fed so far once the stream ends.
+    """
+
+    def __init__(self, field):
+        self.field = field
+        self.raw = []
+        self.depth = 0
+        self.in_string = False
+        self.escape = None  # None, '' right after a backslash, or 'u' plus hex digits so far
+        self.high_surrogate = None
+        self.expect_key = False
+        self.expect_value = False
+        self.reading_key = False
+        self.key_chars = []
+        self.last_key = None
+        self.capturing = False
+
+    def _emit(self, text, out):
+        if self.reading_key:
+            self.key_chars.append(text)
+        elif self.capturing:
+            out.append(text)
+
+    def _emit_code_point(self, code, out):
+        if 0xD800 <= code < 0xDC00:
+            self.high_surrogate = code
+            return
+        if 0xDC00 <= code < 0xE000 and self.high_surrogate is not None:
+            code = 0x10000 + ((self.high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self.high_surrogate = None
+        self._emit(chr(code), out)
+
+    def feed(self, chunk):
+        self.raw.append(chunk)
+        out = []
+        for char in chunk:
+            if self.in_string:
+                if self.escape is not None:
+                    if self.escape == '' and char != 'u':
+                        self.escape = None
+                        self._emit(_ESCAPES.get(char, char), out)
+                    else:
+                        self.escape += char
+                        if len(self.escape) == 5:
+                            code = int(self.escape[1:], 16)
+                            self.escape = None
+                            self._emit_code_point(code, out)
+                elif char == '\\':
+                    self.escape = ''
+                elif char == '"':
+                    self.in_string = False
+                    if self.reading_key:
+                        self.reading_key = False
+                        self.expect_key = False
+                        self.last_key = ''.join(self.key_chars)
+                    self.capturing = False
+                else:
+                    self._emit(char, out)
+                continue
+
+            if char == '"':
+                self.in_string = True
+                if self.depth == 1 and self.expect_key:
+                    self.reading_key = True
+                    self.key_chars = []
+                elif self.depth == 1 and self.expect_value and self.last_key == self.field:
+                    self.capturing = True
+                self.expect_value = False
+            elif char in '{[':
+                self.depth += 1
+                self.expect_key = self.depth == 1 and char == '{'
+                self.expect_value = False
+            elif char in '}]':
+                self.depth -= 1
+            elif self.depth == 1 and char == ':':
+                self.expect_value = True
+            elif self.depth == 1 and char == ',':
+                self.expect_key = True
+                self.expect_value = False
+            elif not char.isspace():
+                self.expect_value = False
+        return ''.join(out)
+
+    def text(self):
+        """Everything fed so far"""
+        return ''.join(self.raw)
@@ -0,0 +1,268 @@
+import heapq
+import math
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from config import Config
+from database import mongo
+from utils.background_utils import run_in_background
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# Relative drift of the average document length before every norm is recomputed
+NORM_TOLERANCE = 0.05
+
+# Listing fields that are tokenized into the index, with their weights
+FIELD_WEIGHTS = {
+    'title': 3,
+    'location': 2,
+    'property_type': 1,
+    'description': 1,
+    'amenities': 1,
+    'sustainability_features': 1,
+    'experiences': 1
+}
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'for', 'from', 'i', 'in',
+    'is', 'it', 'me', 'my', 'of', 'on', 'or', 'some', 'the', 'to', 'want', 'we', 'what',
+    'where', 'with', 'would', 'you', 'like', 'looking', 'find', 'show', 'please'
+}
+
+INDEX_PROJECTION = {field: 1 for field in FIELD_WEIGHTS}
+INDEX_PROJECTION.update({"is_active": 1, "is_approved": 1, "updated_at": 1})
+
+RESULT_PROJECTION = {
+    "title": 1, "location": 1, "price_per_night": 1, "rating": 1,
+    "images": {"$slice": 1}, "is_active": 1, "is_approved": 1
+}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def _normalize(token):
+    # Fold simple plurals so "villages" matches "village"
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords or single characters"""
+    return [
+        _normalize(token) for token in _TOKEN_RE.findall(text.lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+def _field_text(value):
+    if isinstance(value, (list, tuple)):
+        return ' '.join(_field_text(item) for item in value)
+    if isinstance(value, dict):
+        return ' '.join(str(value.get(key, '')) for key in ('title', 'description', 'category'))
+    return str(value or '')
+
+class ListingIndex:
+    """BM25 index over active, approved listings, kept in memory per process"""
+    
+    def __init__(self):
+        self.doc_terms = {}  # listing_id -> Counter of weighted term frequencies
+        self.doc_lengths = {}
+        self.doc_norms = {}  # listing_id -> BM25 length normalization against norm_average
+        self.norm_average = 0  # average document length the norms were computed with
+        self.postings = {}  # term -> {listing_id: term frequency}
+        self.total_length = 0
+        self.watermark = None  # newest updated_at already indexed
+        self.synced_at = 0
+        self.sync_scheduled = False
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.schedule_lock = threading.Lock()
+    
+    def _remove(self, listing_id):
+        terms = self.doc_terms.pop(listing_id, None)
+        if terms is None:
+            return
+        self.total_length -= self.doc_lengths.pop(listing_id)
+        self.doc_norms.pop(listing_id, None)
+        for term in terms:
+            posting = self.postings[term]
+            del posting[listing_id]
+            if not posting:
+                del self.postings[term]
+    
+    def _add(self, listing_id, terms):
+        self.doc_terms[listing_id] = terms
+        length = sum(terms.values())
+        self.doc_lengths[listing_id] = length
+        self.total_length += length
+        for term, frequency in terms.items():
+            self.postings.setdefault(term, {})[listing_id] = frequency
+    
+    def _norm(self, length):
+        return K1 * (1 - B + B * length / self.norm_average)
+    
+    def _refresh_norms(self, changed_ids):
+        if not self.doc_lengths:
+            self.doc_norms = {}
+            self.norm_average = 0
+            return
+        
+        average_length = self.total_length / len(self.doc_lengths)
+        if not self.norm_average or abs(average_length - self.norm_average) > NORM_TOLERANCE * self.norm_average:
+            # Lengths are normalized against the average, so a real shift moves every norm
+            self.norm_average = average_length
+            self.doc_norms = {listing_id: self._norm(length) for listing_id, length in self.doc_lengths.items()}
+        else:
+            for listing_id in changed_ids:
+                self.doc_norms[listing_id] = self._norm(self.doc_lengths[listing_id])
+    
+    def apply(self, listings, experiences_by_listing):
+        """Index active, approved listings and drop the rest"""
+        if not listings:
+            return
+        
+        with self.lock:
+            changed_ids = []
+            for listing in listings:
+                listing_id = listing['_id']
+                self._remove(listing_id)
+                if not (listing.get('is_active') and listing.get('is_approved')):
+                    continue
+                
+                terms = Counter()
+                for field, weight in FIELD_WEIGHTS.items():
+                    value = listing.get(field)
+                    if field == 'experiences':
+                        value = (value or []) + experiences_by_listing.get(listing_id, [])
+                    for token in tokenize(_field_text(value)):
+                        terms[token] += weight
+                self._add(listing_id, terms)
+                changed_ids.append(listing_id)
+            
+            self._refresh_norms(changed_ids)
+    
+    def search(self, query, limit):
+        """Return [(listing_id, score)] for the best BM25 matches"""
+        query_terms = set(tokenize(query))
+        with self.lock:
+            count = len(self.doc_terms)
+            if not count or not query_terms:
+                return []
+            norms = self.doc_norms
+            scores = {}
+            for term in query_terms:
+                posting = self.postings.get(term)
+                if not posting:
+                    continue
+                weight = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5)) * (K1 + 1)
+                for listing_id, frequency in posting.items():
+                    scores[listing_id] = scores.get(listing_id, 0) + weight * frequency / (frequency + norms[listing_id])
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+_index = ListingIndex()
+
+def _load_experiences(listing_ids):
+    experiences = {}
+    if not listing_ids:
+        return experiences
+    for experience in mongo.db.experiences.find(
+        {"listing_id": {"$in": listing_ids}},
+        {"listing_id": 1, "title": 1, "description": 1, "category": 1}
+    ):
+        experiences.setdefault(experience['listing_id'], []).append(experience)
+    return experiences
+
+def sync_listing_index(force=False):
+    """Bring the index up to date with listings written since the last sync.
+
+    The first sync indexes every live listing; later ones read only listings
+    whose updated_at is at or past the watermark less a safety overlap, so a
+    sync with few writes costs one indexed query. The overlap catches writes
+    stamped by another process's clock that commit after a sync has moved
+    past their timestamp; re-indexing a listing is idempotent.
+    """
+    index = _index
+    if not force and time.monotonic() - index.synced_at < Config.LISTING_INDEX_SYNC_SECONDS:
+        return
+    
+    with index.sync_lock:
+        if not force and time.monotonic() - index.synced_at < Config.LISTING_INDEX_SYNC_SECONDS:
+            return
+        started_at = time.monotonic()
+        
+        if index.watermark is None:
+            query = {"is_active": True, "is_approved": True}
+        else:
+            overlap = timedelta(seconds=Config.LISTING_INDEX_SYNC_OVERLAP_SECONDS)
+            since = index.watermark - overlap if index.watermark - datetime.min > overlap else datetime.min
+            query = {"updated_at": {"$gte": since}}
+        
+        listings = list(mongo.db.listings.find(query, INDEX_PROJECTION))
+        index.apply(listings, _load_experiences([listing['_id'] for listing in listings]))
+        
+        timestamps = [listing['updated_at'] for listing in listings if isinstance(listing.get('updated_at'), datetime)]
+        if timestamps:
+            index.watermark = max([index.watermark or timestamps[0]] + timestamps)
+        elif index.watermark is None:
+            index.watermark = datetime.min
+        index.synced_at = started_at
+
+def _background_sync():
+    try:
+        sync_listing_index()
+    finally:
+        _index.sync_scheduled = False
+
+def schedule_listing_index_sync():
+    """Start a background sync when the index is due one, without waiting for it"""
+    index = _index
+    if index.sync_scheduled or time.monotonic() - index.synced_at < Config.LISTING_INDEX_SYNC_SECONDS:
+        return
+    with index.schedule_lock:
+        if index.sync_scheduled:
+            return
+        index.sync_scheduled = True
+    run_in_background(_background_sync)
+
+def search_listings(query, limit=None):
+    """Find live listings matching free text, best first, with display fields"""
+    limit = limit or Config.CONCIERGE_LISTING_RESULTS
+    if _index.watermark is None:
+        # Nothing indexed yet; the first build has to finish before searching
+        sync_listing_index()
+    else:
+        # Later syncs run off the request, so searches see at most one interval of staleness
+        schedule_listing_index_sync()
+    
+    # Over-fetch so listings deactivated since the last sync can be skipped
+    matches = _index.search(query, limit * 2)
+    if not matches:
+        return []
+    
+    listings = {
+        listing['_id']: listing
+        for listing in mongo.db.listings.find(
+            {"_id": {"$in": [listing_id for listing_id, _ in matches]}},
+            RESULT_PROJECTION
+        )
+    }
+    
+    top_score = matches[0][1]
+    results = []
+    for listing_id, score in matches:
+        listing = listings.get(listing_id)
+        if not listing or not (listing.get('is_active') and listing.get('is_approved')):
+            continue
+        results.append({
+            "id": str(listing_id),
+            "title": listing['title'],
+            "location": listing['location'],
+            "price_per_night": listing.get('price_per_night'),
+            "rating": listing.get('rating', 0),
+            "image": listing['images'][0] if listing.get('images') else None,
+            "match_score": round(score / top_score, 2)
+        })
+        if len(results) == limit:
+            break
+    return results
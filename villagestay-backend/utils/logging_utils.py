@@ -0,0 +1,123 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask import has_request_context, request
+from config import Config
+
+# Attributes every LogRecord has; anything else was passed through extra= and is emitted as a field
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+_listener = None
+_configure_lock = threading.Lock()
+
+def parse_sample_rates(spec):
+    """Parse "routes.bookings=0.1,utils.ai_utils=0.5" into {logger prefix: keep rate}"""
+    rates = {}
+    for item in (spec or '').split(','):
+        name, _, rate = item.partition('=')
+        if name.strip() and rate.strip():
+            rates[name.strip()] = float(rate)
+    return rates
+
+class SamplingFilter(logging.Filter):
+    """Keep a configured share of DEBUG/INFO records per logger prefix; warnings always pass"""
+    
+    def __init__(self, rates):
+        super().__init__()
+        # Longest prefix wins, so a module rate overrides its package's
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+    
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + '.'):
+                return random.random() < rate
+        return True
+
+class RequestContextFilter(logging.Filter):
+    """Tag records logged while handling a request with its method and path"""
+    
+    def filter(self, record):
+        if has_request_context():
+            record.method = request.method
+            record.path = request.path
+        return True
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hand records to the writer thread; drop them rather than block when it falls behind"""
+    
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def prepare(self, record):
+        # Only the message interpolation happens on the caller's thread;
+        # formatting and the write happen on the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+    
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line"""
+    
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "thread": record.threadName
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+def configure_logging():
+    """Route all logging through a bounded queue to a background stdout writer (idempotent)"""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+        
+        stream_handler = logging.StreamHandler(sys.stdout)
+        if Config.LOG_FORMAT == 'json':
+            stream_handler.setFormatter(JSONFormatter())
+        else:
+            stream_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+        
+        log_queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+        queue_handler = NonBlockingQueueHandler(log_queue)
+        queue_handler.addFilter(SamplingFilter(parse_sample_rates(Config.LOG_SAMPLE_RATES)))
+        queue_handler.addFilter(RequestContextFilter())
+        
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(Config.LOG_LEVEL)
+        
+        _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        # Flush what is still queued when the process exits
+        atexit.register(_listener.stop)
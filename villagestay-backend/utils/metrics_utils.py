@@ -0,0 +1,261 @@
+import hmac
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, request, Response
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from pymongo import monitoring
+from config import Config
+from utils.auth_utils import get_current_user_type
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+# Per-thread totals for the request being handled; commands run on the calling thread
+_request_stats = threading.local()
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic count per label set"""
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for label_values, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_number(value)}")
+        return lines
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label set"""
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}  # label values -> [bucket counts..., sum, count]
+        self.lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for label_values, series in sorted(self.series.items()):
+                for bound, count in zip(self.buckets, series):
+                    bucket_labels = _format_labels(self.labels, label_values, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+                bucket_labels = _format_labels(self.labels, label_values, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, label_values)} {_format_number(series[-2])}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, label_values)} {series[-1]}")
+        return lines
+
+class Gauge:
+    """Point-in-time values read by a callback at scrape time"""
+
+    def __init__(self, name, help_text, labels, collect):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.collect = collect  # () -> {label values: value}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for label_values, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_number(value)}")
+        return lines
+
+def _breaker_states():
+    from utils.circuit_breaker_utils import get_breaker_states
+    levels = {'closed': 0, 'half_open': 1, 'open': 2}
+    return {(name,): levels[state['state']] for name, state in get_breaker_states().items()}
+
+http_requests = Counter(
+    'villagestay_http_requests_total', 'HTTP requests handled',
+    ('method', 'endpoint', 'status')
+)
+http_latency = Histogram(
+    'villagestay_http_request_duration_seconds', 'HTTP request latency',
+    ('method', 'endpoint')
+)
+request_mongo_commands = Histogram(
+    'villagestay_http_request_mongo_commands', 'MongoDB commands issued per HTTP request',
+    ('method', 'endpoint'), buckets=COUNT_BUCKETS
+)
+request_mongo_time = Histogram(
+    'villagestay_http_request_mongo_seconds', 'Time spent in MongoDB per HTTP request',
+    ('method', 'endpoint')
+)
+request_upstream_time = Histogram(
+    'villagestay_http_request_upstream_seconds', 'Time spent waiting on AI upstreams per HTTP request',
+    ('method', 'endpoint')
+)
+mongo_commands = Counter(
+    'villagestay_mongo_commands_total', 'MongoDB commands by outcome',
+    ('command', 'collection', 'outcome')
+)
+mongo_latency = Histogram(
+    'villagestay_mongo_command_duration_seconds', 'MongoDB command latency',
+    ('command', 'collection')
+)
+upstream_latency = Histogram(
+    'villagestay_upstream_call_duration_seconds', 'AI upstream call latency',
+    ('service', 'outcome')
+)
+breaker_state = Gauge(
+    'villagestay_circuit_breaker_state', 'Circuit breaker state (0 closed, 1 half open, 2 open)',
+    ('name',), _breaker_states
+)
+
+METRICS = [
+    http_requests, http_latency, request_mongo_commands, request_mongo_time,
+    request_upstream_time, mongo_commands, mongo_latency, upstream_latency, breaker_state
+]
+
+def _current_stats():
+    return getattr(_request_stats, 'current', None)
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Count and time every MongoDB command, globally and for the current request"""
+
+    def __init__(self):
+        self.pending = {}  # (connection, request id) -> collection
+        self.lock = threading.Lock()
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = ''
+        with self.lock:
+            self.pending[(event.connection_id, event.request_id)] = collection
+
+    def _finish(self, event, outcome):
+        with self.lock:
+            collection = self.pending.pop((event.connection_id, event.request_id), '')
+        seconds = event.duration_micros / 1e6
+        mongo_commands.inc(event.command_name, collection, outcome)
+        mongo_latency.observe(seconds, event.command_name, collection)
+        stats = _current_stats()
+        if stats is not None:
+            stats['mongo_commands'] += 1
+            stats['mongo_seconds'] += seconds
+
+    def succeeded(self, event):
+        self._finish(event, 'success')
+
+    def failed(self, event):
+        self._finish(event, 'failure')
+
+@contextmanager
+def track_upstream(service):
+    """Time a call to an AI upstream, globally and for the current request"""
+    started = time.perf_counter()
+    outcome = 'failure'
+    try:
+        yield
+        outcome = 'success'
+    finally:
+        seconds = time.perf_counter() - started
+        upstream_latency.observe(seconds, service, outcome)
+        stats = _current_stats()
+        if stats is not None:
+            stats['upstream_seconds'] += seconds
+
+def get_request_stats():
+    """Commands, Mongo time and upstream time recorded so far for this request"""
+    return dict(_current_stats() or {})
+
+def _endpoint_label():
+    # Route templates keep label cardinality bounded
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+def _start_request():
+    _request_stats.current = {"mongo_commands": 0, "mongo_seconds": 0.0, "upstream_seconds": 0.0}
+    g.request_started_at = time.perf_counter()
+
+def _finish_request(response):
+    stats = _current_stats()
+    started_at = g.pop('request_started_at', None)
+    if stats is None or started_at is None:
+        return response
+
+    method = request.method
+    endpoint = _endpoint_label()
+    http_requests.inc(method, endpoint, str(response.status_code))
+    http_latency.observe(time.perf_counter() - started_at, method, endpoint)
+    request_mongo_commands.observe(stats['mongo_commands'], method, endpoint)
+    request_mongo_time.observe(stats['mongo_seconds'], method, endpoint)
+    request_upstream_time.observe(stats['upstream_seconds'], method, endpoint)
+
+    if Config.METRICS_DEBUG_HEADERS:
+        response.headers['X-Mongo-Commands'] = str(stats['mongo_commands'])
+        response.headers['X-Mongo-Time-Ms'] = f"{stats['mongo_seconds'] * 1000:.1f}"
+    _request_stats.current = None
+    return response
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+def _metrics_authorized():
+    if Config.METRICS_PUBLIC:
+        return True
+    if Config.METRICS_TOKEN and hmac.compare_digest(
+        request.headers.get('Authorization', '').encode('utf-8'), f"Bearer {Config.METRICS_TOKEN}".encode('utf-8')
+    ):
+        return True
+    # Without a matching scrape token only admins may read the metrics
+    try:
+        verify_jwt_in_request(optional=True)
+    except Exception:
+        return False
+    return bool(get_jwt_identity()) and get_current_user_type() == 'admin'
+
+def init_metrics(app):
+    """Register request instrumentation and the /metrics endpoint"""
+    if not Config.METRICS_ENABLED:
+        return
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+    @app.route('/metrics')
+    def metrics():
+        if not _metrics_authorized():
+            return Response("Unauthorized\n", status=401, mimetype='text/plain')
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,65 @@
+import bcrypt
+from werkzeug.security import generate_password_hash, check_password_hash
+from config import Config
+from database import mongo
+
+# bcrypt only reads the first 72 bytes of a password
+BCRYPT_MAX_BYTES = 72
+
+def _bcrypt_bytes(password):
+    return password.encode('utf-8')[:BCRYPT_MAX_BYTES]
+
+def _hash(password):
+    if Config.PASSWORD_HASH_SCHEME == 'bcrypt':
+        salt = bcrypt.gensalt(rounds=Config.PASSWORD_BCRYPT_ROUNDS)
+        return bcrypt.hashpw(_bcrypt_bytes(password), salt).decode('utf-8')
+    if Config.PASSWORD_HASH_SCHEME == 'pbkdf2':
+        return generate_password_hash(
+            password,
+            method=f"pbkdf2:sha256:{Config.PASSWORD_PBKDF2_ITERATIONS}"
+        )
+    raise ValueError(f"Unsupported password hash scheme: {Config.PASSWORD_HASH_SCHEME}")
+
+def _verify(password, password_hash):
+    if password_hash.startswith('$2'):
+        return bcrypt.checkpw(_bcrypt_bytes(password), password_hash.encode('utf-8'))
+    # Werkzeug hashes (pbkdf2 or scrypt) from before the scheme was configurable
+    return check_password_hash(password_hash, password)
+
+def needs_rehash(password_hash):
+    """Check whether a stored hash was made with other than the configured parameters"""
+    if Config.PASSWORD_HASH_SCHEME == 'bcrypt':
+        if not password_hash.startswith('$2'):
+            return True
+        return int(password_hash.split('$')[2]) != Config.PASSWORD_BCRYPT_ROUNDS
+    
+    method = password_hash.split('$', 1)[0].split(':')
+    if method[0] != 'pbkdf2' or method[1:2] != ['sha256']:
+        return True
+    return len(method) < 3 or int(method[2]) != Config.PASSWORD_PBKDF2_ITERATIONS
+
+def hash_password(password):
+    """Hash a password with the configured scheme and cost.
+
+    Runs on the calling thread; bcrypt and hashlib's pbkdf2 release the GIL,
+    so concurrent logins hash in parallel across request threads.
+    """
+    return _hash(password)
+
+def verify_password(password, password_hash):
+    """Verify a password against a stored bcrypt or werkzeug hash"""
+    if not password_hash:
+        return False
+    try:
+        return _verify(password, password_hash)
+    except ValueError:
+        # Malformed hash
+        return False
+
+def rehash_password(user_id, password, old_hash):
+    """Upgrade a stored hash to the configured parameters after a successful login"""
+    # Only replace the hash we verified, so a concurrent password change wins
+    mongo.db.users.update_one(
+        {"_id": user_id, "password": old_hash},
+        {"$set": {"password": hash_password(password)}}
+    )
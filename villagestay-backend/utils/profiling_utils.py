@@ -0,0 +1,191 @@
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from flask import g, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from config import Config
+from database import mongo
+from utils.auth_utils import get_current_user_type
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_QUERY_ARG = '__profile'
+
+# Only a few requests are sampled at once so profiling cannot pile up on a worker
+_active_profiles = threading.BoundedSemaphore(Config.PROFILE_MAX_CONCURRENT)
+
+# Longest sys.path entries first, so frames are labelled relative to the innermost root
+_path_prefixes = sorted(
+    {os.path.abspath(path) + os.sep for path in sys.path if path},
+    key=len, reverse=True
+)
+_frame_labels = {}  # code object -> "function (file:line)"
+
+def _frame_label(code):
+    label = _frame_labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        for prefix in _path_prefixes:
+            if filename.startswith(prefix):
+                filename = filename[len(prefix):]
+                break
+        # The definition line keeps every sample of a function on one frame
+        label = _frame_labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+    return label
+
+class StackSampler:
+    """Sample one thread's Python stack at a fixed interval into collapsed stack counts"""
+    
+    def __init__(self, thread_id, interval, max_seconds):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks = {}  # "root;...;leaf" -> samples
+        self.samples = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+    
+    def _run(self):
+        deadline = time.monotonic() + self.max_seconds
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None or time.monotonic() > deadline:
+                return
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stack = ';'.join(reversed(labels))
+            self.stacks[stack] = self.stacks.get(stack, 0) + 1
+            self.samples += 1
+    
+    def start(self):
+        self.started_at = time.perf_counter()
+        self.thread.start()
+    
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+def profile_requested():
+    """Whether the caller asked for this request to be profiled"""
+    return request.headers.get(PROFILE_HEADER) == '1' or request.args.get(PROFILE_QUERY_ARG) == '1'
+
+def _is_admin():
+    try:
+        verify_jwt_in_request(optional=True)
+    except Exception:
+        return False
+    if not get_jwt_identity():
+        return False
+    # The role comes from the user document, not the long-lived token claims
+    return get_current_user_type() == 'admin'
+
+def _start_profile():
+    if not Config.PROFILING_ENABLED or not profile_requested() or not _is_admin():
+        return
+    if not _active_profiles.acquire(blocking=False):
+        g.profile_busy = True
+        return
+    sampler = StackSampler(
+        threading.get_ident(),
+        Config.PROFILE_SAMPLE_INTERVAL_MS / 1000,
+        Config.PROFILE_MAX_SECONDS
+    )
+    sampler.start()
+    g.profile_sampler = sampler
+
+def _stop_profile():
+    sampler = g.pop('profile_sampler', None)
+    if sampler is not None:
+        sampler.stop()
+        _active_profiles.release()
+    return sampler
+
+def _finish_profile(response):
+    if g.pop('profile_busy', False):
+        response.headers[PROFILE_HEADER] = 'busy'
+        return response
+    sampler = _stop_profile()
+    if sampler is None:
+        return response
+    
+    # Streamed bodies are generated after this point, so only the handler is covered
+    profile = {
+        "method": request.method,
+        "path": request.full_path.rstrip('?'),
+        "endpoint": request.url_rule.rule if request.url_rule else None,
+        "status": response.status_code,
+        "user_id": get_jwt_identity(),
+        "duration_ms": round(sampler.duration * 1000, 1),
+        "interval_ms": Config.PROFILE_SAMPLE_INTERVAL_MS,
+        "sample_count": sampler.samples,
+        # Frame labels contain dots, so stacks are stored as pairs rather than keys
+        "stacks": sorted(([stack, count] for stack, count in sampler.stacks.items()), key=lambda pair: -pair[1]),
+        "created_at": datetime.utcnow()
+    }
+    try:
+        profile_id = mongo.db.profiles.insert_one(profile).inserted_id
+        response.headers[PROFILE_HEADER] = str(profile_id)
+    except Exception as e:
+        logger.warning("Profile save error: %s", e)
+    return response
+
+def _discard_profile(exception=None):
+    # Requests that fail before after_request still release their sampler
+    _stop_profile()
+
+def to_collapsed(profile):
+    """Brendan Gregg's collapsed stack format, one "stack count" line per stack"""
+    return ''.join(f"{stack} {count}\n" for stack, count in profile['stacks'])
+
+def to_speedscope(profile):
+    """A speedscope sampled profile with sample weights in milliseconds"""
+    # Busy threads hold the GIL past the sampling interval, so weight by the observed spacing
+    sample_ms = profile['duration_ms'] / profile['sample_count'] if profile['sample_count'] else profile['interval_ms']
+    frames = []
+    frame_index = {}
+    samples = []
+    weights = []
+    for stack, count in profile['stacks']:
+        indexes = []
+        for label in stack.split(';'):
+            if label not in frame_index:
+                name, _, location = label.partition(' (')
+                file, _, line = location.rstrip(')').rpartition(':')
+                frame_index[label] = len(frames)
+                frames.append({"name": name, "file": file, "line": int(line) if line.isdigit() else None})
+            indexes.append(frame_index[label])
+        samples.append(indexes)
+        weights.append(round(count * sample_ms, 3))
+    
+    name = f"{profile['method']} {profile['path']}"
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "villagestay",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights
+        }]
+    }
+
+def init_profiling(app):
+    """Let admins profile a single request with an X-Profile: 1 header or ?__profile=1"""
+    if not Config.PROFILING_ENABLED:
+        return
+    
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
+    app.teardown_request(_discard_profile)
@@ -0,0 +1,107 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, jsonify, make_response
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from config import Config
+
+class TokenBucket:
+    """Allow ``capacity`` requests per ``period`` seconds, refilling continuously"""
+    
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+    
+    def take(self):
+        """Consume one token; returns 0 on success or the seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+# (endpoint_class, client) -> TokenBucket, least recently used first
+_buckets = OrderedDict()
+_buckets_lock = threading.Lock()
+
+_ai_slots = threading.BoundedSemaphore(Config.AI_MAX_CONCURRENT)
+
+def parse_rate_limit(spec):
+    """Parse "<requests>/<seconds>" into (capacity, period)"""
+    capacity, period = spec.split('/')
+    return int(capacity), float(period)
+
+def _client_key():
+    try:
+        verify_jwt_in_request(optional=True)
+        user_id = get_jwt_identity()
+    except Exception:
+        user_id = None
+    return f"user:{user_id}" if user_id else f"ip:{request.remote_addr}"
+
+def check_rate_limit(endpoint_class, client_key):
+    """Take a token from the client's bucket; returns seconds to wait, or 0 if allowed"""
+    capacity, period = parse_rate_limit(Config.RATE_LIMITS[endpoint_class])
+    key = (endpoint_class, client_key)
+    with _buckets_lock:
+        bucket = _buckets.get(key)
+        if bucket is None:
+            bucket = _buckets[key] = TokenBucket(capacity, period)
+            while len(_buckets) > Config.RATE_LIMIT_MAX_BUCKETS:
+                _buckets.popitem(last=False)
+        else:
+            _buckets.move_to_end(key)
+        return bucket.take()
+
+def acquire_ai_slot():
+    """Reserve one of the process-wide upstream AI slots, waiting briefly"""
+    return _ai_slots.acquire(timeout=Config.AI_ADMISSION_WAIT_SECONDS)
+
+def release_ai_slot():
+    _ai_slots.release()
+
+def _too_many_requests(message, retry_after):
+    response = jsonify({"error": message, "retry_after": retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def rate_limited(endpoint_class, upstream=True):
+    """Apply the endpoint class's per-client token bucket and, for upstream AI
+    calls, the process-wide concurrency limit. Place below @jwt_required.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not Config.RATE_LIMIT_ENABLED:
+                return f(*args, **kwargs)
+            
+            wait = check_rate_limit(endpoint_class, _client_key())
+            if wait:
+                return _too_many_requests("Rate limit exceeded", math.ceil(wait))
+            
+            if not upstream:
+                return f(*args, **kwargs)
+            
+            # Shed load instead of queueing, so cheap endpoints keep their threads
+            if not acquire_ai_slot():
+                return _too_many_requests("AI service is busy, please retry shortly", Config.AI_RETRY_AFTER_SECONDS)
+            streaming = False
+            try:
+                response = make_response(f(*args, **kwargs))
+                if response.is_streamed:
+                    # Streamed replies call upstream while sending, so hold the slot until then
+                    response.call_on_close(release_ai_slot)
+                    streaming = True
+                return response
+            finally:
+                if not streaming:
+                    release_ai_slot()
+        return decorated_function
+    return decorator
@@ -0,0 +1,248 @@
+from datetime import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+from database import mongo
+from utils.cache_utils import invalidate_listing_cache
+from utils.sustainability_utils import schedule_sustainability_recompute
+
+RATING_VALUES = [1, 2, 3, 4, 5]
+
+# Substrings counted as sustainability mentions in review comments
+ECO_KEYWORDS = ['eco', 'green']
+
+def is_eco_mention(comment):
+    """Check whether a review comment mentions sustainability"""
+    comment = (comment or '').lower()
+    return any(keyword in comment for keyword in ECO_KEYWORDS)
+
+def empty_review_stats():
+    """Review aggregate with no reviews counted"""
+    return {
+        "count": 0,
+        "rating_sum": 0,
+        "histogram": {str(rating): 0 for rating in RATING_VALUES},
+        "eco_mentions": 0
+    }
+
+def _add_to_stats(stats, review):
+    stats['count'] += 1
+    stats['rating_sum'] += review['rating']
+    stats['histogram'][str(int(review['rating']))] += 1
+    if is_eco_mention(review.get('comment')):
+        stats['eco_mentions'] += 1
+
+def _aggregate_review_stats(query):
+    stats = empty_review_stats()
+    for review in mongo.db.reviews.find(query, {"rating": 1, "comment": 1}):
+        _add_to_stats(stats, review)
+    return stats
+
+def seed_user_review_stats(user_id):
+    """Build a user's review aggregate from their reviews and store it if still missing.
+
+    Covers hosts whose reviews predate incremental aggregates until
+    rebuild-review-stats has run; the stored value wins a race with another seed.
+    """
+    stats = _aggregate_review_stats({"reviewee_id": user_id})
+    mongo.db.users.update_one(
+        {"_id": user_id, "review_stats": {"$exists": False}}, {"$set": {"review_stats": stats}}
+    )
+    return stats
+
+def seed_listing_review_stats(listing_id):
+    """Build a listing's review aggregate, rating and review_count if still missing"""
+    # Older reviews only reference the booking
+    booking_ids = [booking['_id'] for booking in mongo.db.bookings.find({"listing_id": listing_id}, {"_id": 1})]
+    stats = _aggregate_review_stats({"$or": [{"listing_id": listing_id}, {"booking_id": {"$in": booking_ids}}]})
+    mongo.db.listings.update_one(
+        {"_id": listing_id, "review_stats": {"$exists": False}},
+        {"$set": {
+            "review_stats": stats,
+            "rating": get_average_rating(stats),
+            "review_count": stats['count'],
+            "updated_at": datetime.utcnow()
+        }}
+    )
+    return stats
+
+def load_review_stats(user_id):
+    """Get a user's review aggregate, seeding it from their reviews when it was never stored"""
+    user = mongo.db.users.find_one({"_id": user_id}, {"review_stats": 1})
+    if not user:
+        return empty_review_stats()
+    if 'review_stats' not in user:
+        return seed_user_review_stats(user_id)
+    return get_review_stats(user)
+
+def _stats_increments(review, sign):
+    return {
+        "review_stats.count": sign,
+        "review_stats.rating_sum": sign * review['rating'],
+        f"review_stats.histogram.{int(review['rating'])}": sign,
+        "review_stats.eco_mentions": sign if is_eco_mention(review.get('comment')) else 0
+    }
+
+def _listing_delta_pipeline(increments):
+    """Update pipeline applying the increments and deriving rating and review_count in one write"""
+    return [
+        {"$set": {
+            path: {"$add": [{"$ifNull": [f"${path}", 0]}, amount]}
+            for path, amount in increments.items()
+        }},
+        {"$set": {
+            "rating": {"$cond": [
+                {"$gt": ["$review_stats.count", 0]},
+                {"$round": [{"$divide": ["$review_stats.rating_sum", "$review_stats.count"]}, 1]},
+                0.0
+            ]},
+            "review_count": {"$max": ["$review_stats.count", 0]},
+            "updated_at": datetime.utcnow()
+        }}
+    ]
+
+def _apply_review_delta(review, sign):
+    """Apply a review insert (+1) or delete (-1) to host and listing aggregates"""
+    increments = _stats_increments(review, sign)
+    
+    # Increments only apply to an existing aggregate; a missing one is seeded from
+    # the reviews collection, which already reflects this insert or delete
+    result = mongo.db.users.update_one(
+        {"_id": review['reviewee_id'], "review_stats": {"$exists": True}}, {"$inc": increments}
+    )
+    if not result.matched_count:
+        seed_user_review_stats(review['reviewee_id'])
+    
+    if review.get('listing_id'):
+        # Rating is derived inside the same update, so concurrent reviews cannot leave it stale
+        result = mongo.db.listings.update_one(
+            {"_id": review['listing_id'], "review_stats": {"$exists": True}}, _listing_delta_pipeline(increments)
+        )
+        if not result.matched_count:
+            seed_listing_review_stats(review['listing_id'])
+    
+    # Host reviews show on every listing detail page, ratings on browse pages
+    invalidate_listing_cache(all_details=True)
+    
+    # Eco mentions feed the sustainability score of all the host's listings
+    if is_eco_mention(review.get('comment')):
+        schedule_sustainability_recompute(host_id=review['reviewee_id'])
+
+def record_review(review_doc):
+    """Insert a review and fold it into the running aggregates.
+
+    Raises DuplicateKeyError, before touching any aggregate, if the reviewer
+    already reviewed the booking.
+    """
+    result = mongo.db.reviews.insert_one(review_doc)
+    _apply_review_delta(review_doc, 1)
+    return result.inserted_id
+
+def delete_review(review_id):
+    """Delete a review and remove it from the running aggregates"""
+    review = mongo.db.reviews.find_one_and_delete({"_id": ObjectId(review_id)})
+    if not review:
+        return False
+    _apply_review_delta(review, -1)
+    return True
+
+def get_review_stats(doc):
+    """Get the stored review aggregate from a user or listing document"""
+    stats = empty_review_stats()
+    stored = (doc or {}).get('review_stats') or {}
+    stats.update({key: value for key, value in stored.items() if key != 'histogram'})
+    stats['histogram'].update(stored.get('histogram', {}))
+    return stats
+
+def get_average_rating(stats):
+    """Average rating from a review aggregate"""
+    return round(stats['rating_sum'] / stats['count'], 1) if stats['count'] > 0 else 0
+
+def get_review_page(reviewee_id, page=1, limit=5):
+    """Get one page of reviews for a reviewee, newest first"""
+    skip = (page - 1) * limit
+    return list(mongo.db.reviews.find({"reviewee_id": reviewee_id})
+                .sort("created_at", -1)
+                .skip(skip)
+                .limit(limit))
+
+def get_review_summary(reviewee_id):
+    """Get review count, average rating and rating histogram from the stored aggregate"""
+    stats = load_review_stats(reviewee_id)
+    
+    return {
+        "count": stats['count'],
+        "average": get_average_rating(stats),
+        "histogram": stats['histogram']
+    }
+
+def find_duplicate_reviews(limit=100):
+    """Bookings reviewed more than once by the same reviewer, which block the unique review index"""
+    return list(mongo.db.reviews.aggregate([
+        {"$group": {
+            "_id": {"booking_id": "$booking_id", "reviewer_id": "$reviewer_id"},
+            "review_ids": {"$push": "$_id"},
+            "count": {"$sum": 1}
+        }},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": limit}
+    ], allowDiskUse=True))
+
+def rebuild_review_stats():
+    """Recompute every review aggregate from the reviews collection.
+
+    Repairs drift from partial failures and seeds aggregates for reviews
+    written before they were maintained incrementally.
+    """
+    user_stats = {}
+    listing_stats = {}
+    booking_listings = {}
+    
+    reviews = mongo.db.reviews.find(
+        {}, {"reviewee_id": 1, "listing_id": 1, "booking_id": 1, "rating": 1, "comment": 1}
+    )
+    
+    for review in reviews:
+        listing_id = review.get('listing_id')
+        if not listing_id and review.get('booking_id'):
+            # Older reviews only reference the booking
+            if review['booking_id'] not in booking_listings:
+                booking = mongo.db.bookings.find_one({"_id": review['booking_id']}, {"listing_id": 1})
+                booking_listings[review['booking_id']] = booking['listing_id'] if booking else None
+            listing_id = booking_listings[review['booking_id']]
+        
+        targets = [(user_stats, review['reviewee_id'])]
+        if listing_id:
+            targets.append((listing_stats, listing_id))
+        
+        for stats_by_id, target_id in targets:
+            _add_to_stats(stats_by_id.setdefault(target_id, empty_review_stats()), review)
+    
+    # Reset stale aggregates first so documents that lost all reviews read as zero
+    now = datetime.utcnow()
+    mongo.db.users.update_many(
+        {"review_stats": {"$exists": True}}, {"$set": {"review_stats": empty_review_stats()}}
+    )
+    mongo.db.listings.update_many(
+        {"review_stats": {"$exists": True}},
+        {"$set": {"review_stats": empty_review_stats(), "rating": 0.0, "review_count": 0, "updated_at": now}}
+    )
+    
+    if user_stats:
+        mongo.db.users.bulk_write([
+            UpdateOne({"_id": user_id}, {"$set": {"review_stats": stats}})
+            for user_id, stats in user_stats.items()
+        ])
+    if listing_stats:
+        mongo.db.listings.bulk_write([
+            UpdateOne({"_id": listing_id}, {"$set": {
+                "review_stats": stats,
+                "rating": get_average_rating(stats),
+                "review_count": stats['count'],
+                "updated_at": now
+            }})
+            for listing_id, stats in listing_stats.items()
+        ])
+    
+    invalidate_listing_cache(all_details=True)
+    
+    return {"users": len(user_stats), "listings": len(listing_stats)}
@@ -0,0 +1,198 @@
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+from pymongo import monitoring
+from config import Config
+from database import mongo
+from utils.background_utils import run_in_background
+
+logger = logging.getLogger(__name__)
+
+# Commands whose plans are worth explaining; writes are explained by their filter
+PROFILED_COMMANDS = {'find', 'aggregate', 'count', 'distinct', 'update', 'delete', 'findAndModify'}
+
+# The log's own writes and explains must never feed back into it
+IGNORED_COLLECTIONS = {'slow_queries'}
+
+# Driver and session fields that are not part of the query itself
+_SESSION_FIELDS = {
+    'lsid', 'txnNumber', 'autocommit', 'startTransaction', 'readConcern',
+    'writeConcern', 'comment', 'maxTimeMS', '$db', '$clusterTime', '$readPreference'
+}
+
+# Operators whose array operand is a list of values rather than of sub-expressions
+COLLAPSED_ARRAY_OPERATORS = {'$in', '$nin', '$all'}
+
+def query_shape(value, key=None):
+    """Replace literal values with placeholders, keeping field names and operators.
+
+    Value lists ($in, $nin, $all and array literals) of any length share a
+    shape; the branches of $or, $and, $nor and other expression operands are
+    kept one by one, so queries over different fields stay apart.
+    """
+    if isinstance(value, dict):
+        return {name: query_shape(item, name) for name, item in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        if key is None or not key.startswith('$') or key in COLLAPSED_ARRAY_OPERATORS:
+            return ['?'] if value else []
+        return [query_shape(item) for item in value]
+    return '?'
+
+def command_shape(command_name, command):
+    """Describe the filter, sort and pipeline structure of a command"""
+    shape = {}
+    if command_name == 'find':
+        shape['filter'] = query_shape(command.get('filter', {}))
+        if command.get('sort'):
+            shape['sort'] = dict(command['sort'])
+    elif command_name == 'aggregate':
+        stages = []
+        for stage in command.get('pipeline', []):
+            name = next(iter(stage), '?')
+            # Only $match and $sort decide index use; other stages are named only
+            if name == '$match':
+                stages.append({name: query_shape(stage[name])})
+            elif name == '$sort':
+                stages.append({name: dict(stage[name])})
+            else:
+                stages.append(name)
+        shape['pipeline'] = stages
+    elif command_name in ('count', 'distinct'):
+        shape['query'] = query_shape(command.get('query', {}))
+        if command_name == 'distinct':
+            shape['key'] = command.get('key')
+    elif command_name in ('update', 'delete'):
+        statements = command.get('updates' if command_name == 'update' else 'deletes') or [{}]
+        shape['q'] = query_shape(statements[0].get('q', {}))
+    elif command_name == 'findAndModify':
+        shape['query'] = query_shape(command.get('query', {}))
+        if command.get('sort'):
+            shape['sort'] = dict(command['sort'])
+    return shape
+
+def fingerprint(command_name, collection, shape):
+    text = json.dumps([command_name, collection, shape], sort_keys=True, default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+def summarize_plan(explain_result):
+    """Reduce an explain() result to its winning plan's stages and indexes"""
+    planner = explain_result.get('queryPlanner')
+    if planner is None:
+        # Aggregations nest the planner under their first stage
+        for stage in explain_result.get('stages', []):
+            if '$cursor' in stage:
+                planner = stage['$cursor'].get('queryPlanner')
+                break
+    plan = (planner or {}).get('winningPlan', {})
+    plan = plan.get('queryPlan', plan)
+    
+    stages, indexes = [], []
+    pending = [plan]
+    while pending:
+        node = pending.pop()
+        if not node:
+            continue
+        stages.append(node.get('stage', '?'))
+        if node.get('indexName'):
+            indexes.append(node['indexName'])
+        pending.extend(node.get('inputStages', []))
+        pending.append(node.get('inputStage'))
+    
+    return {
+        "stages": stages,
+        "indexes": indexes,
+        "collection_scan": 'COLLSCAN' in stages
+    }
+
+def explain_command(command_name, command):
+    """Run explain (queryPlanner verbosity, so nothing executes) for a captured command"""
+    explainable = {key: value for key, value in command.items() if key not in _SESSION_FIELDS}
+    if command_name == 'aggregate':
+        explainable['cursor'] = {}
+    return mongo.db.command({"explain": explainable, "verbosity": "queryPlanner"})
+
+def record_slow_query(key, command_name, collection, shape, duration_ms, command, explain):
+    """Fold one slow operation into its fingerprint's totals, optionally with a fresh plan"""
+    now = datetime.utcnow()
+    update = {
+        "$inc": {"count": 1, "total_ms": duration_ms},
+        "$max": {"max_ms": duration_ms},
+        "$set": {"last_seen": now},
+        "$setOnInsert": {
+            "command": command_name,
+            "collection": collection,
+            "shape": json.dumps(shape, sort_keys=True, default=str),
+            "first_seen": now
+        }
+    }
+    if explain:
+        try:
+            update["$set"]["plan"] = summarize_plan(explain_command(command_name, command))
+            update["$set"]["explained_at"] = now
+        except Exception as e:
+            logger.warning("Slow query explain error: %s", e)
+    mongo.db.slow_queries.update_one({"_id": key}, update, upsert=True)
+
+class SlowQueryListener(monitoring.CommandListener):
+    """Log operations slower than SLOW_QUERY_THRESHOLD_MS, aggregated by query shape"""
+    
+    def __init__(self):
+        self.pending = {}  # (connection, request id) -> (command name, collection, command)
+        self.explained_at = {}  # fingerprint -> monotonic time of the last explain
+        self.lock = threading.Lock()
+    
+    def started(self, event):
+        if event.command_name not in PROFILED_COMMANDS:
+            return
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str) or collection in IGNORED_COLLECTIONS:
+            return
+        with self.lock:
+            self.pending[(event.connection_id, event.request_id)] = (event.command_name, collection, event.command)
+    
+    def _finish(self, event):
+        with self.lock:
+            captured = self.pending.pop((event.connection_id, event.request_id), None)
+        if captured is None:
+            return
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < Config.SLOW_QUERY_THRESHOLD_MS:
+            return
+        
+        command_name, collection, command = captured
+        shape = command_shape(command_name, command)
+        key = fingerprint(command_name, collection, shape)
+        logger.warning(
+            "Slow query %.0fms: %s %s", duration_ms, command_name, collection,
+            extra={"fingerprint": key, "duration_ms": round(duration_ms, 1), "shape": shape}
+        )
+        
+        explain = False
+        # Explain is opt-in: it issues an extra command against a database that is already slow
+        if Config.SLOW_QUERY_EXPLAIN_SAMPLE_RATE > 0 and random.random() < Config.SLOW_QUERY_EXPLAIN_SAMPLE_RATE:
+            now = time.monotonic()
+            with self.lock:
+                if now - self.explained_at.get(key, float('-inf')) >= Config.SLOW_QUERY_EXPLAIN_INTERVAL:
+                    self.explained_at[key] = now
+                    explain = True
+        
+        # Persisting issues more commands, so keep it off the request thread
+        run_in_background(record_slow_query, key, command_name, collection, shape, duration_ms, command, explain)
+    
+    def succeeded(self, event):
+        self._finish(event)
+    
+    def failed(self, event):
+        self._finish(event)
+
+def get_slow_query_report(limit=20, sort_by='total_ms'):
+    """Slow query fingerprints, worst first"""
+    report = []
+    for entry in mongo.db.slow_queries.find().sort(sort_by, -1).limit(limit):
+        entry['avg_ms'] = entry['total_ms'] / entry['count'] if entry.get('count') else 0
+        report.append(entry)
+    return report
@@ -0,0 +1,22 @@
+import json
+from flask import Response, request, stream_with_context
+
+def wants_stream(data):
+    """Check whether a chat request asked for a Server-Sent Events reply"""
+    return bool(data.get('stream')) or 'text/event-stream' in request.headers.get('Accept', '')
+
+def sse_event(event, payload):
+    """Format one Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+def sse_response(events):
+    """Stream an iterable of formatted events to the client as they are produced"""
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            # Stop nginx from buffering the stream
+            'X-Accel-Buffering': 'no'
+        }
+    )
@@ -0,0 +1,98 @@
+from datetime import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+from database import mongo
+from utils.background_utils import run_in_background
+from utils.cache_utils import invalidate_listing_cache
+
+# Points per sustainability feature; unknown features score DEFAULT_FEATURE_SCORE
+FEATURE_SCORES = {
+    'solar_power': 15,
+    'rainwater_harvesting': 10,
+    'organic_farming': 12,
+    'waste_composting': 8,
+    'local_sourcing': 10,
+    'plastic_free': 8,
+    'energy_efficient': 7,
+    'water_conservation': 9,
+    'local_employment': 15,
+    'cultural_preservation': 6
+}
+DEFAULT_FEATURE_SCORE = 5
+
+def compute_sustainability_score(sustainability_features, eco_mentions=0):
+    """Score listing features plus a bonus for eco mentions in host reviews"""
+    score = 0
+    for feature in sustainability_features:
+        score += FEATURE_SCORES.get(feature, DEFAULT_FEATURE_SCORE)
+    
+    # Cap at 100
+    score = min(100, score)
+    
+    if eco_mentions > 0:
+        score += min(10, eco_mentions * 2)
+    
+    return min(100, score)
+
+def get_sustainability_grade(score):
+    """Get sustainability grade based on score"""
+    if score >= 80:
+        return "A+"
+    elif score >= 70:
+        return "A"
+    elif score >= 60:
+        return "B+"
+    elif score >= 50:
+        return "B"
+    elif score >= 40:
+        return "C+"
+    elif score >= 30:
+        return "C"
+    else:
+        return "D"
+
+def recompute_sustainability_scores(query=None):
+    """Recompute and store sustainability scores for listings matching a query"""
+    listings = list(mongo.db.listings.find(
+        query or {}, {"host_id": 1, "sustainability_features": 1}
+    ))
+    if not listings:
+        return 0
+    
+    # Eco mentions come from each host's running review aggregate, seeded where never stored
+    from utils.review_utils import seed_user_review_stats
+    host_ids = list({listing['host_id'] for listing in listings})
+    eco_mentions = {}
+    for host in mongo.db.users.find({"_id": {"$in": host_ids}}, {"review_stats.eco_mentions": 1}):
+        stats = host['review_stats'] if 'review_stats' in host else seed_user_review_stats(host['_id'])
+        eco_mentions[host['_id']] = stats.get('eco_mentions', 0)
+    
+    now = datetime.utcnow()
+    updates = []
+    for listing in listings:
+        score = compute_sustainability_score(
+            listing.get('sustainability_features', []),
+            eco_mentions.get(listing['host_id'], 0)
+        )
+        updates.append(UpdateOne({"_id": listing['_id']}, {"$set": {
+            "sustainability_score": score,
+            "sustainability_grade": get_sustainability_grade(score),
+            "sustainability_updated_at": now,
+            "updated_at": now
+        }}))
+    
+    mongo.db.listings.bulk_write(updates)
+    
+    invalidate_listing_cache(all_details=True)
+    
+    return len(updates)
+
+def schedule_sustainability_recompute(listing_id=None, host_id=None):
+    """Recompute scores off the request thread after features or reviews change"""
+    if listing_id:
+        query = {"_id": ObjectId(listing_id)}
+    elif host_id:
+        query = {"host_id": ObjectId(host_id)}
+    else:
+        return None
+    return run_in_background(recompute_sustainability_scores, query)